@@ -28,6 +28,7 @@ from .services.node.node_cli import node
 from .services.email.email_cli import email
 from .services.server.server_cli import server
 from .services.create.create_cli import create
+from .services.fleet.fleet_cli import fleet
 
 @click.group()
 @click.option('--debug', is_flag=True, help="Enable debug logging")
@@ -102,6 +103,7 @@ cli.add_command(node)
 cli.add_command(email)
 cli.add_command(server)
 cli.add_command(admin)
+cli.add_command(fleet)
 
 if __name__ == '__main__':
     cli()
\ No newline at end of file
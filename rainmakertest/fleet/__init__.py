@@ -0,0 +1,6 @@
+"""
+Fleet analytics package for rainmakertest
+"""
+from .fleet_report import FleetColumns, build_report
+
+__all__ = ['FleetColumns', 'build_report']
@@ -0,0 +1,200 @@
+from array import array
+from collections import Counter
+from itertools import accumulate, chain
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..nodes.node_record import NodeRecord
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; fall back to the array module
+    np = None
+
+# Categorical columns that reports can group by
+DIMENSIONS = ("model", "fw_version", "project_name", "type", "subtype")
+
+ONLINE = 1
+OFFLINE = 0
+UNKNOWN = -1
+_ONLINE_CODES = {True: ONLINE, False: OFFLINE, None: UNKNOWN}
+
+
+class FleetColumns:
+    """Node inventory encoded as columnar arrays.
+
+    Each categorical field is stored as an array of integer codes plus a label
+    list, online state as a signed byte per node and tags as a CSR-style pair
+    of offsets and tag codes. Reports group on the integer codes, with NumPy
+    when it is installed and Counter over the arrays otherwise.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.codes: Dict[str, array] = {dim: array('i') for dim in DIMENSIONS}
+        self.labels: Dict[str, List[Optional[str]]] = {dim: [] for dim in DIMENSIONS}
+        self._lookup: Dict[str, Dict[Optional[str], int]] = {dim: {} for dim in DIMENSIONS}
+        self.online = array('b')
+        self.tag_offsets = array('q', [0])
+        self.tag_codes = array('i')
+        self.tag_labels: List[str] = []
+        self._tag_lookup: Dict[str, int] = {}
+
+    @staticmethod
+    def _encode(lookup: Dict, labels: List, value) -> int:
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(labels)
+            labels.append(value)
+        return code
+
+    def append(self, record: NodeRecord) -> None:
+        for dim in DIMENSIONS:
+            self.codes[dim].append(self._encode(self._lookup[dim], self.labels[dim], getattr(record, dim)))
+        self.online.append(_ONLINE_CODES[record.online])
+        for tag in dict.fromkeys(record.tags):
+            self.tag_codes.append(self._encode(self._tag_lookup, self.tag_labels, tag))
+        self.tag_offsets.append(len(self.tag_codes))
+        self.size += 1
+
+    @classmethod
+    def from_records(cls, records: Iterable[NodeRecord]) -> "FleetColumns":
+        """Encode records column by column, which is much faster than append()"""
+        records = records if isinstance(records, Sequence) else [*records]
+        return cls._from_columns(len(records), lambda field: [getattr(record, field) for record in records])
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Dict]) -> "FleetColumns":
+        """Encode node inventory entries directly, without building a NodeRecord per node"""
+        entries = entries if isinstance(entries, Sequence) else [*entries]
+        return cls._from_columns(len(entries), lambda field: [entry.get(field) for entry in entries])
+
+    @classmethod
+    def _from_columns(cls, size: int, column: Callable[[str], List]) -> "FleetColumns":
+        """Build the columns from column(field), the list of that field for every node"""
+        columns = cls()
+        columns.size = size
+        for dim in DIMENSIONS:
+            values = column(dim)
+            columns.labels[dim] = [*dict.fromkeys(values)]
+            lookup = columns._lookup[dim] = {value: code for code, value in enumerate(columns.labels[dim])}
+            columns.codes[dim] = array('i', [lookup[value] for value in values])
+        columns.online = array('b', [_ONLINE_CODES[online] for online in column("online")])
+        tags = [node_tags or () for node_tags in column("tags")]
+        all_tags = [*chain.from_iterable(tags)]
+        if any(len(set(node_tags)) != len(node_tags) for node_tags in tags):
+            # Count a tag once per node even if the node lists it twice
+            tags = [[*dict.fromkeys(node_tags)] for node_tags in tags]
+            all_tags = [*chain.from_iterable(tags)]
+        columns.tag_offsets = array('q', [0])
+        columns.tag_offsets.extend(accumulate(len(node_tags) for node_tags in tags))
+        columns.tag_labels = [*dict.fromkeys(all_tags)]
+        columns._tag_lookup = {tag: code for code, tag in enumerate(columns.tag_labels)}
+        columns.tag_codes = array('i', [columns._tag_lookup[tag] for tag in all_tags])
+        return columns
+
+    def cardinality(self, dim: str) -> int:
+        return len(self.labels[dim])
+
+
+def _group_keys(columns: FleetColumns, dims: Sequence[str]) -> Tuple[object, List[int]]:
+    """Combine the code columns of dims into a single integer key per node"""
+    sizes = [max(columns.cardinality(dim), 1) for dim in dims]
+    if np is not None:
+        keys = np.zeros(columns.size, dtype=np.int64)
+        for dim, size in zip(dims, sizes):
+            keys = keys * size + np.frombuffer(columns.codes[dim], dtype=np.int32)
+        return keys, sizes
+    keys = columns.codes[dims[0]]
+    for dim, size in zip(dims[1:], sizes[1:]):
+        keys = array('q', [key * size + code for key, code in zip(keys, columns.codes[dim])])
+    return keys, sizes
+
+
+def _decode_key(columns: FleetColumns, dims: Sequence[str], sizes: List[int], key: int) -> List[Optional[str]]:
+    labels = []
+    for dim, size in reversed([*zip(dims, sizes)]):
+        key, code = divmod(key, size)
+        labels.append(columns.labels[dim][code])
+    return labels[::-1]
+
+
+def _bincount(keys, weights=None) -> Dict[int, int]:
+    """Count keys (optionally only where weights is truthy) as {key: count}"""
+    if np is not None:
+        counts = np.bincount(keys[weights] if weights is not None else keys)
+        nonzero = np.flatnonzero(counts)
+        return dict(zip(nonzero.tolist(), counts[nonzero].tolist()))
+    if weights is None:
+        return Counter(keys)
+    return Counter(key for key, weight in zip(keys, weights) if weight)
+
+
+def _online_mask(columns: FleetColumns):
+    if np is not None:
+        return np.frombuffer(columns.online, dtype=np.int8) == ONLINE
+    return array('b', [state == ONLINE for state in columns.online])
+
+
+def count_by(columns: FleetColumns, dims: Sequence[str]) -> List[Dict]:
+    """Node counts grouped by dims, largest groups first"""
+    if not columns.size:
+        return []
+    keys, sizes = _group_keys(columns, dims)
+    counts = _bincount(keys)
+    rows = []
+    for key, count in counts.items():
+        row = dict(zip(dims, _decode_key(columns, dims, sizes, key)))
+        row["nodes"] = count
+        row["share"] = round(count / columns.size, 4)
+        rows.append(row)
+    return sorted(rows, key=lambda row: -row["nodes"])
+
+
+def online_ratio_by(columns: FleetColumns, dims: Sequence[str]) -> List[Dict]:
+    """Online node ratio grouped by dims"""
+    if not columns.size:
+        return []
+    keys, sizes = _group_keys(columns, dims)
+    totals = _bincount(keys)
+    online = _bincount(keys, _online_mask(columns))
+    rows = []
+    for key, total in totals.items():
+        row = dict(zip(dims, _decode_key(columns, dims, sizes, key)))
+        row["nodes"] = total
+        row["online"] = online.get(key, 0)
+        row["online_ratio"] = round(row["online"] / total, 4)
+        rows.append(row)
+    return sorted(rows, key=lambda row: (-row["nodes"], [str(row[dim]) for dim in dims]))
+
+
+def tag_coverage(columns: FleetColumns) -> List[Dict]:
+    """Number and share of nodes carrying each tag"""
+    if not columns.size or not columns.tag_labels:
+        return []
+    if np is not None:
+        counts = np.bincount(np.frombuffer(columns.tag_codes, dtype=np.int32), minlength=len(columns.tag_labels))
+        counts = counts.tolist()
+    else:
+        counter = Counter(columns.tag_codes)
+        counts = [counter.get(code, 0) for code in range(len(columns.tag_labels))]
+    rows = [
+        {"tag": tag, "nodes": count, "coverage": round(count / columns.size, 4)}
+        for tag, count in zip(columns.tag_labels, counts)
+    ]
+    return sorted(rows, key=lambda row: -row["nodes"])
+
+
+def build_report(columns: FleetColumns, sections: Iterable[str] = ("fw", "online", "tags")) -> Dict[str, List[Dict]]:
+    """Build the standard fleet report sections"""
+    report = {}
+    for section in sections:
+        if section == "fw":
+            report["fw_version_distribution"] = count_by(columns, ("model", "fw_version"))
+        elif section == "online":
+            report["online_ratio_by_model"] = online_ratio_by(columns, ("model",))
+            report["online_ratio_by_project"] = online_ratio_by(columns, ("project_name",))
+        elif section == "tags":
+            report["tag_coverage"] = tag_coverage(columns)
+        else:
+            raise ValueError(f"Unknown report section: {section}")
+    return report
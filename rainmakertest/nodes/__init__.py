@@ -1,4 +1,8 @@
 from .node_service import NodeService
 from .node_admin_service import NodeAdminService
+from .node_inventory import NodeInventory
+from .node_record import NodeRecord
+from .sharing_index import SharingIndex
+from .tag_index import TagIndex
 
-__all__ = ['NodeService', 'NodeAdminService']
\ No newline at end of file
+__all__ = ['NodeService', 'NodeAdminService', 'NodeInventory', 'NodeRecord', 'SharingIndex', 'TagIndex']
\ No newline at end of file
@@ -0,0 +1,166 @@
+import csv
+import json
+import logging
+from itertools import chain
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from .node_sharing_service import NodeSharingService
+from ..utils.concurrency import DEFAULT_MAX_WORKERS, RateLimiter, run_concurrent
+
+# Largest node list sent in one sharing request
+DEFAULT_MAX_NODES_PER_REQUEST = 100
+
+TRUE_VALUES = {"1", "true", "yes", "y", "primary"}
+
+
+def parse_sharing_rows(stream: TextIO) -> Iterator[Dict]:
+    """Parse (user_name, nodes, primary) rows from JSON lines or CSV.
+
+    CSV needs user_name and nodes columns (nodes separated by ';' or ',' when
+    quoted) and an optional primary column. JSON lines look like
+    {"user_name": "...", "nodes": [...], "primary": false}.
+    """
+    first = stream.readline()
+    while first and not first.strip():
+        first = stream.readline()
+    if not first:
+        return
+    if first.lstrip().startswith("{"):
+        for line_number, line in enumerate(chain([first], stream), start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+            yield _normalize_row(row, line_number)
+        return
+
+    reader = csv.DictReader(chain([first], stream))
+    for line_number, row in enumerate(reader, start=2):
+        yield _normalize_row(row, line_number)
+
+
+def _normalize_row(row: Dict, line_number: int) -> Dict:
+    user_name = (row.get("user_name") or "").strip()
+    if not user_name:
+        raise ValueError(f"Missing user_name on line {line_number}")
+    nodes = row.get("nodes") or []
+    if isinstance(nodes, str):
+        nodes = nodes.replace(";", ",").split(",")
+    nodes = [node.strip() for node in nodes if node and node.strip()]
+    if not nodes:
+        raise ValueError(f"No nodes on line {line_number}")
+    primary = row.get("primary")
+    if isinstance(primary, str):
+        primary = primary.strip().lower() in TRUE_VALUES
+    return {"user_name": user_name, "nodes": nodes, "primary": bool(primary)}
+
+
+def plan_share_requests(rows: Iterable[Dict], max_nodes: int = DEFAULT_MAX_NODES_PER_REQUEST) -> List[Dict]:
+    """Merge rows per (user, primary) and split the node lists into request-sized chunks"""
+    if max_nodes < 1:
+        raise ValueError("max_nodes must be at least 1")
+    grouped: Dict[tuple, Dict[str, None]] = {}
+    for row in rows:
+        nodes = grouped.setdefault((row["user_name"], row["primary"]), {})
+        nodes.update(dict.fromkeys(row["nodes"]))
+
+    requests = []
+    for (user_name, primary), nodes in grouped.items():
+        nodes = [*nodes]
+        for start in range(0, len(nodes), max_nodes):
+            requests.append({"user_name": user_name, "primary": primary, "nodes": nodes[start:start + max_nodes]})
+    return requests
+
+
+class BulkSharer:
+    """Share node lists with many users using as few concurrent requests as possible."""
+
+    def __init__(
+            self,
+            sharing_service: NodeSharingService,
+            max_nodes_per_request: int = DEFAULT_MAX_NODES_PER_REQUEST,
+            max_workers: int = DEFAULT_MAX_WORKERS,
+            rate: Optional[float] = None,
+            metadata: Optional[Dict] = None,
+            version: str = "v1"
+    ):
+        self.sharing_service = sharing_service
+        self.max_nodes_per_request = max_nodes_per_request
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate)
+        self.metadata = metadata
+        self.version = version
+        self.logger = logging.getLogger(__name__)
+
+    def plan(self, rows: Iterable[Dict]) -> List[Dict]:
+        """Return the share requests that would be sent for rows"""
+        return plan_share_requests(rows, self.max_nodes_per_request)
+
+    def _share(self, request: Dict) -> Dict:
+        return self.sharing_service.share_nodes(
+            nodes=request["nodes"],
+            user_name=request["user_name"],
+            primary=request["primary"],
+            metadata=self.metadata,
+            version=self.version
+        )
+
+    def run(self, rows: Iterable[Dict], on_progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """Send all share requests; on_progress(done, total) is called as each finishes"""
+        requests = self.plan(rows)
+        done = [0]
+
+        def progress(item, result, error):
+            done[0] += 1
+            if on_progress:
+                on_progress(done[0], len(requests))
+
+        batch = run_concurrent(
+            self._share,
+            requests,
+            max_workers=self.max_workers,
+            rate_limiter=self.rate_limiter,
+            key=lambda request: dict(request),
+            on_result=progress
+        )
+        summary = batch.summary()
+        summary["requests"] = summary.pop("total")
+        summary["users"] = len({request["user_name"] for request in requests})
+        summary["node_shares"] = sum(len(request["nodes"]) for request in requests)
+        elapsed = batch.elapsed
+        summary["shares_per_second"] = round(summary["node_shares"] / elapsed, 2) if elapsed > 0 else None
+        return summary
+
+
+def respond_to_pending(
+        sharing_service: NodeSharingService,
+        accept: bool,
+        primary_user_name: Optional[str] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        rate: Optional[float] = None,
+        version: str = "v1"
+) -> Dict:
+    """Accept or decline every pending sharing request, optionally only those from one primary user.
+
+    Requests are streamed page by page from iter_sharing_requests and answered
+    concurrently while later pages are still being fetched.
+    """
+    def pending() -> Iterator[str]:
+        for request in sharing_service.iter_sharing_requests(version=version):
+            if request.get("request_status", "pending") != "pending":
+                continue
+            if primary_user_name and request.get("primary_user_name") != primary_user_name:
+                continue
+            yield request["request_id"]
+
+    batch = run_concurrent(
+        lambda request_id: sharing_service.respond_to_request(request_id, accept, version),
+        pending(),
+        max_workers=max_workers,
+        rate_limiter=RateLimiter(rate)
+    )
+    summary = batch.summary()
+    summary["action"] = "accepted" if accept else "declined"
+    return summary
@@ -0,0 +1,190 @@
+import csv
+import json
+import logging
+from contextlib import nullcontext
+from itertools import chain
+from typing import Dict, Iterable, Iterator, Optional, TextIO
+
+from .node_admin_service import NodeAdminService
+from .node_inventory import NodeInventory
+from .node_service import NodeService
+from ..utils.concurrency import DEFAULT_MAX_WORKERS, RateLimiter, is_failure, run_concurrent
+
+
+def parse_update_rows(stream: TextIO, fmt: Optional[str] = None) -> Iterator[Dict]:
+    """Parse (node_id, tags, metadata) rows from JSON lines or CSV.
+
+    JSON lines look like {"node_id": "...", "tags": [...], "metadata": {...}}.
+    CSV needs a node_id column and optional tags (comma-separated) and
+    metadata (JSON) columns. The format is detected from the first line when
+    fmt is not given.
+    """
+    first = stream.readline()
+    while first and not first.strip():
+        first = stream.readline()
+    if not first:
+        return
+    fmt = fmt or ("jsonl" if first.lstrip().startswith("{") else "csv")
+
+    if fmt == "jsonl":
+        for line_number, line in enumerate(chain([first], stream), start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+            yield _normalize_row(row, line_number)
+        return
+
+    reader = csv.DictReader(chain([first], stream))
+    for line_number, row in enumerate(reader, start=2):
+        tags = row.get("tags")
+        metadata = row.get("metadata")
+        try:
+            metadata = json.loads(metadata) if metadata else None
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid metadata JSON on line {line_number}: {e}")
+        yield _normalize_row({
+            "node_id": row.get("node_id"),
+            "tags": [tag.strip() for tag in tags.split(",") if tag.strip()] if tags else None,
+            "metadata": metadata
+        }, line_number)
+
+
+def _normalize_row(row: Dict, line_number: int) -> Dict:
+    node_id = (row.get("node_id") or "").strip()
+    if not node_id:
+        raise ValueError(f"Missing node_id on line {line_number}")
+    tags = row.get("tags")
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    metadata = row.get("metadata")
+    if metadata is not None and not isinstance(metadata, dict):
+        raise ValueError(f"metadata must be a JSON object on line {line_number}")
+    # An empty tag list is kept: for reconcile it means "no tags"
+    return {"node_id": node_id, "tags": tags, "metadata": metadata or None}
+
+
+def read_admin_node(admin_service: NodeAdminService, node_id: str) -> Dict:
+    """Fetch one admin node listing entry ({} if the node is unknown)"""
+    response = admin_service.get_admin_nodes(node_id=node_id)
+    if isinstance(response, list):
+        if response and is_failure(response[0]):
+            raise RuntimeError(response[0].get("description") or "Failed to read node")
+        nodes = response
+    else:
+        nodes = response.get("nodes") or []
+    return nodes[0] if nodes else {}
+
+
+def plan_update(row: Dict, current: Optional[Dict]) -> Optional[Dict]:
+    """Work out the write needed to apply row on top of the current node state.
+
+    Tags in a row are added (existing ones are kept), so only missing tags are
+    sent. Metadata is sent in full when any of its keys differs. Returns None
+    when the node already matches.
+    """
+    current = current or {}
+    change = {}
+    if row.get("tags"):
+        present = set(current.get("tags") or [])
+        missing = [tag for tag in row["tags"] if tag not in present]
+        if missing:
+            change["tags"] = missing
+    if row.get("metadata"):
+        current_metadata = current.get("metadata")
+        if not isinstance(current_metadata, dict) or any(
+                current_metadata.get(k) != v for k, v in row["metadata"].items()):
+            change["metadata"] = row["metadata"]
+    return change or None
+
+
+class BulkNodeUpdater:
+    """Apply tag/metadata rows to many nodes concurrently, skipping no-op writes.
+
+    Writes go through NodeAdminService.update_admin_node when an admin service
+    is given, otherwise through NodeService.update_node_metadata. Current state
+    comes from the local inventory when one is passed (admin only) and is
+    fetched per node otherwise.
+    """
+
+    def __init__(
+            self,
+            node_service: Optional[NodeService] = None,
+            admin_service: Optional[NodeAdminService] = None,
+            inventory: Optional[NodeInventory] = None,
+            max_workers: int = DEFAULT_MAX_WORKERS,
+            rate: Optional[float] = None,
+            dry_run: bool = False
+    ):
+        if not node_service and not admin_service:
+            raise ValueError("A node service or node admin service is required")
+        self.node_service = node_service
+        self.admin_service = admin_service
+        self.inventory = inventory
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate)
+        self.dry_run = dry_run
+        self.logger = logging.getLogger(__name__)
+
+    def current_state(self, node_id: str, need_metadata: bool = True) -> Dict:
+        """Return the current tags and metadata of a node"""
+        if self.inventory is not None:
+            entry = self.inventory.get(node_id)
+            if entry is not None and ("metadata" in entry or not need_metadata):
+                return entry
+        self.rate_limiter.acquire()
+        if self.admin_service is not None:
+            return read_admin_node(self.admin_service, node_id)
+        response = self.node_service.get_node_details(node_id)
+        if is_failure(response):
+            raise RuntimeError(response.get("description") or "Failed to read node")
+        return response
+
+    def write(self, node_id: str, change: Dict) -> Dict:
+        """Send one update for a node"""
+        self.rate_limiter.acquire()
+        if self.admin_service is not None:
+            return self.admin_service.update_admin_node(
+                node_id=node_id,
+                metadata=change.get("metadata"),
+                tags=change.get("tags")
+            )
+        return self.node_service.update_node_metadata(node_id, change)
+
+    def apply(self, row: Dict) -> Dict:
+        """Compare one row against the node's current state and write if needed"""
+        change = plan_update(row, self.current_state(row["node_id"], need_metadata=bool(row.get("metadata"))))
+        if change is None:
+            return {"action": "skipped"}
+        if self.dry_run:
+            return {"action": "planned", "change": change}
+        response = self.write(row["node_id"], change)
+        if is_failure(response):
+            return response
+        return {"action": "updated", "change": change}
+
+    def run(self, rows: Iterable[Dict]) -> Dict:
+        """Apply all rows and return counts, throughput and per-item failures
+
+        Admin tag writes update the local tag index in memory; the index is
+        saved once after the whole batch.
+        """
+        with self.admin_service.deferred_tag_index_saves() if self.admin_service is not None else nullcontext():
+            batch = run_concurrent(
+                self.apply,
+                rows,
+                max_workers=self.max_workers,
+                key=lambda row: row["node_id"]
+            )
+        summary = batch.summary()
+        actions = [entry["result"]["action"] for entry in batch.results]
+        summary["updated"] = actions.count("updated")
+        summary["skipped"] = actions.count("skipped")
+        if self.dry_run:
+            summary["planned"] = [
+                {"node_id": entry["item"], **entry["result"]["change"]}
+                for entry in batch.results if entry["result"]["action"] == "planned"
+            ]
+        return summary
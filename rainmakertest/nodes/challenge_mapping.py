@@ -0,0 +1,219 @@
+import csv
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, TextIO
+
+from .node_sharing_service import NodeSharingService
+from ..utils.concurrency import DEFAULT_MAX_WORKERS, RateLimiter, is_failure
+
+# A responder turns (node_id, challenge) into the challenge response, or
+# returns None when the response is not available yet
+Responder = Callable[[str, str], Optional[str]]
+
+VERIFIED = "verified"
+FAILED = "failed"
+TIMED_OUT = "timedout"
+
+
+class FileResponder:
+    """Look up challenge responses in a file that is filled in while the pipeline runs.
+
+    The file holds node_id,challenge_response rows as CSV (header optional)
+    or JSON lines with those keys. It is re-read whenever its modification
+    time changes, so responses can be appended as devices answer.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._responses: Dict[str, str] = {}
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _reload(self) -> None:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        with open(self.path, "r") as f:
+            self._responses = parse_responses(f)
+        self._mtime = mtime
+
+    def __call__(self, node_id: str, challenge: str) -> Optional[str]:
+        with self._lock:
+            self._reload()
+            return self._responses.get(node_id)
+
+
+def parse_responses(stream: TextIO) -> Dict[str, str]:
+    """Read node_id -> challenge_response pairs from CSV or JSON lines"""
+    responses = {}
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+            node_id, response = row.get("node_id"), row.get("challenge_response")
+        else:
+            cells = [cell.strip() for cell in next(csv.reader([line]))]
+            if line_number == 1 and cells[0].lower() == "node_id":
+                continue
+            node_id, response = (cells + [None])[:2]
+        if node_id and response:
+            responses[node_id] = response
+    return responses
+
+
+def load_responder(spec: str) -> Responder:
+    """Import a responder given as 'package.module:function'"""
+    module_name, _, attr = spec.partition(":")
+    if not module_name or not attr:
+        raise ValueError(f"Responder must look like 'module:function', got '{spec}'")
+    responder = getattr(importlib.import_module(module_name), attr, None)
+    if not callable(responder):
+        raise ValueError(f"'{spec}' is not callable")
+    return responder
+
+
+class ChallengeMappingPipeline:
+    """Map many nodes through the initiate/verify challenge flow concurrently.
+
+    All challenges are initiated from a worker pool. As each one comes back
+    the responder is asked for the node's answer; nodes whose answer is not
+    ready yet are retried every poll_interval until timeout, and answered
+    nodes are verified straight away with the shared group_id, tags and
+    metadata.
+    """
+
+    def __init__(
+            self,
+            sharing_service: NodeSharingService,
+            responder: Responder,
+            group_id: Optional[str] = None,
+            tags: Optional[List[str]] = None,
+            metadata: Optional[Dict] = None,
+            max_workers: int = DEFAULT_MAX_WORKERS,
+            rate: Optional[float] = None,
+            timeout: float = 300,
+            poll_interval: float = 1,
+            on_challenge: Optional[Callable[[str, Dict], None]] = None,
+            version: str = "v1"
+    ):
+        self.sharing_service = sharing_service
+        self.responder = responder
+        self.group_id = group_id
+        self.tags = tags
+        self.metadata = metadata
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.on_challenge = on_challenge
+        self.version = version
+        self.logger = logging.getLogger(__name__)
+
+    def _initiate(self, node_id: str) -> Dict:
+        self.rate_limiter.acquire()
+        response = self.sharing_service.initiate_mapping(node_id, self.version)
+        if is_failure(response):
+            return response
+        if not response.get("request_id") or "challenge" not in response:
+            return {"status": "failure", "description": f"Unexpected initiate response: {response}"}
+        return response
+
+    def _answer(self, node_id: str, request_id: str, challenge: str) -> Optional[Dict]:
+        """Ask the responder and verify; None means the response is not ready"""
+        challenge_response = self.responder(node_id, challenge)
+        if challenge_response is None:
+            return None
+        self.rate_limiter.acquire()
+        return self.sharing_service.verify_mapping(
+            request_id=request_id,
+            challenge_response=challenge_response,
+            group_id=self.group_id,
+            tags=self.tags,
+            metadata=self.metadata,
+            version=self.version
+        )
+
+    def run(self, node_ids: List[str]) -> Dict:
+        """Initiate, answer and verify every node; returns counts and per-node results"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        results = {node_id: {"node_id": node_id, "request_id": None, "status": "pending", "detail": None}
+                   for node_id in node_ids}
+        waiting: Dict[str, float] = {}
+
+        def fail(node_id: str, detail: str) -> None:
+            results[node_id]["status"] = FAILED
+            results[node_id]["detail"] = detail
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = {executor.submit(self._initiate, node_id): ("initiate", node_id) for node_id in results}
+            while in_flight or waiting:
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                for node_id, due in [*waiting.items()]:
+                    if due <= now:
+                        del waiting[node_id]
+                        result = results[node_id]
+                        future = executor.submit(self._answer, node_id, result["request_id"], result["challenge"])
+                        in_flight[future] = ("answer", node_id)
+                if not in_flight:
+                    time.sleep(max(0.0, min(min(waiting.values()), deadline) - time.monotonic()))
+                    continue
+
+                # Wake up for the next due re-poll too, not only when a request finishes
+                next_wake = min(min(waiting.values(), default=deadline), deadline)
+                done, _ = wait([*in_flight], timeout=max(0.0, next_wake - time.monotonic()),
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, node_id = in_flight.pop(future)
+                    try:
+                        response = future.result()
+                    except Exception as e:
+                        fail(node_id, str(e))
+                        continue
+                    if is_failure(response):
+                        fail(node_id, response.get("description") or "Request failed")
+                    elif stage == "initiate":
+                        results[node_id]["request_id"] = response["request_id"]
+                        results[node_id]["challenge"] = response["challenge"]
+                        if self.on_challenge:
+                            self.on_challenge(node_id, response)
+                        waiting[node_id] = time.monotonic()
+                    elif response is None:
+                        waiting[node_id] = time.monotonic() + self.poll_interval
+                    else:
+                        results[node_id]["status"] = VERIFIED
+                        results[node_id]["detail"] = response.get("description")
+            for future in in_flight:
+                future.cancel()
+
+        for result in results.values():
+            result.pop("challenge", None)
+            if result["status"] == "pending":
+                result["status"] = TIMED_OUT
+                result["detail"] = "No challenge response before timeout"
+        elapsed = time.monotonic() - started
+        rows = [results[node_id] for node_id in results]
+        return {
+            "total": len(rows),
+            "verified": sum(1 for r in rows if r["status"] == VERIFIED),
+            "timed_out": sum(1 for r in rows if r["status"] == TIMED_OUT),
+            "failed": sum(1 for r in rows if r["status"] == FAILED),
+            "elapsed_seconds": round(elapsed, 3),
+            "nodes_per_second": round(len(rows) / elapsed, 2) if elapsed > 0 else None,
+            "results": rows
+        }
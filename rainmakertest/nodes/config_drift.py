@@ -0,0 +1,166 @@
+import hashlib
+import json
+import logging
+import os
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .node_service import NodeService
+from ..utils.concurrency import DEFAULT_MAX_WORKERS, RateLimiter, is_failure, run_concurrent
+from ..utils.paths import get_inventory_dir
+
+# Paths reported per changed node before the diff is truncated
+DEFAULT_MAX_DIFF_PATHS = 50
+
+
+def structural_hash(document: Any) -> str:
+    """Hash a JSON document independently of key order and whitespace"""
+    canonical = json.dumps(document, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def json_path_diff(old: Any, new: Any, path: str = "$") -> List[Dict]:
+    """List added/removed/changed leaves between two JSON documents as JSON paths"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in old.keys() | new.keys():
+            child = f"{path}.{key}"
+            if key not in new:
+                changes.append({"path": child, "op": "removed", "old": old[key]})
+            elif key not in old:
+                changes.append({"path": child, "op": "added", "new": new[key]})
+            else:
+                changes.extend(json_path_diff(old[key], new[key], child))
+        return sorted(changes, key=lambda change: change["path"])
+    if isinstance(old, list) and isinstance(new, list):
+        changes = []
+        for i in range(max(len(old), len(new))):
+            child = f"{path}[{i}]"
+            if i >= len(new):
+                changes.append({"path": child, "op": "removed", "old": old[i]})
+            elif i >= len(old):
+                changes.append({"path": child, "op": "added", "new": new[i]})
+            else:
+                changes.extend(json_path_diff(old[i], new[i], child))
+        return changes
+    if old != new:
+        return [{"path": path, "op": "changed", "old": old, "new": new}]
+    return []
+
+
+class ConfigDriftTracker:
+    """Detect node config changes against the last-seen configs stored locally.
+
+    Per node, a structural hash is kept in <config>.confighash.json and the
+    last-seen config is stored zlib-compressed under <config>.configs/ next to
+    the node inventory. Configs are fetched and compared inside the worker
+    threads, so only hashes and diffs are held in memory.
+    """
+
+    def __init__(
+            self,
+            node_service: NodeService,
+            config_id: Optional[str] = None,
+            inventory_dir: Optional[Path] = None,
+            max_workers: int = DEFAULT_MAX_WORKERS,
+            rate: Optional[float] = None,
+            max_diff_paths: int = DEFAULT_MAX_DIFF_PATHS
+    ):
+        self.node_service = node_service
+        directory = Path(inventory_dir) if inventory_dir else get_inventory_dir()
+        name = config_id or "default"
+        self.hashes_path = directory / f"{name}.confighash.json"
+        self.configs_dir = directory / f"{name}.configs"
+        self.configs_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate)
+        self.max_diff_paths = max_diff_paths
+        self.logger = logging.getLogger(__name__)
+        self.hashes: Dict[str, str] = {}
+        if self.hashes_path.exists():
+            with open(self.hashes_path, 'r') as f:
+                self.hashes = json.load(f)
+
+    def _config_path(self, node_id: str) -> Path:
+        return self.configs_dir / f"{node_id}.json.z"
+
+    def last_seen(self, node_id: str) -> Optional[Dict]:
+        """Return the stored config of a node, if any"""
+        path = self._config_path(node_id)
+        if not path.exists():
+            return None
+        with open(path, 'rb') as f:
+            return json.loads(zlib.decompress(f.read()))
+
+    def _store(self, node_id: str, config: Dict) -> None:
+        path = self._config_path(node_id)
+        tmp_path = path.with_suffix(".z.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(zlib.compress(json.dumps(config, separators=(',', ':')).encode('utf-8')))
+        os.replace(tmp_path, path)
+
+    def _save_hashes(self) -> None:
+        tmp_path = self.hashes_path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.hashes, f, separators=(',', ':'))
+        os.replace(tmp_path, self.hashes_path)
+
+    def _check(self, node_id: str, previous_hash: Optional[str], update: bool) -> Dict:
+        self.rate_limiter.acquire()
+        config = self.node_service.get_node_config(node_id)
+        if is_failure(config):
+            return config
+        current_hash = structural_hash(config)
+        result = {"hash": current_hash}
+        if previous_hash is None:
+            result["state"] = "new"
+        elif previous_hash == current_hash:
+            result["state"] = "unchanged"
+            return result
+        else:
+            result["state"] = "changed"
+            old = self.last_seen(node_id)
+            diff = json_path_diff(old, config) if old is not None else []
+            result["diff"] = diff[:self.max_diff_paths]
+            result["diff_truncated"] = len(diff) > self.max_diff_paths
+        if update:
+            self._store(node_id, config)
+        return result
+
+    def check(self, node_ids: Iterable[str], update: bool = True) -> Dict:
+        """Fetch current configs and report nodes whose structural hash changed"""
+        changed, new = [], []
+
+        def collect(node_id, result, error):
+            if error:
+                return
+            if result["state"] == "changed":
+                changed.append({"node_id": node_id, "old_hash": self.hashes.get(node_id),
+                                "new_hash": result["hash"], "diff": result["diff"],
+                                "diff_truncated": result["diff_truncated"]})
+            elif result["state"] == "new":
+                new.append(node_id)
+            if update:
+                self.hashes[node_id] = result["hash"]
+
+        hashes = dict(self.hashes)
+        batch = run_concurrent(
+            lambda node_id: self._check(node_id, hashes.get(node_id), update),
+            node_ids,
+            max_workers=self.max_workers,
+            on_result=collect
+        )
+        if update:
+            self._save_hashes()
+        summary = batch.summary()
+        return {
+            "checked": summary["total"],
+            "unchanged": summary["succeeded"] - len(changed) - len(new),
+            "changed_count": len(changed),
+            "new": sorted(new),
+            "elapsed_seconds": summary["elapsed_seconds"],
+            "nodes_per_second": summary["items_per_second"],
+            "failures": summary["failures"],
+            "changed": sorted(changed, key=lambda entry: entry["node_id"])
+        }
@@ -0,0 +1,147 @@
+import csv
+import heapq
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, TextIO
+
+from .node_service import NodeService
+from ..utils.concurrency import DEFAULT_MAX_WORKERS, RateLimiter, is_failure, run_concurrent
+
+CONFIRMED = "confirmed"
+TIMED_OUT = "timedout"
+FAILED = "failed"
+
+# request_status values reported by GET /v1/user/nodes/mapping that end a request
+TERMINAL_STATUSES = {"confirmed": CONFIRMED, "timedout": TIMED_OUT, "discarded": FAILED, "declined": FAILED}
+
+
+def parse_mapping_csv(stream: TextIO) -> Iterator[Dict]:
+    """Read (node_id, secret_key) rows; a header row is optional and node IDs must be unique"""
+    reader = csv.reader(stream)
+    seen = set()
+    for line_number, row in enumerate(reader, start=1):
+        cells = [cell.strip() for cell in row]
+        if not any(cells):
+            continue
+        if line_number == 1 and cells[0].lower() == "node_id":
+            continue
+        if len(cells) < 2 or not cells[0] or not cells[1]:
+            raise ValueError(f"Expected node_id,secret_key on line {line_number}")
+        if cells[0] in seen:
+            raise ValueError(f"Duplicate node_id {cells[0]} on line {line_number}")
+        seen.add(cells[0])
+        yield {"node_id": cells[0], "secret_key": cells[1]}
+
+
+class MappingPipeline:
+    """Submit many node mappings concurrently and poll them from one scheduler loop.
+
+    Every pending request ID is checked on its own schedule, starting at
+    poll_interval and backing off by backoff up to max_interval, until the
+    mapping is confirmed, reported as timed out/discarded, or the local
+    timeout expires.
+    """
+
+    def __init__(
+            self,
+            node_service: NodeService,
+            max_workers: int = DEFAULT_MAX_WORKERS,
+            rate: Optional[float] = None,
+            timeout: float = 300,
+            poll_interval: float = 2,
+            max_interval: float = 30,
+            backoff: float = 1.5,
+            operation: str = "map"
+    ):
+        self.node_service = node_service
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.operation = operation
+        self.logger = logging.getLogger(__name__)
+
+    def _submit(self, row: Dict) -> Dict:
+        self.rate_limiter.acquire()
+        response = self.node_service.map_user_node(row["node_id"], row["secret_key"], self.operation)
+        if is_failure(response):
+            return response
+        if not response.get("request_id"):
+            return {"status": "failure", "description": f"No request_id in response: {response}"}
+        return response
+
+    def _check(self, request_id: str) -> Dict:
+        self.rate_limiter.acquire()
+        try:
+            return self.node_service.get_mapping_status(request_id)
+        except Exception as e:
+            return {"status": "failure", "description": str(e)}
+
+    def run(self, rows: List[Dict]) -> Dict:
+        """Submit all mappings, poll until each finishes and return the outcome"""
+        node_ids = [row["node_id"] for row in rows]
+        if len(set(node_ids)) != len(node_ids):
+            raise ValueError("Each node may only be mapped once per run")
+        started = time.monotonic()
+        submitted = run_concurrent(self._submit, rows, max_workers=self.max_workers,
+                                   key=lambda row: row["node_id"])
+        results = {
+            entry["item"]: {"node_id": entry["item"], "request_id": None, "status": FAILED, "detail": entry["error"]}
+            for entry in submitted.failures
+        }
+
+        # Heap of (next check time, sequence, node_id); sequence keeps ordering stable
+        schedule = []
+        intervals = {}
+        for seq, entry in enumerate(submitted.results):
+            node_id = entry["item"]
+            results[node_id] = {"node_id": node_id, "request_id": entry["result"]["request_id"],
+                                "status": "requested", "detail": None}
+            intervals[node_id] = self.poll_interval
+            heapq.heappush(schedule, (started + self.poll_interval, seq, node_id))
+        deadline = started + self.timeout
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while schedule:
+                now = time.monotonic()
+                if now >= deadline:
+                    for _, _, node_id in schedule:
+                        results[node_id]["status"] = TIMED_OUT
+                        results[node_id]["detail"] = "Local timeout waiting for confirmation"
+                    break
+                if schedule[0][0] > now:
+                    time.sleep(min(schedule[0][0], deadline) - now)
+                    continue
+
+                due = []
+                while schedule and schedule[0][0] <= now:
+                    due.append(heapq.heappop(schedule))
+                statuses = executor.map(lambda item: self._check(results[item[2]]["request_id"]), due)
+                for (_, seq, node_id), response in zip(due, statuses):
+                    result = results[node_id]
+                    request_status = None if is_failure(response) else response.get("request_status")
+                    if request_status in TERMINAL_STATUSES:
+                        result["status"] = TERMINAL_STATUSES[request_status]
+                        result["detail"] = request_status
+                        result["elapsed_seconds"] = round(time.monotonic() - started, 2)
+                        continue
+                    if is_failure(response):
+                        result["detail"] = response.get("description")
+                    intervals[node_id] = min(intervals[node_id] * self.backoff, self.max_interval)
+                    heapq.heappush(schedule, (time.monotonic() + intervals[node_id], seq, node_id))
+
+        elapsed = time.monotonic() - started
+        rows_out = [results[row["node_id"]] for row in rows if row["node_id"] in results]
+        counts = {status: sum(1 for r in rows_out if r["status"] == status) for status in (CONFIRMED, TIMED_OUT, FAILED)}
+        return {
+            "total": len(rows_out),
+            "confirmed": counts[CONFIRMED],
+            "timed_out": counts[TIMED_OUT],
+            "failed": counts[FAILED],
+            "elapsed_seconds": round(elapsed, 3),
+            "mappings_per_second": round(len(rows_out) / elapsed, 2) if elapsed > 0 else None,
+            "results": rows_out
+        }
@@ -1,10 +1,17 @@
-from typing import Dict, List, Optional
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Union
 from ..utils.api_client import ApiClient
+from .node_record import NodeRecord, to_records
+from .tag_index import TagIndex
 
 
 class NodeAdminService:
-    def __init__(self, api_client: ApiClient):
+    def __init__(self, api_client: ApiClient, tag_index: Optional[TagIndex] = None):
         self.api_client = api_client
+        # Local tag index kept in step with tag changes made through this service
+        self.tag_index = tag_index
+        self.logger = logging.getLogger(__name__)
 
     def get_admin_nodes(
             self,
@@ -16,10 +23,16 @@ class NodeAdminService:
             project_name: Optional[str] = None,
             status: Optional[str] = None,
             num_records: Optional[int] = None,
-            start_id: Optional[str] = None
-    ) -> List[Dict]:
-        """Get nodes claimed by admin with filtering options"""
-        endpoint = "/v1/admin/nodes"
+            start_id: Optional[str] = None,
+            version: str = "v1",
+            as_records: bool = False
+    ) -> Union[List[Dict], List[NodeRecord], Dict]:
+        """Get nodes claimed by admin with filtering options
+
+        With as_records=True the nodes of the page are returned as compact
+        NodeRecords instead of the raw response.
+        """
+        endpoint = f"/{version}/admin/nodes"
         params = {}
         if node_id:
             params["node_id"] = node_id
@@ -47,4 +60,80 @@ class NodeAdminService:
             # If the API client returns an error dict, convert it to a list containing the error
             # Or you might want to raise a custom exception here, depending on how you want to handle it in cli.py
             return [response] # Return the error as a single-item list for consistency with List[Dict] type hint
-        return response
\ No newline at end of file
+        if as_records:
+            nodes = response.get("nodes", []) if isinstance(response, dict) else response
+            return to_records(nodes)
+        return response
+
+    def update_admin_node(
+            self,
+            node_id: str,
+            metadata: Optional[Dict] = None,
+            tags: Optional[List[str]] = None,
+            version: str = "v1"
+    ) -> Dict:
+        """Add tags to or update the metadata of an admin claimed node"""
+        endpoint = f"/{version}/admin/nodes"
+        params = {"node_id": node_id}
+        payload = {}
+        if metadata:
+            payload["metadata"] = metadata
+        if tags:
+            payload["tags"] = tags
+        response = self.api_client.put(endpoint, json=payload, params=params)
+        if tags and self.tag_index is not None and response.get("status") != "failure":
+            self._update_tag_index(self.tag_index.add_tags, node_id, tags)
+        return response
+
+    def remove_admin_node_tags(self, node_id: str, tags: List[str], version: str = "v1") -> Dict:
+        """Remove tags from an admin claimed node"""
+        endpoint = f"/{version}/admin/nodes"
+        params = {"node_id": node_id}
+        response = self.api_client.delete(endpoint, json={"tags": tags}, params=params)
+        if self.tag_index is not None and response.get("status") != "failure":
+            self._update_tag_index(self.tag_index.remove_tags, node_id, tags)
+        return response
+
+    @contextmanager
+    def deferred_tag_index_saves(self) -> Iterator[None]:
+        """Keep tag index changes in memory inside the block and save the index once at the end.
+
+        Used around concurrent bulk writes, where saving after every node
+        would rewrite the whole index once per request.
+        """
+        if self.tag_index is None:
+            yield
+            return
+        try:
+            with self.tag_index.batch(flush=False):
+                yield
+        finally:
+            self._flush_tag_index()
+
+    def _update_tag_index(self, update, node_id: str, tags: List[str]) -> None:
+        # The API already accepted the change; a local index problem must not turn it into a failure
+        try:
+            update(node_id, tags)
+        except Exception as e:
+            self.logger.warning(f"Failed to update local tag index for {node_id}: {e}")
+            return
+        self._flush_tag_index()
+
+    def _flush_tag_index(self) -> None:
+        try:
+            self.tag_index.flush()
+        except OSError as e:
+            self.logger.warning(f"Failed to save local tag index: {e}")
+
+    def get_admin_node_tags(self, version: str = "v1") -> Dict:
+        """Get all tag names used in the admin's claimed nodes"""
+        endpoint = f"/{version}/admin/nodes/tags"
+        return self.api_client.get(endpoint)
+
+    def get_admin_user_nodes(self, user_name: Optional[str] = None, version: str = "v1") -> Dict:
+        """Get the nodes associated with users (admin view)"""
+        endpoint = f"/{version}/admin/user/nodes"
+        params = {}
+        if user_name:
+            params["user_name"] = user_name
+        return self.api_client.get(endpoint, params=params)
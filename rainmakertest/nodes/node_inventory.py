@@ -0,0 +1,254 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from .node_admin_service import NodeAdminService
+from .node_record import NodeRecord, node_online
+from ..utils.paths import get_inventory_dir
+
+# Filters accepted by NodeAdminService.get_admin_nodes that define an inventory slice
+SLICE_FILTERS = ("node_type", "model", "fw_version", "subtype", "project_name", "status")
+
+# Node fields tracked in the local inventory
+NODE_FIELDS = ("type", "model", "fw_version", "subtype", "project_name")
+
+EVENT_ADDED = "added"
+EVENT_REMOVED = "removed"
+EVENT_FW_CHANGED = "fw_changed"
+EVENT_TAGS_CHANGED = "tags_changed"
+
+
+def slice_key(filters: Optional[Dict[str, str]] = None) -> str:
+    """Build a stable key for a set of admin node filters ("*" for the whole fleet)"""
+    active = {k: v for k, v in (filters or {}).items() if v}
+    if not active:
+        return "*"
+    return "&".join(f"{k}={active[k]}" for k in sorted(active))
+
+
+def summarize_node(node: Dict) -> Dict:
+    """Reduce an admin node listing entry to the fields tracked by the inventory"""
+    summary = {field: node.get(field) for field in NODE_FIELDS}
+    summary["online"] = node_online(node)
+    summary["tags"] = sorted(node.get("tags") or [])
+    if "metadata" in node:
+        summary["metadata"] = node["metadata"]
+    return summary
+
+
+class NodeInventory:
+    """Local copy of the admin node listing with incremental refresh.
+
+    The inventory is stored per config under ~/.rainmaker/inventory. Each set of
+    filters passed to sync() is tracked as a slice with its own start_id cursor,
+    so an interrupted sync resumes where it stopped and a filtered slice (for
+    example status=online) can be refreshed without rescanning the whole fleet.
+    Every change detected while syncing is appended to a changelog that
+    downstream consumers read with changes_since().
+    """
+
+    def __init__(self, admin_service: NodeAdminService, config_id: Optional[str] = None,
+                 inventory_dir: Optional[Path] = None):
+        self.admin_service = admin_service
+        self.name = config_id or "default"
+        self.inventory_dir = Path(inventory_dir) if inventory_dir else get_inventory_dir()
+        self.state_path = self.inventory_dir / f"{self.name}.json"
+        self.changelog_path = self.inventory_dir / f"{self.name}.changelog.ndjson"
+        self.logger = logging.getLogger(__name__)
+        self._state = self._load_state()
+        self._pending_events: List[Dict] = []
+
+    def _load_state(self) -> Dict:
+        """Load the inventory state from disk"""
+        if not self.state_path.exists():
+            return {"last_seq": 0, "nodes": {}, "slices": {}}
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid inventory file {self.state_path}: {e}")
+
+    def _save_state(self) -> None:
+        """Flush pending changelog events and atomically write the inventory state"""
+        if self._pending_events:
+            with open(self.changelog_path, 'a') as f:
+                for event in self._pending_events:
+                    f.write(json.dumps(event, separators=(',', ':')) + "\n")
+            self._pending_events = []
+        self._state["updated_at"] = time.time()
+        tmp_path = self.state_path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self._state, f, separators=(',', ':'))
+        os.replace(tmp_path, self.state_path)
+
+    def _record(self, event: str, node_id: str, **details) -> None:
+        """Queue a change event; it is persisted together with the next checkpoint"""
+        self._state["last_seq"] += 1
+        entry = {"seq": self._state["last_seq"], "ts": time.time(), "event": event, "node_id": node_id}
+        entry.update(details)
+        self._pending_events.append(entry)
+
+    def _upsert(self, node: Dict) -> Optional[str]:
+        """Store a node listing entry and record what changed; returns the node ID"""
+        node_id = node.get("node_id")
+        if not node_id:
+            return None
+        nodes = self._state["nodes"]
+        new = summarize_node(node)
+        old = nodes.get(node_id)
+        if old is None:
+            self._record(EVENT_ADDED, node_id, fw_version=new["fw_version"], tags=new["tags"])
+        else:
+            if old.get("fw_version") != new["fw_version"]:
+                self._record(EVENT_FW_CHANGED, node_id, old=old.get("fw_version"), new=new["fw_version"])
+            if old.get("tags") != new["tags"]:
+                self._record(EVENT_TAGS_CHANGED, node_id, old=old.get("tags"), new=new["tags"])
+        nodes[node_id] = new
+        return node_id
+
+    def _fetch_page(self, filters: Dict[str, str], start_id: Optional[str], page_size: int) -> Dict:
+        """Fetch one page of admin nodes, normalizing list and dict responses"""
+        response = self.admin_service.get_admin_nodes(start_id=start_id, num_records=page_size, **filters)
+        if isinstance(response, list):
+            if response and isinstance(response[0], dict) and response[0].get("status") == "failure":
+                raise RuntimeError(response[0].get("description") or response[0].get("message")
+                                   or "Failed to list admin nodes")
+            return {"nodes": response}
+        if isinstance(response, dict) and response.get("status") == "failure":
+            raise RuntimeError(response.get("description") or "Failed to list admin nodes")
+        return response or {}
+
+    def sync(
+            self,
+            filters: Optional[Dict[str, str]] = None,
+            page_size: int = 500,
+            max_pages: Optional[int] = None,
+            restart: bool = False,
+            checkpoint_every: int = 10
+    ) -> Dict:
+        """Refresh one slice of the inventory.
+
+        Resumes from the slice's saved start_id cursor unless the previous pass
+        completed or restart is set. Nodes that disappear from the unfiltered
+        slice are recorded as removed; filtered slices only update membership.
+        """
+        filters = {k: v for k, v in (filters or {}).items() if v}
+        unknown = set(filters) - set(SLICE_FILTERS)
+        if unknown:
+            raise ValueError(f"Unsupported inventory filters: {', '.join(sorted(unknown))}")
+
+        key = slice_key(filters)
+        slices = self._state["slices"]
+        current = slices.get(key) or {"filters": filters, "members": [], "complete": False}
+        resuming = bool(current.get("cursor")) and not current.get("complete") and not restart
+        if not resuming:
+            current["cursor"] = None
+            current["seen"] = []
+        current["complete"] = False
+        slices[key] = current
+
+        seq_before = self._state["last_seq"]
+        seen = set(current.get("seen") or [])
+        pages = 0
+        started = time.monotonic()
+        try:
+            while True:
+                page = self._fetch_page(filters, current["cursor"], page_size)
+                for node in page.get("nodes") or []:
+                    node_id = self._upsert(node)
+                    if node_id:
+                        seen.add(node_id)
+                pages += 1
+                current["cursor"] = page.get("next_id")
+                if not current["cursor"]:
+                    break
+                if max_pages and pages >= max_pages:
+                    break
+                if pages % checkpoint_every == 0:
+                    current["seen"] = sorted(seen)
+                    self._save_state()
+        except Exception:
+            current["seen"] = sorted(seen)
+            self._save_state()
+            raise
+
+        removed = 0
+        if not current["cursor"]:
+            departed = set(current.get("members") or []) - seen
+            if key == "*":
+                for node_id in sorted(departed):
+                    old = self._state["nodes"].pop(node_id, None)
+                    if old is not None:
+                        self._record(EVENT_REMOVED, node_id, fw_version=old.get("fw_version"))
+                        removed += 1
+            current["members"] = sorted(seen)
+            current["seen"] = []
+            current["complete"] = True
+            current["synced_at"] = time.time()
+        else:
+            current["seen"] = sorted(seen)
+        self._save_state()
+
+        return {
+            "slice": key,
+            "resumed": resuming,
+            "complete": current["complete"],
+            "cursor": current["cursor"],
+            "pages": pages,
+            "nodes_seen": len(seen),
+            "removed": removed,
+            "events": self._state["last_seq"] - seq_before,
+            "last_seq": self._state["last_seq"],
+            "elapsed_seconds": round(time.monotonic() - started, 3)
+        }
+
+    def changes_since(self, seq: int = 0, events: Optional[List[str]] = None) -> Iterator[Dict]:
+        """Yield changelog entries with a sequence number greater than seq"""
+        if not self.changelog_path.exists():
+            return
+        with open(self.changelog_path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry["seq"] <= seq:
+                    continue
+                if events and entry["event"] not in events:
+                    continue
+                yield entry
+
+    def nodes(self) -> Dict[str, Dict]:
+        """Return the inventory nodes keyed by node ID"""
+        return self._state["nodes"]
+
+    def records(self) -> Iterator[NodeRecord]:
+        """Yield the inventory nodes as compact NodeRecords"""
+        for node_id, entry in self._state["nodes"].items():
+            yield NodeRecord(node_id=node_id, online=entry.get("online"), tags=entry.get("tags"),
+                             **{field: entry.get(field) for field in NODE_FIELDS})
+
+    def get(self, node_id: str) -> Optional[Dict]:
+        """Return the inventory entry for a node, if known"""
+        return self._state["nodes"].get(node_id)
+
+    def slices(self) -> Dict[str, Dict]:
+        """Return slice bookkeeping without the member lists"""
+        return {
+            key: {k: v for k, v in data.items() if k not in ("members", "seen")}
+            for key, data in self._state["slices"].items()
+        }
+
+    def members(self, filters: Optional[Dict[str, str]] = None) -> List[str]:
+        """Return the node IDs of a slice as of its last complete sync"""
+        entry = self._state["slices"].get(slice_key(filters)) or {}
+        return [*(entry.get("members") or [])]
+
+    @property
+    def last_seq(self) -> int:
+        return self._state["last_seq"]
+
+    def __len__(self) -> int:
+        return len(self._state["nodes"])
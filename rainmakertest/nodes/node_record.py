@@ -0,0 +1,120 @@
+import json
+import sys
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def _intern(value) -> Optional[str]:
+    """Intern repeated strings (model, fw_version, type, tags) so records share them"""
+    if value is None:
+        return None
+    return sys.intern(str(value))
+
+
+def node_online(node: Dict) -> Optional[bool]:
+    """Extract the online flag from the different status shapes the API returns"""
+    status = node.get("status")
+    if isinstance(status, dict):
+        connected = status.get("connectivity", status).get("connected")
+        return bool(connected) if connected is not None else None
+    if isinstance(status, bool):
+        return status
+    if isinstance(status, str):
+        return status.lower() == "online"
+    return None
+
+
+class NodeRecord:
+    """Compact, read-only view of a node for large in-memory fleets.
+
+    Uses __slots__ instead of a per-instance dict, interns the low-cardinality
+    strings and keeps the original JSON only as a zlib-compressed blob that is
+    decoded when .raw is accessed.
+    """
+
+    __slots__ = ("node_id", "type", "model", "fw_version", "subtype", "project_name", "online", "tags", "_raw")
+
+    def __init__(
+            self,
+            node_id: str,
+            type: Optional[str] = None,
+            model: Optional[str] = None,
+            fw_version: Optional[str] = None,
+            subtype: Optional[str] = None,
+            project_name: Optional[str] = None,
+            online: Optional[bool] = None,
+            tags: Iterable[str] = (),
+            raw: Optional[bytes] = None
+    ):
+        self.node_id = node_id
+        self.type = _intern(type)
+        self.model = _intern(model)
+        self.fw_version = _intern(fw_version)
+        self.subtype = _intern(subtype)
+        self.project_name = _intern(project_name)
+        self.online = online
+        self.tags: Tuple[str, ...] = tuple(sorted(sys.intern(tag) for tag in tags or ()))
+        self._raw = raw
+
+    @staticmethod
+    def _pack(node: Dict) -> bytes:
+        return zlib.compress(json.dumps(node, separators=(',', ':')).encode('utf-8'))
+
+    @classmethod
+    def from_dict(cls, node: Dict, keep_raw: bool = True) -> "NodeRecord":
+        """Build a record from an admin node listing entry or an inventory entry"""
+        online = node["online"] if "online" in node else node_online(node)
+        return cls(
+            node_id=node.get("node_id") or node.get("id"),
+            type=node.get("type"),
+            model=node.get("model"),
+            fw_version=node.get("fw_version"),
+            subtype=node.get("subtype"),
+            project_name=node.get("project_name"),
+            online=online,
+            tags=node.get("tags") or (),
+            raw=cls._pack(node) if keep_raw else None
+        )
+
+    @classmethod
+    def from_node_details(cls, details: Dict, keep_raw: bool = True) -> "NodeRecord":
+        """Build a record from a /v1/user/nodes?node_details=true entry"""
+        info = (details.get("config") or {}).get("info") or {}
+        return cls(
+            node_id=details.get("id") or details.get("node_id"),
+            type=info.get("type"),
+            model=info.get("model") or info.get("name"),
+            fw_version=info.get("fw_version"),
+            subtype=info.get("subtype"),
+            project_name=info.get("project_name"),
+            online=node_online(details),
+            tags=details.get("tags") or (),
+            raw=cls._pack(details) if keep_raw else None
+        )
+
+    @property
+    def raw(self) -> Optional[Dict]:
+        """Decode the original JSON document, if it was kept"""
+        if self._raw is None:
+            return None
+        return json.loads(zlib.decompress(self._raw))
+
+    def to_dict(self) -> Dict:
+        return {
+            "node_id": self.node_id,
+            "type": self.type,
+            "model": self.model,
+            "fw_version": self.fw_version,
+            "subtype": self.subtype,
+            "project_name": self.project_name,
+            "online": self.online,
+            "tags": list(self.tags)
+        }
+
+    def __repr__(self) -> str:
+        return f"NodeRecord(node_id={self.node_id!r}, model={self.model!r}, fw_version={self.fw_version!r})"
+
+
+def to_records(nodes: Iterable[Dict], keep_raw: bool = True) -> List[NodeRecord]:
+    """Convert admin node listing entries to NodeRecords"""
+    return [NodeRecord.from_dict(node, keep_raw=keep_raw) for node in nodes]
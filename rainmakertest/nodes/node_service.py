@@ -1,18 +1,75 @@
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from ..utils.api_client import ApiClient
+from ..utils.concurrency import DEFAULT_MAX_WORKERS, run_concurrent
+from .node_record import NodeRecord
 import json
 import logging
 
+# Nodes sent per multi-node params request
+PARAMS_BATCH_SIZE = 25
+
 
 class NodeService:
     def __init__(self, api_client: ApiClient):
         self.api_client = api_client
         self.logger = logging.getLogger(__name__)
 
-    def get_user_nodes(self, raw: bool = False) -> Union[List[Dict], Dict]:
-        """Get all nodes associated with the user"""
+    def get_user_nodes(self, raw: bool = False, as_records: bool = False,
+                       keep_raw: bool = True) -> Union[List[Dict], List[NodeRecord], Dict]:
+        """Get all nodes associated with the user
+
+        With as_records=True the node details of every page (following
+        next_id) are fetched and returned as compact NodeRecords; keep_raw
+        controls whether the original JSON is kept (compressed) on each record.
+        """
+        endpoint = "/v1/user/nodes"
+        if not as_records:
+            return self.api_client.get(endpoint)
+        records = []
+        start_id = None
+        while True:
+            params = {"node_details": "true"}
+            if start_id:
+                params["start_id"] = start_id
+            response = self.api_client.get(endpoint, params=params)
+            if response.get("status") == "failure":
+                return response
+            records.extend(NodeRecord.from_node_details(details, keep_raw=keep_raw)
+                           for details in response.get("node_details", []))
+            next_id = response.get("next_id")
+            if not next_id or next_id == start_id:
+                return records
+            start_id = next_id
+
+    def iter_user_node_ids(self, num_records: Optional[int] = None) -> Iterator[str]:
+        """Yield the IDs of all nodes of the user, following next_id across pages"""
+        endpoint = "/v1/user/nodes"
+        start_id = None
+        while True:
+            params = {}
+            if num_records:
+                params["num_records"] = num_records
+            if start_id:
+                params["start_id"] = start_id
+            response = self.api_client.get(endpoint, params=params)
+            if response.get("status") == "failure":
+                raise RuntimeError(response.get("description") or response.get("message")
+                                   or "Failed to list user nodes")
+            yield from response.get("nodes") or []
+            next_id = response.get("next_id")
+            if not next_id or next_id == start_id:
+                return
+            start_id = next_id
+
+    def get_node_details(self, node_id: str) -> Dict:
+        """Get the details (config, status, tags, metadata) of a single node"""
         endpoint = "/v1/user/nodes"
-        return self.api_client.get(endpoint)
+        params = {"node_id": node_id, "node_details": "true"}
+        response = self.api_client.get(endpoint, params=params)
+        if response.get("status") == "failure":
+            return response
+        details = response.get("node_details") or [{}]
+        return details[0]
 
     def get_node_config(self, node_id: str) -> Dict:
         """Get node configuration"""
@@ -59,4 +116,92 @@ class NodeService:
         """Check the status of a node mapping request"""
         endpoint = "/v1/user/nodes/mapping"
         params = {"request_id": request_id}
-        return self.api_client.get(endpoint, params=params)
\ No newline at end of file
+        return self.api_client.get(endpoint, params=params)
+
+    def get_node_params(self, node_id: str) -> Dict:
+        """Get the current param values of a node"""
+        endpoint = "/v1/user/nodes/params"
+        params = {"node_id": node_id}
+        return self.api_client.get(endpoint, params=params)
+
+    def set_node_params(self, node_id: str, payload: Dict) -> Dict:
+        """Set params of a node, e.g. {"Light": {"Power": true}}"""
+        endpoint = "/v1/user/nodes/params"
+        params = {"node_id": node_id}
+        return self.api_client.put(endpoint, json=payload, params=params)
+
+    def set_multi_node_params(self, updates: List[Dict], batch_size: int = PARAMS_BATCH_SIZE,
+                              max_workers: int = DEFAULT_MAX_WORKERS) -> Dict:
+        """Set params on many nodes with the list form of the params endpoint
+
+        updates is a list of {"node_id": ..., "payload": {...}}. It is split into
+        requests of batch_size nodes that are sent concurrently; the result
+        holds one status entry per node.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        endpoint = "/v1/user/nodes/params"
+        batches = [updates[i:i + batch_size] for i in range(0, len(updates), batch_size)]
+        batch = run_concurrent(
+            lambda chunk: self.api_client.put(endpoint, json=chunk),
+            batches,
+            max_workers=max_workers,
+            key=lambda chunk: [update["node_id"] for update in chunk]
+        )
+
+        results = []
+        for entry in batch.results:
+            response = entry["result"]
+            if isinstance(response, list):
+                results.extend(response)
+            else:
+                results.extend({"node_id": node_id, **response} for node_id in entry["item"])
+        for failure in batch.failures:
+            results.extend({"node_id": node_id, "status": "failure", "description": failure["error"]}
+                           for node_id in failure["item"])
+        summary = batch.summary()
+        return {
+            "nodes": len(updates),
+            "requests": len(batches),
+            "failed_nodes": sum(1 for r in results if r.get("status") == "failure"),
+            "elapsed_seconds": summary["elapsed_seconds"],
+            "results": results
+        }
+
+    def get_tsdata(self, node_id: str, param_name: str, start_time: int, end_time: int,
+                   data_type: str = "float", num_records: int = 200,
+                   start_id: Optional[str] = None) -> Dict:
+        """Get one page of raw time-series values for a node param"""
+        endpoint = "/v1/user/nodes/tsdata"
+        params = {
+            "node_id": node_id,
+            "param_name": param_name,
+            "type": data_type,
+            "aggregate": "raw",
+            "start_time": start_time,
+            "end_time": end_time,
+            "num_records": num_records
+        }
+        if start_id:
+            params["start_id"] = start_id
+        return self.api_client.get(endpoint, params=params)
+
+    def iter_tsdata(self, node_id: str, param_name: str, start_time: int, end_time: int,
+                    data_type: str = "float", page_size: int = 200) -> Iterator[Tuple[int, float]]:
+        """Yield (timestamp, value) pairs for a time range, following next_id across pages"""
+        start_id = None
+        while True:
+            response = self.get_tsdata(node_id, param_name, start_time, end_time,
+                                       data_type=data_type, num_records=page_size, start_id=start_id)
+            if response.get("status") == "failure":
+                raise RuntimeError(response.get("description") or response.get("message")
+                                   or "Failed to fetch time-series data")
+            for node_data in response.get("ts_data") or []:
+                for param in node_data.get("params") or []:
+                    if param.get("param_name") not in (None, param_name):
+                        continue
+                    for value in param.get("values") or []:
+                        yield value["ts"], value["val"]
+            start_id = response.get("next_id")
+            if not start_id:
+                return
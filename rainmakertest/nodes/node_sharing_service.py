@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterator, List, Optional, Union
 from ..utils.api_client import ApiClient
 import logging
 
@@ -7,6 +7,39 @@ class NodeSharingService:
         self.api_client = api_client
         self.logger = logging.getLogger(__name__)
 
+    def initiate_mapping(
+        self,
+        node_id: str,
+        version: str = "v1"
+    ) -> Dict:
+        """Start a challenge-based mapping; returns the request_id and challenge"""
+        endpoint = f"/{version}/user/nodes/mapping/initiate"
+        payload = {"node_id": node_id}
+        return self.api_client.post(endpoint, json=payload)
+
+    def verify_mapping(
+        self,
+        request_id: str,
+        challenge_response: str,
+        group_id: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        metadata: Optional[Dict] = None,
+        version: str = "v1"
+    ) -> Dict:
+        """Complete a challenge-based mapping with the node's challenge response"""
+        endpoint = f"/{version}/user/nodes/mapping/verify"
+        payload = {
+            "request_id": request_id,
+            "challenge_response": challenge_response
+        }
+        if group_id:
+            payload["group_id"] = group_id
+        if tags:
+            payload["tags"] = tags
+        if metadata:
+            payload["metadata"] = metadata
+        return self.api_client.post(endpoint, json=payload)
+
     def share_nodes(
         self,
         nodes: List[str],
@@ -71,6 +104,40 @@ class NodeSharingService:
             params["start_request_id"] = start_request_id
         return self.api_client.get(endpoint, params=params)
 
+    def iter_sharing_requests(
+        self,
+        primary_user: Optional[str] = None,
+        start_request_id: Optional[str] = None,
+        version: str = "v1"
+    ) -> Iterator[Dict]:
+        """Yield every sharing request, following next_request_id across pages"""
+        cursor = start_request_id
+        seen = set()
+        while True:
+            response = self.get_sharing_requests(
+                primary_user=primary_user,
+                start_request_id=cursor,
+                version=version
+            )
+            if response.get("status") == "failure":
+                raise RuntimeError(response.get("description") or "Failed to fetch sharing requests")
+            for request in response.get("sharing_requests") or []:
+                yield request
+            cursor = response.get("next_request_id")
+            if not cursor or cursor in seen:
+                return
+            seen.add(cursor)
+
+    def delete_sharing_request(
+        self,
+        request_id: str,
+        version: str = "v1"
+    ) -> Dict:
+        """Delete a node sharing request"""
+        endpoint = f"/{version}/user/nodes/sharing/requests"
+        params = {"request_id": request_id}
+        return self.api_client.delete(endpoint, params=params)
+
     def unshare_nodes(
         self,
         nodes: List[str],
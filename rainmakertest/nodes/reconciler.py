@@ -0,0 +1,130 @@
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from .bulk_update import read_admin_node
+from .node_admin_service import NodeAdminService
+from .node_inventory import NodeInventory
+from ..utils.concurrency import DEFAULT_MAX_WORKERS, RateLimiter, is_failure, run_concurrent
+
+
+def diff_node(desired: Dict, current: Dict) -> List[Dict]:
+    """Return the operations that bring a node's tags and metadata to the desired state.
+
+    A desired tag list is exact: missing tags are added and extra tags removed.
+    Omitting "tags" leaves them alone. Desired metadata keys must match the
+    current values; the metadata object is written once when any key differs.
+    """
+    operations = []
+    update = {}
+    if desired.get("tags") is not None:
+        current_tags = set(current.get("tags") or [])
+        wanted = set(desired["tags"])
+        missing = sorted(wanted - current_tags)
+        extra = sorted(current_tags - wanted)
+        if missing:
+            update["tags"] = missing
+        if extra:
+            operations.append({"op": "remove_tags", "tags": extra})
+    if desired.get("metadata"):
+        current_metadata = current.get("metadata")
+        if not isinstance(current_metadata, dict) or any(
+                current_metadata.get(k) != v for k, v in desired["metadata"].items()):
+            update["metadata"] = desired["metadata"]
+    if update:
+        operations.insert(0, {"op": "update", **update})
+    return operations
+
+
+class NodeReconciler:
+    """Bring admin node tags and metadata in line with a desired-state file.
+
+    Current state is taken from the local inventory when one is given and
+    fetched concurrently otherwise; only the update_admin_node and
+    remove_admin_node_tags calls needed to close the gap are issued.
+    """
+
+    def __init__(
+            self,
+            admin_service: NodeAdminService,
+            inventory: Optional[NodeInventory] = None,
+            max_workers: int = DEFAULT_MAX_WORKERS,
+            rate: Optional[float] = None
+    ):
+        self.admin_service = admin_service
+        self.inventory = inventory
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate)
+        self.logger = logging.getLogger(__name__)
+
+    def _needs_fetch(self, row: Dict) -> bool:
+        if self.inventory is None:
+            return True
+        entry = self.inventory.get(row["node_id"])
+        return entry is None or (bool(row.get("metadata")) and "metadata" not in entry)
+
+    def _current(self, row: Dict) -> Dict:
+        self.rate_limiter.acquire()
+        return read_admin_node(self.admin_service, row["node_id"])
+
+    def plan(self, desired_rows: Iterable[Dict]) -> Dict:
+        """Diff desired rows against current state and return the write plan"""
+        desired_rows = [row for row in desired_rows]
+        current = {}
+        to_fetch = []
+        for row in desired_rows:
+            if self._needs_fetch(row):
+                to_fetch.append(row)
+            else:
+                current[row["node_id"]] = self.inventory.get(row["node_id"])
+
+        fetched = run_concurrent(self._current, to_fetch, max_workers=self.max_workers,
+                                 key=lambda row: row["node_id"])
+        unknown = []
+        for entry in fetched.results:
+            if entry["result"]:
+                current[entry["item"]] = entry["result"]
+            else:
+                unknown.append(entry["item"])
+
+        nodes = []
+        for row in desired_rows:
+            if row["node_id"] not in current:
+                continue
+            operations = diff_node(row, current[row["node_id"]])
+            if operations:
+                nodes.append({"node_id": row["node_id"], "operations": operations})
+
+        writes = sum(len(node["operations"]) for node in nodes)
+        return {
+            "desired": len(desired_rows),
+            "in_sync": len(current) - len(nodes),
+            "to_change": len(nodes),
+            "estimated_requests": {"reads": len(to_fetch), "writes": writes},
+            "unknown_nodes": unknown,
+            "read_failures": fetched.failures,
+            "nodes": nodes
+        }
+
+    def _apply_node(self, node: Dict) -> Dict:
+        for operation in node["operations"]:
+            self.rate_limiter.acquire()
+            if operation["op"] == "update":
+                response = self.admin_service.update_admin_node(
+                    node_id=node["node_id"],
+                    metadata=operation.get("metadata"),
+                    tags=operation.get("tags")
+                )
+            else:
+                response = self.admin_service.remove_admin_node_tags(node["node_id"], operation["tags"])
+            if is_failure(response):
+                return response
+        return {"operations": len(node["operations"])}
+
+    def apply(self, plan: Dict) -> Dict:
+        """Execute a plan from plan(), one node per worker; the tag index is saved once at the end"""
+        with self.admin_service.deferred_tag_index_saves():
+            batch = run_concurrent(self._apply_node, plan["nodes"], max_workers=self.max_workers,
+                                   key=lambda node: node["node_id"])
+        summary = batch.summary()
+        summary["requests_sent"] = sum(entry["result"]["operations"] for entry in batch.results)
+        return summary
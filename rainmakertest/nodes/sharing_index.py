@@ -0,0 +1,189 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .node_admin_service import NodeAdminService
+from .node_sharing_service import NodeSharingService
+from ..utils.concurrency import DEFAULT_MAX_WORKERS, RateLimiter, is_failure, run_concurrent
+from ..utils.paths import get_inventory_dir
+
+PRIMARY = "primary"
+SECONDARY = "secondary"
+
+
+def parse_sharing_info(response: Dict) -> Dict[str, Dict[str, str]]:
+    """Turn a get_sharing_info response into {node_id: {user_name: role}}"""
+    shares = {}
+    for entry in response.get("node_sharing") or []:
+        users = entry.get("users") or {}
+        roles = {}
+        for user_name in users.get(SECONDARY) or []:
+            roles[user_name] = SECONDARY
+        for user_name in users.get(PRIMARY) or []:
+            roles[user_name] = PRIMARY
+        shares[entry["node_id"]] = roles
+    return shares
+
+
+class SharingIndex:
+    """Local bipartite index of which users can reach which nodes.
+
+    Built from NodeSharingService.get_sharing_info per node (fetched
+    concurrently) and stored next to the node inventory
+    (<config>.sharing.json). Single nodes or users can be refreshed without a
+    full rebuild, and access queries and audits run offline.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self.logger = logging.getLogger(__name__)
+        self._node_users: Dict[str, Dict[str, str]] = {}
+        self._user_nodes: Dict[str, Dict[str, str]] = {}
+        self.built_at: Optional[float] = None
+
+    @classmethod
+    def for_config(cls, config_id: Optional[str] = None, inventory_dir: Optional[Path] = None) -> "SharingIndex":
+        """Open the index stored for a config, loading it when it exists"""
+        directory = Path(inventory_dir) if inventory_dir else get_inventory_dir()
+        index = cls(directory / f"{config_id or 'default'}.sharing.json")
+        if index.exists():
+            index.load()
+        return index
+
+    def exists(self) -> bool:
+        return self.path is not None and self.path.exists()
+
+    def load(self) -> None:
+        """Load the index from disk"""
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        self._node_users = {}
+        self._user_nodes = {}
+        for node_id, roles in data.get("nodes", {}).items():
+            self.set_node(node_id, roles)
+        self.built_at = data.get("built_at")
+
+    def save(self) -> None:
+        """Atomically write the index to disk"""
+        if self.path is None:
+            return
+        data = {"built_at": self.built_at, "nodes": self._node_users}
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def set_node(self, node_id: str, roles: Dict[str, str]) -> None:
+        """Replace the users (and their roles) recorded for a node"""
+        self.remove_node(node_id)
+        self._node_users[node_id] = dict(roles)
+        for user_name, role in roles.items():
+            self._user_nodes.setdefault(user_name, {})[node_id] = role
+
+    def remove_node(self, node_id: str) -> None:
+        for user_name in self._node_users.pop(node_id, {}):
+            nodes = self._user_nodes.get(user_name)
+            if nodes is not None:
+                nodes.pop(node_id, None)
+                if not nodes:
+                    del self._user_nodes[user_name]
+
+    def set_user(self, user_name: str, nodes: Dict[str, str]) -> None:
+        """Replace the nodes (and roles) recorded for a user"""
+        for node_id in [*self._user_nodes.get(user_name, {})]:
+            if node_id not in nodes:
+                self._node_users.get(node_id, {}).pop(user_name, None)
+        self._user_nodes.pop(user_name, None)
+        for node_id, role in nodes.items():
+            self._node_users.setdefault(node_id, {})[user_name] = role
+            self._user_nodes.setdefault(user_name, {})[node_id] = role
+
+    def build(
+            self,
+            sharing_service: NodeSharingService,
+            node_ids: Iterable[str],
+            max_workers: int = DEFAULT_MAX_WORKERS,
+            rate: Optional[float] = None
+    ) -> Dict:
+        """Fetch sharing info for every node concurrently and replace the index"""
+        def fetch(node_id: str) -> Dict:
+            response = sharing_service.get_sharing_info(node_id=node_id)
+            if is_failure(response):
+                return response
+            return parse_sharing_info(response).get(node_id, {})
+
+        batch = run_concurrent(fetch, node_ids, max_workers=max_workers, rate_limiter=RateLimiter(rate))
+        self._node_users = {}
+        self._user_nodes = {}
+        for entry in batch.results:
+            self.set_node(entry["item"], entry["result"])
+        self.built_at = time.time()
+        self.save()
+        summary = batch.summary()
+        summary["users"] = len(self._user_nodes)
+        return summary
+
+    def refresh_node(self, sharing_service: NodeSharingService, node_id: str) -> Dict[str, str]:
+        """Re-read one node's sharing info and update the index"""
+        response = sharing_service.get_sharing_info(node_id=node_id)
+        if is_failure(response):
+            raise RuntimeError(response.get("description") or f"Failed to read sharing info for {node_id}")
+        roles = parse_sharing_info(response).get(node_id, {})
+        self.set_node(node_id, roles)
+        self.save()
+        return roles
+
+    def refresh_user(self, admin_service: NodeAdminService, user_name: str) -> Dict[str, str]:
+        """Re-read one user's nodes through the admin API and update the index"""
+        response = admin_service.get_admin_user_nodes(user_name=user_name)
+        if is_failure(response):
+            raise RuntimeError(response.get("description") or f"Failed to read nodes of {user_name}")
+        known = self._user_nodes.get(user_name, {})
+        nodes = {}
+        for entry in response.get("nodes") or []:
+            if isinstance(entry, dict):
+                node_id = entry.get("node_id")
+                if "primary" in entry:
+                    nodes[node_id] = PRIMARY if entry["primary"] else SECONDARY
+                    continue
+            else:
+                node_id = entry
+            nodes[node_id] = known.get(node_id, SECONDARY)
+        self.set_user(user_name, nodes)
+        self.save()
+        return nodes
+
+    def users_of(self, node_id: str) -> Dict[str, str]:
+        """Users that can reach a node, with their role"""
+        return dict(self._node_users.get(node_id, {}))
+
+    def nodes_of(self, user_name: str) -> Dict[str, str]:
+        """Nodes a user can reach, with the user's role on each"""
+        return dict(self._user_nodes.get(user_name, {}))
+
+    def audit(self, max_users: Optional[int] = None) -> Dict[str, List]:
+        """Report nodes without a primary user, with several primaries, or shared too widely"""
+        report = {"nodes_without_primary": [], "nodes_with_multiple_primaries": [], "overshared_nodes": []}
+        for node_id, roles in sorted(self._node_users.items()):
+            primaries = sum(1 for role in roles.values() if role == PRIMARY)
+            if primaries == 0:
+                report["nodes_without_primary"].append(node_id)
+            elif primaries > 1:
+                report["nodes_with_multiple_primaries"].append(node_id)
+            if max_users is not None and len(roles) > max_users:
+                report["overshared_nodes"].append({"node_id": node_id, "users": len(roles)})
+        return report
+
+    def stats(self) -> Dict:
+        return {
+            "nodes": len(self._node_users),
+            "users": len(self._user_nodes),
+            "shares": sum(len(roles) for roles in self._node_users.values()),
+            "built_at": self.built_at
+        }
+
+    def __len__(self) -> int:
+        return len(self._node_users)
@@ -0,0 +1,120 @@
+import heapq
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Optional
+
+from .node_service import NodeService
+from ..utils.concurrency import DEFAULT_MAX_WORKERS, RateLimiter, is_failure
+
+ONLINE = "online"
+OFFLINE = "offline"
+
+
+def connectivity_state(response: Dict) -> Optional[str]:
+    """Map a get_node_status response to "online"/"offline" (None if unknown)"""
+    connected = (response.get("connectivity") or {}).get("connected")
+    if connected is None:
+        return None
+    return ONLINE if connected else OFFLINE
+
+
+class StatusWatcher:
+    """Poll the status of a set of nodes and report online/offline transitions.
+
+    Each node has its own poll interval: it drops to fast_interval after the
+    node changes state and doubles on every unchanged poll up to
+    slow_interval. All polls share one request budget (requests per second),
+    so a large node set stretches the intervals instead of flooding the API.
+    """
+
+    def __init__(
+            self,
+            node_service: NodeService,
+            budget: float = 5,
+            fast_interval: float = 5,
+            slow_interval: float = 120,
+            max_workers: int = DEFAULT_MAX_WORKERS,
+            emit_initial: bool = False
+    ):
+        self.node_service = node_service
+        self.rate_limiter = RateLimiter(budget)
+        self.fast_interval = fast_interval
+        self.slow_interval = slow_interval
+        self.max_workers = max_workers
+        self.emit_initial = emit_initial
+        self.states: Dict[str, Optional[str]] = {}
+        self.polls = 0
+        self.logger = logging.getLogger(__name__)
+
+    def _poll(self, node_id: str) -> Optional[str]:
+        self.rate_limiter.acquire()
+        try:
+            response = self.node_service.get_node_status(node_id)
+        except Exception as e:
+            self.logger.debug(f"Status poll for {node_id} failed: {e}")
+            return None
+        if is_failure(response):
+            self.logger.debug(f"Status poll for {node_id} failed: {response}")
+            return None
+        return connectivity_state(response)
+
+    def watch(
+            self,
+            node_ids: Iterable[str],
+            on_event: Callable[[Dict], None],
+            duration: Optional[float] = None
+    ) -> Dict:
+        """Poll until duration elapses (forever when None), calling on_event per transition"""
+        started = time.monotonic()
+        deadline = started + duration if duration is not None else None
+        intervals = {}
+        schedule = []
+        for seq, node_id in enumerate(dict.fromkeys(node_ids)):
+            intervals[node_id] = self.fast_interval
+            heapq.heappush(schedule, (started, seq, node_id))
+        events = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while schedule:
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    break
+                if schedule[0][0] > now:
+                    wake = schedule[0][0] if deadline is None else min(schedule[0][0], deadline)
+                    time.sleep(wake - now)
+                    continue
+
+                due = []
+                while schedule and schedule[0][0] <= now and len(due) < self.max_workers:
+                    due.append(heapq.heappop(schedule))
+                states = executor.map(lambda item: self._poll(item[2]), due)
+                for (_, seq, node_id), state in zip(due, states):
+                    self.polls += 1
+                    known = node_id in self.states
+                    previous = self.states.get(node_id)
+                    if state is not None and state != previous:
+                        self.states[node_id] = state
+                        if (known and previous is not None) or self.emit_initial:
+                            events += 1
+                            on_event({
+                                "timestamp": datetime.now(timezone.utc).isoformat(),
+                                "node_id": node_id,
+                                "from": previous,
+                                "to": state
+                            })
+                        intervals[node_id] = self.fast_interval
+                    else:
+                        self.states.setdefault(node_id, state)
+                        intervals[node_id] = min(intervals[node_id] * 2, self.slow_interval)
+                    heapq.heappush(schedule, (time.monotonic() + intervals[node_id], seq, node_id))
+
+        return {
+            "nodes": len(intervals),
+            "polls": self.polls,
+            "events": events,
+            "elapsed_seconds": round(time.monotonic() - started, 3),
+            "online": sum(1 for state in self.states.values() if state == ONLINE),
+            "offline": sum(1 for state in self.states.values() if state == OFFLINE)
+        }
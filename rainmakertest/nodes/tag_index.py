@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ..utils.paths import get_inventory_dir
+
+
+class TagIndex:
+    """Inverted index from node tag to the set of node IDs carrying it.
+
+    The index lives next to the node inventory (<config>.tags.json) so tag
+    queries are answered in memory with set algebra instead of scanning node
+    listings. NodeAdminService updates it when tags change through rmcli.
+
+    Updates and serialization are guarded by a lock so worker threads can
+    share one index. flush() saves only when something changed, and inside
+    batch() saves are deferred to a single write when the block exits.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self.logger = logging.getLogger(__name__)
+        self._tags: Dict[str, Set[str]] = {}
+        self._nodes: Set[str] = set()
+        self.built_at: Optional[float] = None
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._batch_depth = 0
+
+    @classmethod
+    def for_config(cls, config_id: Optional[str] = None, inventory_dir: Optional[Path] = None) -> "TagIndex":
+        """Open the index stored for a config, loading it when it exists"""
+        directory = Path(inventory_dir) if inventory_dir else get_inventory_dir()
+        index = cls(directory / f"{config_id or 'default'}.tags.json")
+        if index.exists():
+            index.load()
+        return index
+
+    def exists(self) -> bool:
+        return self.path is not None and self.path.exists()
+
+    def load(self) -> None:
+        """Load the index from disk"""
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        with self._lock:
+            self._tags = {tag: set(node_ids) for tag, node_ids in data.get("tags", {}).items()}
+            self._nodes = set(data.get("nodes", []))
+            self.built_at = data.get("built_at")
+            self._dirty = False
+
+    def save(self) -> None:
+        """Atomically write the index to disk"""
+        if self.path is None:
+            return
+        with self._lock:
+            data = {
+                "built_at": self.built_at,
+                "nodes": sorted(self._nodes),
+                "tags": {tag: sorted(node_ids) for tag, node_ids in self._tags.items()}
+            }
+            tmp_path = self.path.with_suffix(".json.tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def flush(self) -> bool:
+        """Save the index if it changed since the last save, unless a batch is open"""
+        with self._lock:
+            if not self._dirty or self._batch_depth:
+                return False
+            self.save()
+            return True
+
+    @contextmanager
+    def batch(self, flush: bool = True) -> Iterator["TagIndex"]:
+        """Defer flush() inside the block; on exit save once if anything changed (unless flush=False)"""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+            if flush:
+                self.flush()
+
+    def rebuild(self, nodes: Iterable[Tuple[str, Iterable[str]]]) -> None:
+        """Rebuild the index from (node_id, tags) pairs"""
+        new_tags: Dict[str, Set[str]] = {}
+        new_nodes: Set[str] = set()
+        for node_id, tags in nodes:
+            new_nodes.add(node_id)
+            for tag in tags or ():
+                new_tags.setdefault(tag, set()).add(node_id)
+        with self._lock:
+            self._tags, self._nodes = new_tags, new_nodes
+            self.built_at = time.time()
+            self._dirty = True
+
+    def add_tags(self, node_id: str, tags: Iterable[str]) -> None:
+        with self._lock:
+            self._nodes.add(node_id)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(node_id)
+            self._dirty = True
+
+    def remove_tags(self, node_id: str, tags: Iterable[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                node_ids = self._tags.get(tag)
+                if node_ids is None:
+                    continue
+                node_ids.discard(node_id)
+                if not node_ids:
+                    del self._tags[tag]
+            self._dirty = True
+
+    def set_tags(self, node_id: str, tags: Iterable[str]) -> None:
+        """Replace the tags recorded for a node"""
+        with self._lock:
+            self.remove_node(node_id)
+            self.add_tags(node_id, tags)
+
+    def remove_node(self, node_id: str) -> None:
+        with self._lock:
+            self.remove_tags(node_id, [tag for tag, node_ids in self._tags.items() if node_id in node_ids])
+            self._nodes.discard(node_id)
+
+    def nodes_with(self, tag: str) -> Set[str]:
+        with self._lock:
+            return set(self._tags.get(tag, ()))
+
+    def query(
+            self,
+            all_tags: Iterable[str] = (),
+            any_tags: Iterable[str] = (),
+            not_tags: Iterable[str] = ()
+    ) -> Set[str]:
+        """Return node IDs having every tag in all_tags, at least one of any_tags
+        and none of not_tags. With no positive terms the query starts from every
+        indexed node."""
+        all_tags, any_tags = [t for t in all_tags], [t for t in any_tags]
+        with self._lock:
+            return self._query(all_tags, any_tags, not_tags)
+
+    def _query(self, all_tags: List[str], any_tags: List[str], not_tags: Iterable[str]) -> Set[str]:
+        if all_tags:
+            # Intersect smallest sets first
+            sets = sorted((self._tags.get(tag, set()) for tag in all_tags), key=len)
+            result = set(sets[0]).intersection(*sets[1:])
+        else:
+            result = set(self._nodes)
+        if any_tags:
+            result &= set().union(*(self._tags.get(tag, set()) for tag in any_tags))
+        for tag in not_tags:
+            result -= self._tags.get(tag, set())
+        return result
+
+    def tag_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {tag: len(node_ids) for tag, node_ids in sorted(self._tags.items())}
+
+    def tags(self) -> List[str]:
+        with self._lock:
+            return sorted(self._tags)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._nodes)
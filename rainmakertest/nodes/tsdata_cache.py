@@ -0,0 +1,213 @@
+import json
+import logging
+import os
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .node_service import NodeService
+from ..utils.paths import get_tsdata_dir
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; fall back to the array module
+    np = None
+
+# tsdata types that can be stored as numbers
+NUMERIC_TYPES = ("float", "int", "bool")
+
+# Recent seconds never marked as downloaded, since points for them may still arrive
+DEFAULT_SETTLE_SECONDS = 300
+
+
+def merge_windows(windows: List[List[int]]) -> List[List[int]]:
+    """Merge overlapping or touching [start, end] second ranges"""
+    merged = []
+    for start, end in sorted(windows):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_windows(windows: List[List[int]], start: int, end: int) -> List[Tuple[int, int]]:
+    """Return the parts of [start, end] not covered by the (merged) windows"""
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in windows:
+        if covered_end < cursor:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start - 1))
+        cursor = covered_end + 1
+        if cursor > end:
+            return gaps
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class TsDataCache:
+    """Local columnar cache of one node param's time-series values.
+
+    Timestamps and values are kept as parallel arrays (int64 seconds and
+    float64) sorted by time, stored under ~/.rainmaker/tsdata with the list of
+    time windows already downloaded. fetch() only downloads the parts of a
+    range that are not covered yet; aggregate() buckets values locally, with
+    NumPy when it is installed. The last settle_seconds before now are
+    downloaded but not marked as covered, so late points are picked up by
+    the next fetch.
+    """
+
+    def __init__(
+            self,
+            node_service: NodeService,
+            node_id: str,
+            param_name: str,
+            data_type: str = "float",
+            config_id: Optional[str] = None,
+            cache_dir: Optional[Path] = None,
+            settle_seconds: int = DEFAULT_SETTLE_SECONDS
+    ):
+        if data_type not in NUMERIC_TYPES:
+            raise ValueError(f"Only numeric params can be cached, got type '{data_type}'")
+        self.node_service = node_service
+        self.node_id = node_id
+        self.param_name = param_name
+        self.data_type = data_type
+        self.settle_seconds = settle_seconds
+        directory = (Path(cache_dir) if cache_dir else get_tsdata_dir()) / (config_id or "default") / node_id
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = param_name.replace("/", "_")
+        self.meta_path = directory / f"{stem}.json"
+        self.ts_path = directory / f"{stem}.ts"
+        self.values_path = directory / f"{stem}.val"
+        self.logger = logging.getLogger(__name__)
+        self.timestamps = array('q')
+        self.values = array('d')
+        self.windows: List[List[int]] = []
+        self._load()
+
+    def _load(self) -> None:
+        if not self.meta_path.exists():
+            return
+        with open(self.meta_path, 'r') as f:
+            meta = json.load(f)
+        if meta.get("data_type") != self.data_type:
+            self.logger.debug(f"Discarding cache for {self.node_id}/{self.param_name}: type changed")
+            return
+        with open(self.ts_path, 'rb') as f:
+            self.timestamps.frombytes(f.read())
+        with open(self.values_path, 'rb') as f:
+            self.values.frombytes(f.read())
+        self.windows = meta.get("windows", [])
+
+    def _save(self) -> None:
+        for path, column in ((self.ts_path, self.timestamps), (self.values_path, self.values)):
+            tmp_path = path.with_suffix(path.suffix + ".tmp")
+            with open(tmp_path, 'wb') as f:
+                column.tofile(f)
+            os.replace(tmp_path, path)
+        # Meta is written last so a crash never records windows whose data is missing
+        tmp_path = self.meta_path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({"data_type": self.data_type, "points": len(self.timestamps), "windows": self.windows}, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def missing(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """Time windows inside [start, end] that still need downloading"""
+        return missing_windows(self.windows, start, end)
+
+    def fetch(self, start: int, end: int, page_size: int = 200) -> Dict:
+        """Download the uncovered parts of [start, end] into the cache"""
+        gaps = self.missing(start, end)
+        settled_until = int(time.time()) - self.settle_seconds
+        new_points = 0
+        for gap_start, gap_end in gaps:
+            new_ts = array('q')
+            new_values = array('d')
+            for ts, value in self.node_service.iter_tsdata(self.node_id, self.param_name, gap_start, gap_end,
+                                                           data_type=self.data_type, page_size=page_size):
+                if not gap_start <= ts <= gap_end:
+                    continue
+                new_ts.append(int(ts))
+                new_values.append(float(value))
+            # Points cached for an uncovered (unsettled) window are replaced by the fresh download
+            lo, hi = self._range(gap_start, gap_end)
+            replaced = hi - lo
+            if replaced:
+                del self.timestamps[lo:hi]
+                del self.values[lo:hi]
+            if new_ts:
+                self._merge(new_ts, new_values)
+            new_points += len(new_ts) - replaced
+            covered_end = min(gap_end, settled_until)
+            if covered_end >= gap_start:
+                self.windows = merge_windows(self.windows + [[gap_start, covered_end]])
+            # Saved per window so an interrupted fetch keeps what it downloaded
+            self._save()
+        return {"downloaded_windows": [[s, e] for s, e in gaps], "new_points": new_points,
+                "cached_points": len(self.timestamps)}
+
+    def _merge(self, new_ts: array, new_values: array) -> None:
+        if not self.timestamps:
+            order = sorted(range(len(new_ts)), key=new_ts.__getitem__)
+            self.timestamps = array('q', (new_ts[i] for i in order))
+            self.values = array('d', (new_values[i] for i in order))
+            return
+        if np is not None:
+            ts = np.concatenate([np.frombuffer(self.timestamps, dtype=np.int64), np.frombuffer(new_ts, dtype=np.int64)])
+            values = np.concatenate([np.frombuffer(self.values), np.frombuffer(new_values)])
+            order = np.argsort(ts, kind="stable")
+            self.timestamps = array('q', ts[order].tobytes())
+            self.values = array('d', values[order].tobytes())
+            return
+        pairs = sorted(zip(self.timestamps + new_ts, self.values + new_values), key=lambda pair: pair[0])
+        self.timestamps = array('q', (ts for ts, _ in pairs))
+        self.values = array('d', (value for _, value in pairs))
+
+    def _range(self, start: int, end: int) -> Tuple[int, int]:
+        return bisect_left(self.timestamps, start), bisect_right(self.timestamps, end)
+
+    def points(self, start: int, end: int) -> List[Tuple[int, float]]:
+        """Cached (timestamp, value) pairs inside [start, end]"""
+        lo, hi = self._range(start, end)
+        return [*zip(self.timestamps[lo:hi], self.values[lo:hi])]
+
+    def aggregate(self, start: int, end: int, bucket_seconds: int) -> List[Dict]:
+        """Count/min/max/avg of cached values per bucket_seconds bucket of [start, end]"""
+        if bucket_seconds < 1:
+            raise ValueError("bucket_seconds must be at least 1")
+        lo, hi = self._range(start, end)
+        if lo == hi:
+            return []
+        if np is not None:
+            ts = np.frombuffer(self.timestamps, dtype=np.int64)[lo:hi]
+            values = np.frombuffer(self.values)[lo:hi]
+            buckets = (ts - start) // bucket_seconds
+            offsets = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+            counts = np.diff(np.append(offsets, len(values)))
+            sums = np.add.reduceat(values, offsets)
+            return [
+                {"start": int(start + bucket * bucket_seconds), "count": int(count), "min": float(low),
+                 "max": float(high), "avg": float(total / count)}
+                for bucket, count, low, high, total in zip(
+                    buckets[offsets].tolist(), counts.tolist(), np.minimum.reduceat(values, offsets).tolist(),
+                    np.maximum.reduceat(values, offsets).tolist(), sums.tolist())
+            ]
+        rows = []
+        pairs = zip(self.timestamps[lo:hi], self.values[lo:hi])
+        for bucket, group in groupby(pairs, key=lambda pair: (pair[0] - start) // bucket_seconds):
+            values = [value for _, value in group]
+            rows.append({"start": start + bucket * bucket_seconds, "count": len(values), "min": min(values),
+                         "max": max(values), "avg": sum(values) / len(values)})
+        return rows
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
@@ -0,0 +1,187 @@
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+from .firmware_cache import FirmwareCache
+from .ota_image_service import OTAService
+from ..utils.concurrency import DEFAULT_MAX_WORKERS, run_concurrent
+
+MANIFEST_FIELDS = {"file", "name", "version", "model", "type", "chip", "validate"}
+
+
+def load_manifest(path: str) -> List[Dict]:
+    """Read an upload manifest: a JSON list (or {"images": [...]}) of image entries.
+
+    Each entry needs "file" and "name" and may set "version", "model",
+    "type", "chip" and "validate"; any other keys are sent as extra image
+    fields. Relative file paths are resolved against the manifest directory.
+    """
+    with open(path, 'r') as f:
+        try:
+            manifest = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid manifest JSON: {e}")
+    entries = manifest.get("images") if isinstance(manifest, dict) else manifest
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("Manifest must be a non-empty list of images (or {\"images\": [...]})")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    names = set()
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get("file") or not entry.get("name"):
+            raise ValueError(f"Manifest entry {index} needs 'file' and 'name'")
+        if entry["name"] in names:
+            raise ValueError(f"Duplicate image name '{entry['name']}' in manifest")
+        names.add(entry["name"])
+        entry["file"] = os.path.join(base_dir, os.path.expanduser(entry["file"]))
+        if not os.path.isfile(entry["file"]):
+            raise ValueError(f"Manifest entry '{entry['name']}': file {entry['file']} not found")
+    return entries
+
+
+def _prepare(entry: Dict, cache_dir: str, validate: bool) -> Dict:
+    """Worker process: validate, hash and encode one manifest entry"""
+    try:
+        service = OTAService(None, firmware_cache=FirmwareCache(cache_dir))
+        payload = {
+            "image_name": entry["name"],
+            "fw_version": entry.get("version"),
+            "model": entry.get("model"),
+            "type": entry.get("type") or "development",
+            **{k: v for k, v in entry.items() if k not in MANIFEST_FIELDS}
+        }
+        return service.prepare_file(entry["file"], payload, validate=entry.get("validate", validate),
+                                    chip=entry.get("chip"))
+    except Exception as e:
+        return {"status": "failure", "description": str(e)}
+
+
+class BulkImageUploader:
+    """Upload many firmware images: encode in a process pool, then upload concurrently.
+
+    Validation, hashing and base64 encoding are CPU bound and run in worker
+    processes that write into the firmware cache; the uploads stream the
+    cached encodings from a thread pool over the shared ApiClient session.
+    """
+
+    def __init__(
+            self,
+            ota_service: OTAService,
+            processes: Optional[int] = None,
+            max_workers: int = DEFAULT_MAX_WORKERS,
+            force: bool = False,
+            validate: bool = True
+    ):
+        self.ota_service = ota_service
+        self.processes = processes or os.cpu_count() or 1
+        self.max_workers = max_workers
+        self.force = force
+        self.validate = validate
+        self.logger = logging.getLogger(__name__)
+
+    def prepare(self, entries: List[Dict],
+                on_progress: Optional[Callable[[str, int, int, int, float], None]] = None) -> Dict:
+        """Encode all entries in the process pool; returns prepared images and failures by name"""
+        if self.ota_service.firmware_cache is None:
+            self.ota_service.firmware_cache = FirmwareCache()
+        cache_dir = str(self.ota_service.firmware_cache.cache_dir)
+        prepared, failures = {}, []
+        started = time.monotonic()
+        encoded_bytes = 0
+        with ProcessPoolExecutor(max_workers=min(self.processes, len(entries))) as executor:
+            futures = {executor.submit(_prepare, entry, cache_dir, self.validate): entry for entry in entries}
+            for done, future in enumerate(as_completed(futures), start=1):
+                name = futures[future]["name"]
+                result = future.result()
+                if result.get("status") == "failure":
+                    failures.append({"item": name, "error": result.get("description")})
+                else:
+                    prepared[name] = result
+                    encoded_bytes += result["digest"]["size"]
+                if on_progress:
+                    on_progress("prepare", done, len(entries), encoded_bytes, time.monotonic() - started)
+        return {"prepared": prepared, "failures": failures, "seconds": time.monotonic() - started,
+                "bytes": encoded_bytes}
+
+    def run(self, entries: List[Dict],
+            on_progress: Optional[Callable[[str, int, int, int, float], None]] = None) -> Dict:
+        """Prepare and upload every manifest entry.
+
+        on_progress(stage, done, total, bytes, elapsed_seconds) is called as
+        each image is prepared ("prepare") or uploaded ("upload"). Entries
+        with the same bytes as an earlier entry are uploaded after it, so
+        they can be deduplicated against it instead of being sent again.
+        """
+        stage = self.prepare(entries, on_progress)
+        prepared = stage["prepared"]
+
+        # Index the new encodings in this process only, keeping the whole batch out of eviction
+        cache = self.ota_service.firmware_cache
+        batch_hashes = {item["digest"]["sha256"] for item in prepared.values()}
+        for item in prepared.values():
+            cache.register(item["digest"], item["source"], item["metadata"], keep=batch_hashes)
+
+        # One image list refresh for the batch instead of one per duplicate
+        store = self.ota_service._store()
+        refreshed = False
+        if not self.force and any(store.get(item["digest"]["sha256"]) for item in prepared.values()):
+            refreshed = self.ota_service.refresh_image_index().get("status") != "failure"
+
+        uploaded_bytes = 0
+        done = 0
+        started = time.monotonic()
+
+        def upload(item):
+            # Without a confirmed image list, never skip an upload on a stale local record
+            return self.ota_service.upload_prepared(item, force=self.force or not refreshed, refresh=False)
+
+        def on_result(item, result, error):
+            nonlocal uploaded_bytes, done
+            done += 1
+            if not error:
+                uploaded_bytes += result.get("body_bytes", 0)
+            if on_progress:
+                on_progress("upload", done, len(prepared), uploaded_bytes, time.monotonic() - started)
+
+        # In manifest order, so the earliest entry is the one uploaded
+        first, repeated = {}, []
+        for item in (prepared[entry["name"]] for entry in entries if entry["name"] in prepared):
+            if item["digest"]["sha256"] in first:
+                repeated.append(item)
+            else:
+                first[item["digest"]["sha256"]] = item
+
+        batch = run_concurrent(upload, [*first.values()], max_workers=self.max_workers,
+                               key=lambda item: item["payload"]["image_name"], on_result=on_result)
+        if repeated:
+            if not self.force and not refreshed:
+                refreshed = self.ota_service.refresh_image_index().get("status") != "failure"
+            repeats = run_concurrent(upload, repeated, max_workers=self.max_workers,
+                                     key=lambda item: item["payload"]["image_name"], on_result=on_result)
+            batch.results.extend(repeats.results)
+            batch.failures.extend(repeats.failures)
+            batch.finished = repeats.finished
+        summary = batch.summary()
+        summary["total"] += len(stage["failures"])
+        summary["failed"] += len(stage["failures"])
+        summary["failures"] = stage["failures"] + summary["failures"]
+        summary["images"] = {
+            entry["item"]: {
+                "ota_image_id": entry["result"].get("ota_image_id"),
+                "deduplicated": entry["result"].get("deduplicated", False),
+                "sha256": prepared[entry["item"]]["digest"]["sha256"]
+            }
+            for entry in batch.results
+        }
+        summary["prepare_seconds"] = round(stage["seconds"], 3)
+        summary["prepare_mb_per_second"] = _mb_per_second(stage["bytes"], stage["seconds"])
+        summary["uploaded_bytes"] = uploaded_bytes
+        summary["upload_mb_per_second"] = _mb_per_second(uploaded_bytes, batch.elapsed)
+        return summary
+
+
+def _mb_per_second(size: int, seconds: float) -> Optional[float]:
+    return round(size / (1024 * 1024) / seconds, 2) if seconds > 0 else None
@@ -0,0 +1,145 @@
+import hashlib
+import struct
+from typing import Dict, List, Optional
+
+ESP_IMAGE_MAGIC = 0xE9
+APP_DESC_MAGIC = 0xABCD5432
+
+# esp_image_header_t: common header followed by the extended header
+IMAGE_HEADER = struct.Struct("<BBBBI")
+EXTENDED_HEADER = struct.Struct("<B3sHBHH4sB")
+SEGMENT_HEADER = struct.Struct("<II")
+# esp_app_desc_t up to app_elf_sha256
+APP_DESC = struct.Struct("<II8s32s32s16s16s32s32s")
+MAX_SEGMENTS = 16
+HASH_LENGTH = 32
+
+# esp_chip_id_t values
+CHIP_NAMES = {
+    0: "ESP32",
+    2: "ESP32-S2",
+    5: "ESP32-C3",
+    9: "ESP32-S3",
+    12: "ESP32-C2",
+    13: "ESP32-C6",
+    16: "ESP32-H2",
+    18: "ESP32-P4",
+    20: "ESP32-C61",
+    23: "ESP32-C5",
+}
+
+
+class EspImageError(ValueError):
+    """Raised when a firmware file is not a valid ESP application image"""
+
+
+def _cstr(raw: bytes) -> str:
+    return raw.split(b"\0", 1)[0].decode("utf-8", errors="replace")
+
+
+def _xor_bytes(data) -> int:
+    """XOR of all bytes in data, folded as one big integer"""
+    value = int.from_bytes(data, "little")
+    width = max(len(data), 1)
+    while width > 1:
+        half = (width + 1) // 2
+        value = (value & ((1 << (8 * half)) - 1)) ^ (value >> (8 * half))
+        width = half
+    return value
+
+
+def chip_name(chip_id: int) -> str:
+    return CHIP_NAMES.get(chip_id, f"unknown({chip_id})")
+
+
+def parse_esp_image(data, verify: bool = True) -> Dict:
+    """Parse and validate an ESP application image held in a bytes-like object.
+
+    Checks the magic byte, chip ID, segment table, XOR checksum and, when the
+    image has one, the appended SHA-256. Works directly on a memoryview of a
+    mapped file, so nothing is copied apart from the hashing itself.
+    """
+    view = memoryview(data)
+    size = len(view)
+    if size < IMAGE_HEADER.size + EXTENDED_HEADER.size:
+        raise EspImageError(f"Image is too small ({size} bytes) to be an ESP application image")
+
+    magic, segment_count, spi_mode, spi_speed_size, entry_addr = IMAGE_HEADER.unpack_from(view, 0)
+    if magic != ESP_IMAGE_MAGIC:
+        raise EspImageError(f"Bad image magic 0x{magic:02X} (expected 0x{ESP_IMAGE_MAGIC:02X})")
+    (wp_pin, _, chip_id, min_chip_rev, min_chip_rev_full, max_chip_rev_full, _,
+     hash_appended) = EXTENDED_HEADER.unpack_from(view, IMAGE_HEADER.size)
+    if chip_id not in CHIP_NAMES:
+        raise EspImageError(f"Unknown chip ID {chip_id}")
+    if not 0 < segment_count <= MAX_SEGMENTS:
+        raise EspImageError(f"Invalid segment count {segment_count}")
+
+    segments: List[Dict] = []
+    checksum = 0xEF
+    offset = IMAGE_HEADER.size + EXTENDED_HEADER.size
+    for index in range(segment_count):
+        if offset + SEGMENT_HEADER.size > size:
+            raise EspImageError(f"Segment {index} header is past the end of the image")
+        load_addr, length = SEGMENT_HEADER.unpack_from(view, offset)
+        start = offset + SEGMENT_HEADER.size
+        if start + length > size:
+            raise EspImageError(f"Segment {index} ({length} bytes at 0x{load_addr:08X}) is truncated")
+        if verify:
+            checksum ^= _xor_bytes(view[start:start + length])
+        segments.append({"load_addr": load_addr, "offset": start, "length": length})
+        offset = start + length
+
+    # The checksum byte sits at the last byte of the next 16-byte boundary
+    checksum_offset = offset + (15 - offset % 16)
+    if checksum_offset >= size:
+        raise EspImageError("Image is truncated before its checksum")
+    if verify and view[checksum_offset] != checksum:
+        raise EspImageError(f"Checksum mismatch (0x{view[checksum_offset]:02X} != 0x{checksum:02X})")
+    image_length = checksum_offset + 1
+
+    sha256 = None
+    if hash_appended:
+        if image_length + HASH_LENGTH > size:
+            raise EspImageError("Image is truncated before its appended SHA-256")
+        sha256 = bytes(view[image_length:image_length + HASH_LENGTH]).hex()
+        if verify and hashlib.sha256(view[:image_length]).hexdigest() != sha256:
+            raise EspImageError("Appended SHA-256 does not match the image contents")
+        image_length += HASH_LENGTH
+
+    app_desc = None
+    first = segments[0]
+    if first["length"] >= APP_DESC.size:
+        fields = APP_DESC.unpack_from(view, first["offset"])
+        if fields[0] == APP_DESC_MAGIC:
+            app_desc = {
+                "secure_version": fields[1],
+                "version": _cstr(fields[3]),
+                "project_name": _cstr(fields[4]),
+                "time": _cstr(fields[5]),
+                "date": _cstr(fields[6]),
+                "idf_ver": _cstr(fields[7]),
+                "app_elf_sha256": fields[8].hex()
+            }
+    if app_desc is None:
+        raise EspImageError("No application descriptor found (not an application image?)")
+
+    view.release()
+    return {
+        "chip_id": chip_id,
+        "chip": chip_name(chip_id),
+        "min_chip_rev_full": min_chip_rev_full,
+        "max_chip_rev_full": max_chip_rev_full,
+        "entry_addr": entry_addr,
+        "spi_mode": spi_mode,
+        "segments": segments,
+        "image_length": image_length,
+        "hash_appended": bool(hash_appended),
+        "sha256": sha256,
+        "app_desc": app_desc
+    }
+
+
+def check_chip(image_info: Dict, expected_chip: Optional[str]) -> None:
+    """Raise EspImageError if the image was built for a different chip than expected"""
+    if expected_chip and image_info["chip"].replace("-", "").lower() != expected_chip.replace("-", "").lower():
+        raise EspImageError(f"Image is built for {image_info['chip']}, expected {expected_chip}")
@@ -0,0 +1,148 @@
+import base64
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .firmware_digest import FirmwareFile
+from .firmware_stream import ENCODE_CHUNK_SIZE
+from ..utils.paths import get_firmware_dir
+
+# Total size of cached base64 encodings before least recently used ones are evicted
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+def write_encoding(firmware: FirmwareFile, path: Path) -> bool:
+    """Write the base64 encoding of a firmware image to path unless it already exists.
+
+    Only the .b64 file is touched, never the index, so this is safe to call
+    from worker processes; the parent records the entry with register().
+    Returns True when the encoding was written.
+    """
+    path = Path(path)
+    if path.exists():
+        return False
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        for piece in firmware.chunks(ENCODE_CHUNK_SIZE):
+            f.write(base64.b64encode(piece))
+    os.replace(tmp_path, path)
+    return True
+
+
+class FirmwareCache:
+    """Content-addressed cache of firmware images under ~/.rainmaker/firmware/cache.
+
+    Each image is stored once per SHA-256 as its precomputed base64 encoding
+    (<sha256>.b64) with its digest and metadata in index.json, so uploading
+    the same binary to several environments or configs streams the stored
+    encoding instead of re-encoding it. Entries are evicted least recently
+    used first once the encodings exceed max_bytes.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir) if cache_dir else get_firmware_dir() / "cache"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / "index.json"
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger(__name__)
+        self.entries: Dict[str, Dict] = {}
+        self._lock = threading.RLock()
+        if self.index_path.exists():
+            with open(self.index_path, 'r') as f:
+                self.entries = json.load(f)
+
+    def _save(self) -> None:
+        tmp_path = self.index_path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def encoding_path(self, sha256: str) -> Path:
+        return self.cache_dir / f"{sha256}.b64"
+
+    def get(self, sha256: str) -> Optional[Dict]:
+        """Return a cache entry and mark it as used (None if missing)"""
+        with self._lock:
+            entry = self.entries.get(sha256)
+            if entry is None:
+                return None
+            if not self.encoding_path(sha256).exists():
+                del self.entries[sha256]
+                self._save()
+                return None
+            entry["last_used"] = time.time()
+            entry["hits"] = entry.get("hits", 0) + 1
+            self._save()
+            return entry
+
+    def add(self, firmware: FirmwareFile, metadata: Optional[Dict] = None) -> Dict:
+        """Cache a firmware image (digest, metadata and base64 encoding) and return its entry.
+
+        Meant for a miss reported by get(); adding an image that is already
+        cached only marks it as used.
+        """
+        digest = firmware.digest()
+        write_encoding(firmware, self.encoding_path(digest["sha256"]))
+        return self.register(digest, firmware.path, metadata)
+
+    def register(self, digest: Dict, source: str, metadata: Optional[Dict] = None,
+                 keep: Iterable[str] = ()) -> Dict:
+        """Index an encoding written by write_encoding and evict older entries to fit.
+
+        Images listed in keep (e.g. the rest of a batch about to be uploaded)
+        are never evicted.
+        """
+        sha256 = digest["sha256"]
+        now = time.time()
+        with self._lock:
+            entry = self.entries.get(sha256)
+            if entry is None:
+                entry = {
+                    **digest,
+                    "b64_size": self.encoding_path(sha256).stat().st_size,
+                    "source": os.path.abspath(source),
+                    "metadata": metadata or {},
+                    "added_at": now,
+                    "last_used": now,
+                    "hits": 0
+                }
+                self.entries[sha256] = entry
+            else:
+                entry["last_used"] = now
+                entry["hits"] = entry.get("hits", 0) + 1
+            self.evict(keep={sha256, *keep})
+            self._save()
+            return entry
+
+    def evict(self, keep: Iterable[str] = (), max_bytes: Optional[int] = None) -> List[str]:
+        """Drop least recently used encodings until the cache fits in max_bytes"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        keep = set(keep)
+        with self._lock:
+            total = sum(entry["b64_size"] for entry in self.entries.values())
+            evicted = []
+            for sha256, entry in sorted(self.entries.items(), key=lambda item: item[1]["last_used"]):
+                if total <= limit:
+                    break
+                if sha256 in keep:
+                    continue
+                self.encoding_path(sha256).unlink(missing_ok=True)
+                total -= entry["b64_size"]
+                evicted.append(sha256)
+            for sha256 in evicted:
+                del self.entries[sha256]
+            if evicted:
+                self.logger.debug(f"Evicted {len(evicted)} cached firmware images")
+                self._save()
+            return evicted
+
+    def stats(self) -> Dict:
+        return {
+            "images": len(self.entries),
+            "bytes": sum(entry["b64_size"] for entry in self.entries.values()),
+            "max_bytes": self.max_bytes
+        }
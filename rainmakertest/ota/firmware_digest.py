@@ -0,0 +1,172 @@
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from ..utils.paths import get_firmware_dir
+
+# Bytes hashed per step when no encoder is consuming the file
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+# Image attributes an existing upload must share before its bytes are reused
+IMAGE_FIELDS = ("fw_version", "model", "type")
+
+
+class FirmwareFile:
+    """Read-only memory map of a firmware image with incremental SHA-256/MD5.
+
+    chunks() yields zero-copy memoryview slices of the map and feeds every
+    slice to the digests, so the upload encoder and the hashing share one pass
+    over the file. digest() finishes the pass when nothing else read the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._file = open(self.path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        # mmap cannot map an empty file
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self.view = memoryview(self._map) if self._map is not None else memoryview(b"")
+        self._sha256 = hashlib.sha256()
+        self._md5 = hashlib.md5()
+        self._hashed = 0
+
+    def __enter__(self) -> "FirmwareFile":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.view.release()
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # A slice handed out by chunks() is still alive; the map is freed with it
+                pass
+        self._file.close()
+
+    def _slices(self, offset: int, chunk_size: int) -> Iterator[memoryview]:
+        for start in range(offset, self.size, chunk_size):
+            piece = self.view[start:start + chunk_size]
+            if start == self._hashed:
+                self._sha256.update(piece)
+                self._md5.update(piece)
+                self._hashed += len(piece)
+            yield piece
+
+    def chunks(self, chunk_size: int) -> Iterator[memoryview]:
+        """Yield consecutive zero-copy slices of the image, hashing each one"""
+        return self._slices(0, chunk_size)
+
+    def digest(self) -> Dict:
+        """Return sha256/md5/size, hashing whatever part has not been read yet"""
+        for _ in self._slices(self._hashed, DIGEST_CHUNK_SIZE):
+            pass
+        return {"sha256": self._sha256.hexdigest(), "md5": self._md5.hexdigest(), "size": self.size}
+
+
+def digest_bytes(data: bytes) -> Dict:
+    """Digest of an image already held in memory (e.g. a decoded base64 string)"""
+    return {"sha256": hashlib.sha256(data).hexdigest(), "md5": hashlib.md5(data).hexdigest(), "size": len(data)}
+
+
+class DigestStore:
+    """Local record of uploaded firmware digests (~/.rainmaker/firmware/digests.json).
+
+    Keyed by SHA-256; each entry keeps the MD5, size and the images it was
+    uploaded as (with their fw_version, model and type), so an image can later
+    be verified or matched by content.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else get_firmware_dir() / "digests.json"
+        self.entries: Dict[str, Dict] = {}
+        # Uploads running in threads record into the same store
+        self._lock = threading.RLock()
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                self.entries = json.load(f)
+
+    def save(self) -> None:
+        """Atomically write the store to disk"""
+        with self._lock:
+            tmp_path = self.path.with_suffix(".json.tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def record(self, digest: Dict, ota_image_id: Optional[str], image_name: str,
+               config_id: Optional[str] = None, deduplicated: bool = False,
+               image: Optional[Dict] = None) -> None:
+        """Remember that the bytes with this digest were uploaded (or aliased) as an image"""
+        upload = {
+            "ota_image_id": ota_image_id,
+            "image_name": image_name,
+            "config_id": config_id,
+            "uploaded_at": time.time(),
+            **{field: (image or {}).get(field) for field in IMAGE_FIELDS}
+        }
+        if deduplicated:
+            upload["deduplicated"] = True
+        with self._lock:
+            entry = self.entries.setdefault(digest["sha256"], {"md5": digest["md5"], "size": digest["size"],
+                                                               "uploads": []})
+            entry["uploads"].append(upload)
+            self.save()
+
+    def get(self, sha256: str) -> Optional[Dict]:
+        return self.entries.get(sha256)
+
+    def find_image(self, sha256: str, config_id: Optional[str] = None,
+                   image: Optional[Dict] = None) -> Optional[Dict]:
+        """Return the most recent upload of these bytes under a config, if any
+
+        With image, only an upload whose fw_version, model and type all equal
+        the image's is returned.
+        """
+        entry = self.entries.get(sha256) or {}
+        for upload in reversed(entry.get("uploads", [])):
+            if upload.get("config_id") != config_id or not upload.get("ota_image_id"):
+                continue
+            if image is None or all(upload.get(field) == image.get(field) for field in IMAGE_FIELDS):
+                return upload
+        return None
+
+    def refresh(self, images: List[Dict], config_id: Optional[str] = None) -> Dict:
+        """Reconcile the uploads of a config with the server's image list.
+
+        Uploads whose image no longer exists are dropped and the others take
+        the server's fw_version, model and type. Images the server lists with
+        an MD5 that matches a known digest are added, so images uploaded by
+        other tools are found too.
+        """
+        with self._lock:
+            live = {image.get("ota_image_id"): image for image in images}
+            by_md5 = {}
+            for sha256, entry in self.entries.items():
+                by_md5.setdefault(entry["md5"], sha256)
+            removed = added = 0
+            for entry in self.entries.values():
+                kept = [u for u in entry["uploads"] if u.get("config_id") != config_id or u.get("ota_image_id") in live]
+                removed += len(entry["uploads"]) - len(kept)
+                entry["uploads"] = kept
+                for upload in kept:
+                    if upload.get("config_id") == config_id:
+                        upload.update({field: live[upload["ota_image_id"]].get(field) for field in IMAGE_FIELDS})
+            for ota_image_id, image in live.items():
+                md5 = image.get("file_md5") or image.get("md5")
+                sha256 = by_md5.get(md5)
+                if sha256 is None or any(u.get("ota_image_id") == ota_image_id for u in self.entries[sha256]["uploads"]):
+                    continue
+                self.entries[sha256]["uploads"].append({"ota_image_id": ota_image_id, "image_name": image.get("image_name"),
+                                                        "config_id": config_id, "uploaded_at": None,
+                                                        **{field: image.get(field) for field in IMAGE_FIELDS}})
+                added += 1
+            self.save()
+            return {"images": len(live), "removed": removed, "added": added}
@@ -0,0 +1,93 @@
+import base64
+import io
+import json
+import os
+from typing import Callable, Dict, Iterator
+
+from .firmware_digest import FirmwareFile
+
+# Raw bytes encoded per step; a multiple of 3 so chunks concatenate into valid base64
+ENCODE_CHUNK_SIZE = 3 * 16 * 1024
+
+
+def base64_length(size: int) -> int:
+    """Length of the padded base64 encoding of size bytes"""
+    return 4 * ((size + 2) // 3)
+
+
+class Base64JsonBody:
+    """File-like JSON request body carrying a base64 firmware image without building it in memory.
+
+    The body is {<fields>, "<b64_field>": "<base64>"}. The base64 text comes
+    either from encoding a FirmwareFile on the fly (from_firmware, where the
+    encoder consumes memory-mapped slices and the SHA-256/MD5 digest is
+    computed in the same pass) or from an encoding precomputed on disk
+    (from_encoded_file). Only one chunk is held in memory at a time and the
+    total length is known up front, so requests sends it with a
+    Content-Length header and reads it in blocks. seek(0) starts the body
+    over, e.g. to resend it uncompressed.
+    """
+
+    def __init__(self, fields: Dict, encoded_chunks: Callable[[], Iterator[bytes]], encoded_length: int,
+                 b64_field: str = "base64_fwimage"):
+        head = json.dumps(fields, separators=(',', ':'))[:-1]
+        separator = "," if fields else ""
+        self._prefix = f'{head}{separator}{json.dumps(b64_field)}:"'.encode('utf-8')
+        self._suffix = b'"}'
+        self._length = len(self._prefix) + encoded_length + len(self._suffix)
+        self._encoded_chunks = encoded_chunks
+        self.seek(0)
+
+    @classmethod
+    def from_firmware(cls, firmware: FirmwareFile, fields: Dict, b64_field: str = "base64_fwimage",
+                      chunk_size: int = ENCODE_CHUNK_SIZE) -> "Base64JsonBody":
+        """Encode a mapped firmware file while the body is read"""
+        if chunk_size % 3:
+            raise ValueError("chunk_size must be a multiple of 3")
+        # Re-reading the file does not hash it twice, so the body can be rewound
+        def chunks() -> Iterator[bytes]:
+            return (base64.b64encode(piece) for piece in firmware.chunks(chunk_size))
+        return cls(fields, chunks, base64_length(firmware.size), b64_field)
+
+    @classmethod
+    def from_encoded_file(cls, path: str, fields: Dict, b64_field: str = "base64_fwimage",
+                          chunk_size: int = ENCODE_CHUNK_SIZE) -> "Base64JsonBody":
+        """Stream an already base64-encoded file into the body"""
+        def chunks() -> Iterator[bytes]:
+            with open(path, 'rb') as f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        return
+                    yield chunk
+        return cls(fields, chunks, os.path.getsize(path), b64_field)
+
+    def _generate(self, encoded_chunks: Iterator[bytes]) -> Iterator[bytes]:
+        yield self._prefix
+        yield from encoded_chunks
+        yield self._suffix
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """Rewind to the start of the body, the only position it can seek to"""
+        if offset != 0 or whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("Base64JsonBody can only seek to the start")
+        self._parts = self._generate(self._encoded_chunks())
+        self._buffer = b""
+        return 0
+
+    def read(self, size: int = -1) -> bytes:
+        """Return up to size bytes of the body (everything left when size < 0)"""
+        if size is None or size < 0:
+            data = self._buffer + b"".join(self._parts)
+            self._buffer = b""
+            return data
+        while len(self._buffer) < size:
+            part = next(self._parts, None)
+            if part is None:
+                break
+            self._buffer += part
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def __len__(self) -> int:
+        return self._length
@@ -2,24 +2,108 @@ import base64
 import os
 from typing import Dict, Optional, Union, List
 from ..utils.api_client import ApiClient
+from .esp_image import EspImageError, check_chip, parse_esp_image
+from .firmware_cache import FirmwareCache, write_encoding
+from .firmware_digest import DigestStore, FirmwareFile, digest_bytes
+from .firmware_stream import Base64JsonBody
+
+OTA_IMAGE_ENDPOINT = "/v1/admin/otaimage"
 
 
 class OTAService:
-    def __init__(self, api_client: ApiClient):
+    def __init__(self, api_client: ApiClient, digest_store: Optional[DigestStore] = None,
+                 firmware_cache: Optional[FirmwareCache] = None, use_cache: bool = True):
         self.api_client = api_client
+        # Where digests of uploaded images are recorded (created on first upload)
+        self.digest_store = digest_store
+        # Precomputed base64 encodings reused across uploads (created on first upload)
+        self.firmware_cache = firmware_cache
+        self.use_cache = use_cache
         # Set default bin file path (adjust as needed)
         self.default_bin_path = os.path.join(os.path.dirname(__file__), 'switch.bin')
 
     def _file_to_base64(self, file_path: str) -> str:
         """Convert a binary file to base64 string"""
         try:
-            with open(file_path, 'rb') as f:
-                file_content = f.read()
-                return base64.b64encode(file_content).decode('utf-8')
+            with FirmwareFile(file_path) as firmware:
+                return base64.b64encode(firmware.view).decode('utf-8')
         except Exception as e:
             # Re-raising for specific file errors is fine here if you want distinct error handling
             raise ValueError(f"Error reading file {file_path}: {str(e)}") from e
 
+    def _check_image(self, data, payload: Dict, chip: Optional[str]) -> Dict:
+        """Validate an ESP application image and fill fw_version/model from its app descriptor"""
+        image_info = parse_esp_image(data)
+        check_chip(image_info, chip)
+        app_desc = image_info["app_desc"]
+        if payload.get("fw_version") is None and app_desc["version"]:
+            payload["fw_version"] = app_desc["version"]
+        # RainMaker nodes report the project name as their model
+        if payload.get("model") is None and app_desc["project_name"]:
+            payload["model"] = app_desc["project_name"]
+        return image_info
+
+    def _cached_body(self, firmware: FirmwareFile, digest: Dict, payload: Dict, metadata: Optional[Dict] = None):
+        """Return an upload body streamed from the firmware cache and whether it was a cache hit"""
+        if self.firmware_cache is None:
+            self.firmware_cache = FirmwareCache()
+        sha256 = digest["sha256"]
+        hit = self.firmware_cache.get(sha256) is not None
+        if not hit:
+            self.firmware_cache.add(firmware, metadata={"file_name": os.path.basename(firmware.path), **(metadata or {})})
+        body = Base64JsonBody.from_encoded_file(str(self.firmware_cache.encoding_path(sha256)), payload)
+        return body, hit
+
+    def _store(self) -> DigestStore:
+        if self.digest_store is None:
+            self.digest_store = DigestStore()
+        return self.digest_store
+
+    def _record_upload(self, result: Dict, digest: Dict, payload: Dict) -> Dict:
+        """Attach the image digest to an upload result and remember it locally"""
+        if not isinstance(result, dict) or result.get("status") == "failure":
+            return result
+        result["firmware_digest"] = digest
+        result["deduplicated"] = False
+        self._store().record(digest, result.get("ota_image_id"), payload["image_name"], self.api_client.config_id,
+                             image=payload)
+        return result
+
+    def refresh_image_index(self) -> Dict:
+        """Sync the local digest-to-image index with the images on the server"""
+        response = self.get_images()
+        if response.get("status") == "failure":
+            return response
+        return self._store().refresh(response.get("ota_images") or [], self.api_client.config_id)
+
+    def _deduplicate(self, digest: Dict, payload: Dict, refresh: bool = True) -> Optional[Dict]:
+        """Return a result pointing at an existing image with the same bytes, if there is one
+
+        The existing image must also have the payload's fw_version, model and
+        type; the same bytes uploaded under other attributes are sent again.
+        """
+        store = self._store()
+        config_id = self.api_client.config_id
+        if store.get(digest["sha256"]) is None:
+            return None
+        # Only trust a local hit after confirming the image still exists
+        if refresh:
+            refreshed = self.refresh_image_index()
+            if refreshed.get("status") == "failure":
+                return None
+        existing = store.find_image(digest["sha256"], config_id, image=payload)
+        if existing is None:
+            return None
+        store.record(digest, existing["ota_image_id"], payload["image_name"], config_id, deduplicated=True,
+                     image=payload)
+        return {
+            "status": "success",
+            "description": f"Identical image already uploaded as '{existing['image_name']}', upload skipped",
+            "ota_image_id": existing["ota_image_id"],
+            "deduplicated": True,
+            "firmware_digest": digest
+        }
+
 
     def upload_image(
             self,
@@ -29,18 +113,28 @@ class OTAService:
             type: Optional[str] = None,
             base64_fwimage: Optional[str] = None,
             bin_file_path: Optional[str] = None,
+            force: bool = False,
+            validate: bool = True,
+            chip: Optional[str] = None,
             **kwargs
     ) -> Dict:
-        """Upload a new firmware image (supports base64, file path, or default file)"""
-        endpoint = "/v1/admin/otaimage"
+        """Upload a new firmware image (supports base64, file path, or default file)
+
+        Unless validate is False, the image is parsed as an ESP application
+        image first (magic, chip ID, checksum, appended SHA-256 and optionally
+        the expected chip) and rejected locally if broken; fw_version and
+        model default to the app descriptor's version and project name.
+        Unless force is set, an image whose bytes were already uploaded under
+        the current config with the same fw_version, model and type is not
+        sent again; the existing ota_image_id is returned with deduplicated=True.
+        """
+        endpoint = OTA_IMAGE_ENDPOINT
 
         # Handle firmware input (priority: bin_file > base64 > default file)
-        if bin_file_path:
-            base64_fwimage = self._file_to_base64(bin_file_path)
-        elif not base64_fwimage:
+        if not bin_file_path and not base64_fwimage:
             if os.path.exists(self.default_bin_path):
                 print(f"\nNo firmware provided. Using default file: {self.default_bin_path}")
-                base64_fwimage = self._file_to_base64(self.default_bin_path)
+                bin_file_path = self.default_bin_path
             else:
                 return {
                     "status": "failure",
@@ -49,20 +143,147 @@ class OTAService:
                 }
 
 
-        # Prepare payload
+        # Prepare payload (fw_version/model defaults are applied after validation)
         payload = {
-            "fw_version": fw_version or "1.0.0",
+            "fw_version": fw_version,
             "image_name": image_name,
-            "model": model or "ESP32",
-            "type": type or "development",
-            "base64_fwimage": base64_fwimage
+            "model": model,
+            "type": type or "development"
         }
         payload.update(kwargs)
-        payload = {k: v for k, v in payload.items() if v is not None}
 
+        if bin_file_path:
+            try:
+                firmware = FirmwareFile(bin_file_path)
+            except (OSError, ValueError) as e:
+                raise ValueError(f"Error reading file {bin_file_path}: {str(e)}") from e
+            with firmware:
+                image_info = None
+                if validate:
+                    try:
+                        image_info = self._check_image(firmware.view, payload, chip)
+                    except EspImageError as e:
+                        return self._invalid_image(bin_file_path, e)
+                payload = self._finish_payload(payload)
+                # Deduplication and the cache are keyed by the digest, so it is needed before sending;
+                # only with neither (force, no cache) is it computed while the encoder reads the file
+                digest = firmware.digest() if self.use_cache or not force else None
+                if not force:
+                    duplicate = self._deduplicate(digest, payload)
+                    if duplicate:
+                        return duplicate
+                cache_hit = None
+                if self.use_cache:
+                    body, cache_hit = self._cached_body(firmware, digest, payload, self._image_metadata(image_info))
+                else:
+                    body = Base64JsonBody.from_firmware(firmware, payload)
+                result = self.api_client.post_stream(endpoint, body)
+                digest = digest or firmware.digest()
+            result = self._record_upload(result, digest, payload)
+            if cache_hit is not None and isinstance(result, dict) and result.get("status") != "failure":
+                result["firmware_cache"] = "hit" if cache_hit else "miss"
+            return result
+
+        try:
+            image = base64.b64decode(base64_fwimage, validate=True)
+        except ValueError as e:
+            raise ValueError(f"Invalid base64 firmware image: {str(e)}") from e
+        if validate:
+            try:
+                self._check_image(image, payload, chip)
+            except EspImageError as e:
+                return self._invalid_image("base64 image", e)
+        payload = self._finish_payload(payload)
+        digest = digest_bytes(image)
+        del image
+        if not force:
+            duplicate = self._deduplicate(digest, payload)
+            if duplicate:
+                return duplicate
         # The API client will handle exceptions and return a structured dict
-        return self.api_client.post(endpoint, json=payload)
+        result = self.api_client.post(endpoint, json={**payload, "base64_fwimage": base64_fwimage})
+        return self._record_upload(result, digest, payload)
+
+    @staticmethod
+    def _finish_payload(payload: Dict) -> Dict:
+        payload["fw_version"] = payload.get("fw_version") or "1.0.0"
+        payload["model"] = payload.get("model") or "ESP32"
+        return {k: v for k, v in payload.items() if v is not None}
+
+    @staticmethod
+    def _invalid_image(source: str, error: EspImageError) -> Dict:
+        return {
+            "status": "failure",
+            "description": f"Invalid firmware image ({source}): {error}",
+            "error_code": 400001 # Custom client-side error code
+        }
+
+    @staticmethod
+    def _image_metadata(image_info: Optional[Dict]) -> Dict:
+        if not image_info:
+            return {}
+        app_desc = image_info["app_desc"]
+        return {"chip": image_info["chip"], "version": app_desc["version"],
+                "project_name": app_desc["project_name"], "idf_ver": app_desc["idf_ver"]}
+
+    def inspect_image(self, bin_file_path: str, chip: Optional[str] = None) -> Dict:
+        """Parse and validate a firmware file without uploading it"""
+        try:
+            with FirmwareFile(bin_file_path) as firmware:
+                image_info = parse_esp_image(firmware.view)
+                check_chip(image_info, chip)
+                image_info["firmware_digest"] = firmware.digest()
+        except EspImageError as e:
+            return self._invalid_image(bin_file_path, e)
+        return {"status": "success", "image": image_info}
+
+
+    def prepare_file(self, bin_file_path: str, payload: Dict, validate: bool = True,
+                     chip: Optional[str] = None) -> Dict:
+        """Validate, digest and base64-encode a firmware file into the cache without uploading it.
+
+        Only writes the encoding file, not the cache index, so it can run in
+        worker processes; upload_prepared() sends the result.
+        """
+        cache = self.firmware_cache or FirmwareCache()
+        payload = dict(payload)
+        try:
+            firmware = FirmwareFile(bin_file_path)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Error reading file {bin_file_path}: {str(e)}") from e
+        with firmware:
+            image_info = None
+            if validate:
+                try:
+                    image_info = self._check_image(firmware.view, payload, chip)
+                except EspImageError as e:
+                    return self._invalid_image(bin_file_path, e)
+            digest = firmware.digest()
+            encoding_path = cache.encoding_path(digest["sha256"])
+            encoded = write_encoding(firmware, encoding_path)
+        return {
+            "status": "success",
+            "payload": self._finish_payload(payload),
+            "digest": digest,
+            "source": os.path.abspath(bin_file_path),
+            "metadata": {"file_name": os.path.basename(bin_file_path), **self._image_metadata(image_info)},
+            "encoding_path": str(encoding_path),
+            "encoded": encoded
+        }
 
+    def upload_prepared(self, prepared: Dict, force: bool = False, refresh: bool = True) -> Dict:
+        """Upload an image prepared by prepare_file, streaming its cached encoding"""
+        payload = prepared["payload"]
+        if not force:
+            duplicate = self._deduplicate(prepared["digest"], payload, refresh=refresh)
+            if duplicate:
+                return duplicate
+        body = Base64JsonBody.from_encoded_file(prepared["encoding_path"], payload)
+        result = self.api_client.post_stream(OTA_IMAGE_ENDPOINT, body)
+        result = self._record_upload(result, prepared["digest"], payload)
+        if isinstance(result, dict) and result.get("status") != "failure":
+            result["body_bytes"] = len(body)
+        return result
 
     def get_images(
             self,
@@ -71,7 +292,7 @@ class OTAService:
             contains: bool = False
     ) -> Dict:
         """Get OTA image details"""
-        endpoint = "/v1/admin/otaimage"
+        endpoint = OTA_IMAGE_ENDPOINT
         params = {}
         if ota_image_id:
             params["ota_image_id"] = ota_image_id
@@ -84,7 +305,7 @@ class OTAService:
 
     def delete_image(self, ota_image_id: str) -> Dict:
         """Delete an OTA image"""
-        endpoint = "/v1/admin/otaimage"
+        endpoint = OTA_IMAGE_ENDPOINT
         params = {"ota_image_id": ota_image_id}
         return self.api_client.delete(endpoint, params=params)
 
@@ -94,7 +315,7 @@ class OTAService:
             archive: bool = True
     ) -> Dict:
         """Archive or unarchive an OTA image"""
-        endpoint = "/v1/admin/otaimage"
+        endpoint = OTA_IMAGE_ENDPOINT
         params = {
             "ota_image_id": ota_image_id,
             "archive": "true" if archive else "false"
@@ -1,11 +1,46 @@
 from rainmakertest.utils.api_client import ApiClient
 from typing import Dict, Optional, List, Union
 from datetime import datetime
+from pathlib import Path
+import json
+import os
+import time
+from ..utils.concurrency import DEFAULT_MAX_WORKERS, is_failure, run_concurrent
+from ..utils.paths import get_firmware_dir
+
+# Largest node list sent in one create_job request; longer lists become a job group
+DEFAULT_JOB_CHUNK_SIZE = 1000
+
+# Per-node OTA statuses counted as finished
+SUCCESS_STATES = {"success", "succeeded", "completed", "complete"}
+FAILURE_STATES = {"failed", "failure", "rejected", "timedout", "timeout", "cancelled", "canceled", "error"}
+
+
+def job_progress(status: Dict) -> Dict:
+    """Reduce a get_job_status response to total/succeeded/failed/pending node counts"""
+    node_statuses = status.get("node_status") or status.get("nodes")
+    if isinstance(node_statuses, list) and node_statuses and isinstance(node_statuses[0], dict):
+        succeeded = failed = 0
+        for node in node_statuses:
+            state = str(node.get("status") or node.get("ota_status") or "").lower()
+            if state in SUCCESS_STATES:
+                succeeded += 1
+            elif state in FAILURE_STATES:
+                failed += 1
+        total = max(len(node_statuses), int(status.get("total") or 0))
+    else:
+        total = int(status.get("total") or status.get("total_count") or 0)
+        succeeded = int(status.get("success") or status.get("success_count") or status.get("completed_count") or 0)
+        failed = sum(int(status.get(field) or 0) for field in ("failed", "failed_count", "rejected", "rejected_count"))
+    return {"total": total, "succeeded": succeeded, "failed": failed,
+            "pending": max(total - succeeded - failed, 0)}
 
 
 class OTAJobService:
-    def __init__(self, api_client: ApiClient):
+    def __init__(self, api_client: ApiClient, group_dir: Optional[Path] = None):
         self.api_client = api_client
+        # Where job group handles from chunked create_job calls are kept
+        self.group_dir = Path(group_dir) if group_dir else None
 
     def create_job(
             self,
@@ -20,8 +55,18 @@ class OTAJobService:
             notify: bool = False,
             continuous: bool = False,
             network_serialised: bool = False,
+            chunk_size: int = DEFAULT_JOB_CHUNK_SIZE,
+            max_workers: int = DEFAULT_MAX_WORKERS,
     ) -> Dict:
-        """Create a new OTA job"""
+        """Create a new OTA job
+
+        Node lists longer than chunk_size are split into one job per chunk,
+        named <ota_job_name>-001, -002, ... and created concurrently. The
+        result is then a job group handle (job_group_id, ota_job_ids, jobs,
+        failures) that get_job_group_status() aggregates over; calling again
+        with the same name and nodes only retries the chunks that failed. A
+        name whose group already has jobs for another image is refused.
+        """
         endpoint = "/v1/admin/otajob"
         params = {
             "force_push": "true",
@@ -46,7 +91,128 @@ class OTAJobService:
             else:
                 payload["nodes"] = nodes
 
+        if chunk_size and len(payload.get("nodes") or []) > chunk_size:
+            return self._create_job_group(payload, params, chunk_size, max_workers)
         return self.api_client.post(endpoint, json=payload, params=params)
+
+    def _group_path(self, job_group_id: str) -> Path:
+        group_dir = self.group_dir or get_firmware_dir() / "jobgroups"
+        group_dir.mkdir(parents=True, exist_ok=True)
+        return group_dir / f"{self.api_client.config_id or 'default'}.{job_group_id}.json"
+
+    def load_job_group(self, job_group_id: str) -> Optional[Dict]:
+        """Return a saved job group handle, if there is one"""
+        path = self._group_path(job_group_id)
+        if not path.exists():
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _save_job_group(self, group: Dict) -> None:
+        path = self._group_path(group["job_group_id"])
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(group, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _create_job_group(self, payload: Dict, params: Dict, chunk_size: int, max_workers: int) -> Dict:
+        """Create one job per chunk of the node list and save the group handle"""
+        name = payload["ota_job_name"]
+        nodes = payload["nodes"]
+        chunks = [nodes[start:start + chunk_size] for start in range(0, len(nodes), chunk_size)]
+        jobs = [{"ota_job_name": f"{name}-{index + 1:03d}", "nodes": chunk, "ota_job_id": None}
+                for index, chunk in enumerate(chunks)]
+
+        previous = self.load_job_group(name)
+        if (previous and previous.get("ota_image_id") != payload["ota_image_id"]
+                and any(job.get("ota_job_id") for job in previous["jobs"])):
+            return {
+                "status": "failure",
+                "description": f"Job group '{name}' already belongs to image {previous.get('ota_image_id')}; "
+                               f"use another job name",
+                "error_code": 409
+            }
+        if previous:
+            # Keep the jobs an earlier call already created for identical chunks
+            created = {job["ota_job_name"]: job for job in previous["jobs"] if job.get("ota_job_id")}
+            for job in jobs:
+                earlier = created.get(job["ota_job_name"])
+                if earlier and earlier["nodes"] == job["nodes"]:
+                    job["ota_job_id"] = earlier["ota_job_id"]
+
+        def create(job):
+            response = self.api_client.post("/v1/admin/otajob", json={
+                **payload, "ota_job_name": job["ota_job_name"], "nodes": job["nodes"]}, params=params)
+            if not is_failure(response) and not response.get("ota_job_id"):
+                return {"status": "failure", "description": "No ota_job_id returned"}
+            return response
+
+        pending = [job for job in jobs if not job["ota_job_id"]]
+        batch = run_concurrent(create, pending, max_workers=max_workers, key=lambda job: job["ota_job_name"])
+        by_name = {job["ota_job_name"]: job for job in jobs}
+        for entry in batch.results:
+            by_name[entry["item"]]["ota_job_id"] = entry["result"]["ota_job_id"]
+
+        group = {
+            "job_group_id": name,
+            "ota_image_id": payload["ota_image_id"],
+            "created_at": time.time(),
+            "chunk_size": chunk_size,
+            "jobs": jobs
+        }
+        self._save_job_group(group)
+        return {
+            "status": "success" if not batch.failures else "partial_failure",
+            "job_group_id": name,
+            "ota_job_ids": [job["ota_job_id"] for job in jobs if job["ota_job_id"]],
+            "jobs": [{"ota_job_name": job["ota_job_name"], "ota_job_id": job["ota_job_id"],
+                      "nodes": len(job["nodes"])} for job in jobs],
+            "failures": batch.failures
+        }
+
+    def get_job_group_status(self, job_group_id: str, max_workers: int = DEFAULT_MAX_WORKERS) -> Dict:
+        """Get the status of every job in a job group concurrently, with totals across the group"""
+        group = self.load_job_group(job_group_id)
+        if group is None:
+            return {"status": "failure", "description": f"Job group {job_group_id} not found", "error_code": 404}
+        jobs = [job for job in group["jobs"] if job.get("ota_job_id")]
+        batch = run_concurrent(lambda job: self.get_job_status(job["ota_job_id"]), jobs,
+                               max_workers=max_workers, key=lambda job: job["ota_job_id"])
+        statuses = {entry["item"]: entry["result"] for entry in batch.results}
+        totals = {"total": 0, "succeeded": 0, "failed": 0, "pending": 0}
+        summaries = []
+        for job in group["jobs"]:
+            progress = None
+            if job.get("ota_job_id") in statuses:
+                progress = job_progress(statuses[job["ota_job_id"]])
+                # A job may not list its nodes before devices start; count them as pending
+                progress["total"] = max(progress["total"], len(job["nodes"]))
+                progress["pending"] = progress["total"] - progress["succeeded"] - progress["failed"]
+                for key in totals:
+                    totals[key] += progress[key]
+            summaries.append({"ota_job_name": job["ota_job_name"], "ota_job_id": job.get("ota_job_id"),
+                              "nodes": len(job["nodes"]), "progress": progress})
+        return {
+            "job_group_id": job_group_id,
+            "ota_image_id": group["ota_image_id"],
+            "progress": totals,
+            "jobs": summaries,
+            "not_created": [job["ota_job_name"] for job in group["jobs"] if not job.get("ota_job_id")],
+            "poll_failures": batch.failures
+        }
+
+    def update_job_group(self, job_group_id: str, archive: Optional[bool] = None,
+                         max_workers: int = DEFAULT_MAX_WORKERS) -> Dict:
+        """Cancel or archive every job in a job group"""
+        group = self.load_job_group(job_group_id)
+        if group is None:
+            return {"status": "failure", "description": f"Job group {job_group_id} not found", "error_code": 404}
+        job_ids = [job["ota_job_id"] for job in group["jobs"] if job.get("ota_job_id")]
+        batch = run_concurrent(lambda ota_job_id: self.update_job(ota_job_id, archive), job_ids,
+                               max_workers=max_workers)
+        return {"status": "success" if not batch.failures else "partial_failure",
+                "job_group_id": job_group_id, **batch.summary()}
+
     def get_jobs(
             self,
             ota_job_id: Optional[str] = None,
@@ -0,0 +1,331 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .ota_job_service import OTAJobService, job_progress
+from ..nodes.node_inventory import SLICE_FILTERS, NodeInventory, slice_key
+from ..utils.concurrency import DEFAULT_MAX_WORKERS, is_failure, run_concurrent
+from ..utils.paths import get_firmware_dir
+
+WAVE_PENDING = "pending"
+WAVE_RUNNING = "running"
+WAVE_PASSED = "passed"
+WAVE_HALTED = "halted"
+
+
+def parse_target_query(query: Optional[str]) -> Dict:
+    """Parse a target query such as "model=switch,fw_version=1.0,tag=lab,tag!=beta,online=true".
+
+    Keys accepted by the admin node listing (model, fw_version, node_type,
+    subtype, project_name, status) become inventory filters; tag= and
+    tag!= select on node tags and online= on last known connectivity.
+    """
+    parsed = {"filters": {}, "all_tags": [], "not_tags": [], "online": None}
+    for term in (query or "").split(","):
+        term = term.strip()
+        if not term:
+            continue
+        if "!=" in term:
+            key, value = (part.strip() for part in term.split("!=", 1))
+            if key != "tag":
+                raise ValueError(f"Only tag supports '!=' in target queries, got '{term}'")
+            parsed["not_tags"].append(value)
+            continue
+        if "=" not in term:
+            raise ValueError(f"Invalid target query term '{term}' (expected key=value)")
+        key, value = (part.strip() for part in term.split("=", 1))
+        if key == "tag":
+            parsed["all_tags"].append(value)
+        elif key == "online":
+            parsed["online"] = value.lower() in ("1", "true", "yes")
+        elif key in SLICE_FILTERS:
+            parsed["filters"][key] = value
+        else:
+            raise ValueError(f"Unknown target query key '{key}'")
+    return parsed
+
+
+def select_targets(inventory: NodeInventory, query: Dict, sync: bool = True) -> List[str]:
+    """Return the sorted node IDs of the inventory matching a parsed target query.
+
+    The inventory slice for the query's filters is synced first unless sync
+    is False and the slice has already been synced once.
+    """
+    filters = query["filters"]
+    key = slice_key(filters)
+    if sync or not inventory.slices().get(key, {}).get("complete"):
+        inventory.sync(filters)
+    nodes = inventory.nodes()
+    targets = []
+    for node_id in inventory.members(filters):
+        node = nodes.get(node_id) or {}
+        tags = set(node.get("tags") or [])
+        if not all(tag in tags for tag in query["all_tags"]):
+            continue
+        if any(tag in tags for tag in query["not_tags"]):
+            continue
+        if query["online"] is not None and node.get("online") is not query["online"]:
+            continue
+        targets.append(node_id)
+    return sorted(targets)
+
+
+def plan_waves(node_ids: Iterable[str], percentages: List[float], canary: int = 0, seed: str = "") -> List[List[str]]:
+    """Split nodes into waves covering cumulative percentages of the fleet.
+
+    Nodes are ordered by a hash of seed and node ID, so the same rollout
+    always picks the same canary and wave members while still spreading
+    them across the fleet. An optional canary wave of a fixed number of
+    nodes comes first; waves that would be empty are dropped.
+    """
+    if not percentages or any(not 0 < p <= 100 for p in percentages):
+        raise ValueError("Wave percentages must be in (0, 100]")
+    if any(b <= a for a, b in zip(percentages, percentages[1:])):
+        raise ValueError("Wave percentages must be increasing")
+    order = sorted(set(node_ids), key=lambda node_id: hashlib.sha256(f"{seed}:{node_id}".encode()).hexdigest())
+    bounds = [min(canary, len(order))] if canary else []
+    bounds += [math.ceil(len(order) * p / 100) for p in percentages]
+    waves, start = [], 0
+    for end in bounds:
+        if end > start:
+            waves.append(order[start:end])
+            start = end
+    return waves
+
+
+class RolloutOrchestrator:
+    """Roll an OTA image out in waves, each gated on the health of the previous one.
+
+    One OTA job is created per wave. The jobs of all started waves are
+    polled concurrently; the next wave starts once the current one has
+    finished on min_completion of its nodes with a failure rate of at most
+    max_failure_rate. The rollout halts (optionally cancelling the running
+    job) when a wave can no longer meet the threshold, any earlier wave
+    exceeds it later on, or a wave times out. Progress is saved after each
+    step, so running the same rollout again resumes it.
+    """
+
+    def __init__(
+            self,
+            job_service: OTAJobService,
+            ota_image_id: str,
+            name: str,
+            max_failure_rate: float = 0.05,
+            min_completion: float = 0.9,
+            poll_interval: float = 30,
+            wave_timeout: float = 6 * 3600,
+            cancel_on_halt: bool = False,
+            max_workers: int = DEFAULT_MAX_WORKERS,
+            job_options: Optional[Dict] = None,
+            config_id: Optional[str] = None,
+            state_path: Optional[Path] = None
+    ):
+        self.job_service = job_service
+        self.ota_image_id = ota_image_id
+        self.name = name
+        self.max_failure_rate = max_failure_rate
+        self.min_completion = min_completion
+        self.poll_interval = poll_interval
+        self.wave_timeout = wave_timeout
+        self.cancel_on_halt = cancel_on_halt
+        self.max_workers = max_workers
+        self.job_options = job_options or {}
+        self.state_path = (Path(state_path) if state_path
+                           else get_firmware_dir() / "rollouts" / f"{config_id or 'default'}.{name}.json")
+        self.logger = logging.getLogger(__name__)
+        self.state: Optional[Dict] = None
+
+    def load(self) -> Optional[Dict]:
+        """Return the saved state of this rollout, if it was started before"""
+        if not self.state_path.exists():
+            return None
+        with open(self.state_path, 'r') as f:
+            return json.load(f)
+
+    def _save(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    @staticmethod
+    def _event(on_event: Optional[Callable[[Dict], None]], event: str, **details) -> None:
+        if on_event:
+            on_event({"timestamp": datetime.now(timezone.utc).isoformat(), "event": event, **details})
+
+    def _start_wave(self, index: int, wave: Dict, on_event) -> bool:
+        response = self.job_service.create_job(
+            ota_job_name=f"{self.name}-wave{index + 1}",
+            ota_image_id=self.ota_image_id,
+            nodes=wave["nodes"],
+            **self.job_options
+        )
+        # Large waves come back as a job group with one job per chunk of nodes
+        job_ids = response.get("ota_job_ids") or ([response["ota_job_id"]] if response.get("ota_job_id") else [])
+        if job_ids:
+            wave.update(ota_job_id=response.get("job_group_id") or job_ids[0], ota_job_ids=job_ids)
+        if is_failure(response) or response.get("failures") or not job_ids:
+            error = (response.get("description") or response.get("message")
+                     or "; ".join(f"{f['item']}: {f['error']}" for f in response.get("failures") or [])
+                     or "No ota_job_id returned")
+            wave.update(status=WAVE_HALTED, reason=f"create_job failed: {error}")
+            return False
+        wave.update(status=WAVE_RUNNING, started_at=time.time())
+        self._save()
+        self._event(on_event, "wave_started", wave=index + 1, nodes=len(wave["nodes"]),
+                    ota_job_id=wave["ota_job_id"], jobs=len(job_ids))
+        return True
+
+    def _poll(self, waves: List[Dict]) -> None:
+        """Refresh the progress of every started wave's jobs concurrently"""
+        jobs = [(wave_index, job_id) for wave_index, wave in enumerate(waves) for job_id in wave["ota_job_ids"]]
+        batch = run_concurrent(lambda job: self.job_service.get_job_status(job[1]), jobs,
+                               max_workers=self.max_workers, key=lambda job: job)
+        by_wave: Dict[int, List[Dict]] = {}
+        for entry in batch.results:
+            by_wave.setdefault(entry["item"][0], []).append(job_progress(entry["result"]))
+        for wave_index, wave in enumerate(waves):
+            reports = by_wave.get(wave_index)
+            # Only update a wave when every one of its jobs answered, so totals never go backwards
+            if not reports or len(reports) != len(wave["ota_job_ids"]):
+                continue
+            progress = {key: sum(report[key] for report in reports) for key in ("total", "succeeded", "failed")}
+            # Jobs may report no per-node detail until devices start; fall back to the wave size
+            progress["total"] = max(progress["total"], len(wave["nodes"]))
+            progress["pending"] = progress["total"] - progress["succeeded"] - progress["failed"]
+            wave["progress"] = progress
+        for failure in batch.failures:
+            self.logger.debug(f"Job status poll for {failure['item']} failed: {failure['error']}")
+
+    def _failure_rate(self, progress: Dict) -> float:
+        done = progress["succeeded"] + progress["failed"]
+        return progress["failed"] / done if done else 0.0
+
+    def _gate(self, wave: Dict) -> Optional[str]:
+        """Return "passed", "failed" or None (still undecided) for a wave's current progress"""
+        progress = wave.get("progress")
+        if not progress or not progress["total"]:
+            return None
+        # Fails for certain once more nodes failed than the threshold allows, whatever the rest do
+        if progress["failed"] / progress["total"] > self.max_failure_rate:
+            return "failed"
+        done = progress["succeeded"] + progress["failed"]
+        if done / progress["total"] >= self.min_completion:
+            return "passed" if self._failure_rate(progress) <= self.max_failure_rate else "failed"
+        return None
+
+    def _halt(self, index: int, wave: Dict, reason: str, on_event) -> None:
+        wave.update(status=WAVE_HALTED, reason=reason)
+        self.state["status"] = WAVE_HALTED
+        if self.cancel_on_halt and wave.get("ota_job_ids"):
+            responses = [self.job_service.update_job(job_id) for job_id in wave["ota_job_ids"]]
+            wave["cancelled"] = not any(is_failure(response) for response in responses)
+        self._save()
+        self._event(on_event, "wave_halted", wave=index + 1, reason=reason, progress=wave.get("progress"),
+                    cancelled=wave.get("cancelled", False))
+
+    def run(self, waves: Optional[List[List[str]]] = None,
+            on_event: Optional[Callable[[Dict], None]] = None, restart: bool = False) -> Dict:
+        """Run (or resume) the rollout and return its final state.
+
+        waves is only needed for a new rollout; a saved running rollout
+        continues with the waves it was started with. A finished or halted
+        rollout is only started over with restart=True.
+        """
+        saved = None if restart else self.load()
+        if saved and saved.get("status") != WAVE_RUNNING:
+            finished = "completed" if saved.get("status") == WAVE_PASSED else saved.get("status")
+            raise ValueError(f"Rollout '{self.name}' already {finished}; use a new name or restart it")
+        if saved and saved.get("ota_image_id") != self.ota_image_id:
+            raise ValueError(f"Rollout '{self.name}' is running for image {saved.get('ota_image_id')}")
+        if saved:
+            self.state = saved
+            self._event(on_event, "rollout_resumed", name=self.name,
+                        waves=len(saved["waves"]), nodes=sum(len(w["nodes"]) for w in saved["waves"]))
+        else:
+            if not waves:
+                raise ValueError("No target nodes for the rollout")
+            self.state = {
+                "name": self.name,
+                "ota_image_id": self.ota_image_id,
+                "status": WAVE_RUNNING,
+                "max_failure_rate": self.max_failure_rate,
+                "created_at": time.time(),
+                "waves": [{"nodes": nodes, "status": WAVE_PENDING} for nodes in waves]
+            }
+            self._save()
+            self._event(on_event, "rollout_started", name=self.name, waves=len(waves),
+                        nodes=sum(len(nodes) for nodes in waves))
+
+        waves = self.state["waves"]
+        for wave in waves:
+            # Rollouts saved before waves could span several jobs
+            if wave.get("ota_job_id") and not wave.get("ota_job_ids"):
+                wave["ota_job_ids"] = [wave["ota_job_id"]]
+        for index, wave in enumerate(waves):
+            if wave["status"] == WAVE_PASSED:
+                continue
+            if wave["status"] == WAVE_PENDING and not self._start_wave(index, wave, on_event):
+                self._halt(index, wave, wave["reason"], on_event)
+                break
+
+            started = wave.get("started_at") or time.time()
+            last_progress = None
+            verdict = None
+            while verdict is None:
+                active = [w for w in waves[:index + 1] if w.get("ota_job_ids")]
+                self._poll(active)
+                if wave.get("progress") != last_progress:
+                    last_progress = wave.get("progress")
+                    self._event(on_event, "wave_progress", wave=index + 1, progress=last_progress)
+                # A wave that already passed may still degrade as late results come in
+                degraded = [i for i, w in enumerate(waves[:index]) if w.get("progress")
+                            and w["progress"]["failed"] / w["progress"]["total"] > self.max_failure_rate]
+                if degraded:
+                    verdict = f"wave {degraded[0] + 1} exceeded the failure threshold after passing"
+                    break
+                gate = self._gate(wave)
+                if gate == "passed":
+                    break
+                if gate == "failed":
+                    verdict = (f"failure rate {self._failure_rate(wave['progress']):.1%} "
+                               f"exceeds {self.max_failure_rate:.1%}")
+                elif time.time() - started > self.wave_timeout:
+                    verdict = f"wave did not reach {self.min_completion:.0%} completion within {self.wave_timeout}s"
+                else:
+                    time.sleep(self.poll_interval)
+
+            if verdict:
+                self._halt(index, wave, verdict, on_event)
+                break
+            wave.update(status=WAVE_PASSED, passed_at=time.time())
+            self._save()
+            self._event(on_event, "wave_passed", wave=index + 1, progress=wave["progress"],
+                        failure_rate=round(self._failure_rate(wave["progress"]), 4))
+        else:
+            self.state["status"] = WAVE_PASSED
+            self._save()
+            self._event(on_event, "rollout_complete", name=self.name, waves=len(waves))
+        return self.summary()
+
+    def summary(self) -> Dict:
+        waves = self.state["waves"]
+        return {
+            "name": self.name,
+            "ota_image_id": self.ota_image_id,
+            "status": "complete" if self.state["status"] == WAVE_PASSED else self.state["status"],
+            "waves": [
+                {"wave": i + 1, "nodes": len(w["nodes"]), "status": w["status"], "ota_job_id": w.get("ota_job_id"),
+                 "progress": w.get("progress"), "reason": w.get("reason")}
+                for i, w in enumerate(waves)
+            ],
+            "nodes_targeted": sum(len(w["nodes"]) for w in waves if w.get("ota_job_id")),
+            "state_file": str(self.state_path)
+        }
@@ -0,0 +1,98 @@
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from .ota_image_service import OTAService
+from ..nodes.node_admin_service import NodeAdminService
+from ..nodes.node_inventory import NodeInventory
+from ..utils.concurrency import DEFAULT_MAX_WORKERS, is_failure, run_concurrent
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_image(ota_service: OTAService, ota_image_id: str) -> Dict:
+    """Return the fw_version and model of an OTA image"""
+    response = ota_service.get_images(ota_image_id=ota_image_id)
+    if is_failure(response):
+        raise RuntimeError(response.get("description") or response.get("message") or "Failed to get OTA image")
+    images = [image for image in response.get("ota_images") or [] if image.get("ota_image_id") == ota_image_id]
+    if not images:
+        raise ValueError(f"OTA image {ota_image_id} not found")
+    return {"ota_image_id": ota_image_id, "fw_version": images[0].get("fw_version"), "model": images[0].get("model")}
+
+
+def lookup_versions(admin_service: NodeAdminService, node_ids: Iterable[str],
+                    max_workers: int = DEFAULT_MAX_WORKERS) -> Dict[str, Dict]:
+    """Fetch the current fw_version and model of nodes with concurrent admin lookups"""
+    def lookup(node_id):
+        response = admin_service.get_admin_nodes(node_id=node_id)
+        if isinstance(response, list):
+            if response and is_failure(response[0]):
+                return response[0]
+            response = {"nodes": response}
+        nodes = [node for node in response.get("nodes") or [] if node.get("node_id") == node_id]
+        if not nodes:
+            return {"status": "failure", "description": "Node not found"}
+        return {"fw_version": nodes[0].get("fw_version"), "model": nodes[0].get("model")}
+
+    batch = run_concurrent(lookup, dict.fromkeys(node_ids), max_workers=max_workers)
+    for failure in batch.failures:
+        logger.debug(f"Version lookup for {failure['item']} failed: {failure['error']}")
+    return {entry["item"]: entry["result"] for entry in batch.results}
+
+
+def current_versions(node_ids: List[str], admin_service: NodeAdminService,
+                     inventory: Optional[NodeInventory] = None,
+                     max_workers: int = DEFAULT_MAX_WORKERS) -> Dict[str, Dict]:
+    """Current fw_version/model per node, from the inventory where known and admin lookups otherwise"""
+    versions = {}
+    if inventory is not None:
+        for node_id in node_ids:
+            entry = inventory.get(node_id)
+            if entry is not None:
+                versions[node_id] = {"fw_version": entry.get("fw_version"), "model": entry.get("model")}
+    missing = [node_id for node_id in node_ids if node_id not in versions]
+    if missing:
+        versions.update(lookup_versions(admin_service, missing, max_workers=max_workers))
+    return versions
+
+
+def nodes_needing_update(node_ids: Iterable[str], image: Dict, versions: Dict[str, Dict],
+                         match_model: bool = False) -> Dict:
+    """Split nodes into those that need the image and those excluded.
+
+    Nodes already on the image's fw_version are excluded, and with
+    match_model also nodes reporting a different model (images uploaded
+    without a model carry a generic default, hence opt-in). Nodes whose
+    version could not be determined are kept, so a failed lookup never
+    silently drops a node from a job.
+    """
+    nodes, up_to_date, model_mismatch, unverified = [], [], [], []
+    for node_id in dict.fromkeys(node_ids):
+        current = versions.get(node_id)
+        if current is None:
+            unverified.append(node_id)
+            nodes.append(node_id)
+        elif match_model and image.get("model") and current.get("model") and current["model"] != image["model"]:
+            model_mismatch.append(node_id)
+        elif image.get("fw_version") and current.get("fw_version") == image["fw_version"]:
+            up_to_date.append(node_id)
+        else:
+            nodes.append(node_id)
+    return {
+        "nodes": nodes,
+        "excluded": len(up_to_date) + len(model_mismatch),
+        "up_to_date": up_to_date,
+        "model_mismatch": model_mismatch,
+        "unverified": unverified
+    }
+
+
+def differential_targets(ota_service: OTAService, ota_image_id: str, node_ids: List[str],
+                         admin_service: NodeAdminService, inventory: Optional[NodeInventory] = None,
+                         match_model: bool = False, max_workers: int = DEFAULT_MAX_WORKERS) -> Dict:
+    """Resolve the image and return nodes_needing_update() for node_ids"""
+    image = resolve_image(ota_service, ota_image_id)
+    versions = current_versions(node_ids, admin_service, inventory=inventory, max_workers=max_workers)
+    result = nodes_needing_update(node_ids, image, versions, match_model=match_model)
+    result["image"] = image
+    return result
@@ -0,0 +1,72 @@
+import click
+import csv
+import io
+import json
+import logging
+import time
+from tabulate import tabulate
+from ...nodes.node_admin_service import NodeAdminService
+from ...nodes.node_inventory import NodeInventory
+from ...fleet.fleet_report import FleetColumns, build_report
+
+logger = logging.getLogger(__name__)
+
+def format_section(title: str, rows, output_format: str) -> str:
+    """Render one report section as a table or CSV"""
+    if output_format == 'csv':
+        buffer = io.StringIO()
+        if rows:
+            writer = csv.DictWriter(buffer, fieldnames=[*rows[0].keys()])
+            writer.writeheader()
+            writer.writerows(rows)
+        return f"# {title}\n{buffer.getvalue()}"
+    if not rows:
+        return f"{title}\n(no data)\n"
+    return f"{title}\n{tabulate(rows, headers='keys', tablefmt='simple', disable_numparse=True)}\n"
+
+@click.group()
+def fleet():
+    """Fleet analytics commands"""
+    pass
+
+@fleet.command()
+@click.option('--section', 'sections', multiple=True, type=click.Choice(['fw', 'online', 'tags']),
+              help="Report section to include (repeatable, default: all)")
+@click.option('--format', 'output_format', type=click.Choice(['table', 'csv', 'json']), default='table',
+              help="Output format")
+@click.option('--sync', 'sync_first', is_flag=True, help="Refresh the local node inventory before reporting")
+@click.pass_context
+def report(ctx, sections, output_format, sync_first):
+    """Firmware distribution, online ratio and tag coverage for the fleet"""
+    try:
+        started = time.monotonic()
+        inventory = NodeInventory(NodeAdminService(ctx.obj['api_client']), config_id=ctx.obj.get('config_id'))
+        if sync_first:
+            inventory.sync()
+        elif not len(inventory):
+            raise click.UsageError("The local node inventory is empty; run with --sync or 'node admin sync' first")
+
+        columns = FleetColumns.from_entries(inventory.nodes().values())
+        result = build_report(columns, sections or ('fw', 'online', 'tags'))
+        elapsed = round(time.monotonic() - started, 3)
+
+        if output_format == 'json':
+            click.echo(json.dumps({
+                "status": "success",
+                "response": {"nodes": columns.size, "elapsed_seconds": elapsed, "report": result}
+            }, indent=2))
+            return
+        for title, rows in result.items():
+            click.echo(format_section(title, rows, output_format))
+        if output_format == 'table':
+            click.echo(f"{columns.size} nodes analysed in {elapsed}s")
+    except click.ClickException:
+        raise
+    except Exception as e:
+        logger.error(f"Error building fleet report: {str(e)}")
+        click.echo(json.dumps({
+            "status": "failure",
+            "description": str(e),
+            "error_code": 500
+        }, indent=2))
+        raise click.Abort()
@@ -46,6 +46,7 @@ from ..node.node_cli import node
 from ..email.email_cli import email
 from ..server.server_cli import server
 from ..create.create_cli import create
+from ..fleet.fleet_cli import fleet
 
 @click.group()
 @click.option('--debug', is_flag=True, help="Enable debug logging")
@@ -126,6 +127,7 @@ cli.add_command(node)
 cli.add_command(email)
 cli.add_command(server)
 cli.add_command(create)
+cli.add_command(fleet)
 
 @server.command()
 def reset():
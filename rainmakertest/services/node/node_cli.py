@@ -2,11 +2,24 @@ import click
 from typing import Optional
 import json
 import logging
+import time
 from ...nodes.node_service import NodeService
 from ...nodes.node_admin_service import NodeAdminService
 from ...nodes.node_sharing_service import NodeSharingService
+from ...nodes.node_inventory import NodeInventory
+from ...nodes.tag_index import TagIndex
+from ...nodes.sharing_index import SharingIndex
+from ...nodes.tsdata_cache import DEFAULT_SETTLE_SECONDS, TsDataCache
+from ...nodes.status_watcher import StatusWatcher
+from ...nodes.config_drift import ConfigDriftTracker
+from ...nodes.bulk_update import BulkNodeUpdater, parse_update_rows
+from ...nodes.reconciler import NodeReconciler
+from ...nodes.mapping_pipeline import MappingPipeline, parse_mapping_csv
+from ...nodes.bulk_sharing import BulkSharer, parse_sharing_rows, respond_to_pending
+from ...nodes.challenge_mapping import ChallengeMappingPipeline, FileResponder, load_responder
 from ...utils.api_client import ApiClient
 from json.decoder import JSONDecodeError
+from tabulate import tabulate
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +48,11 @@ def parse_json_input(json_str: Optional[str]) -> Optional[dict]:
         }, indent=2))
         raise click.Abort()
 
+def load_tag_index(ctx) -> Optional[TagIndex]:
+    """Return the local tag index for the active config, if one has been built"""
+    tag_index = TagIndex.for_config(ctx.obj.get('config_id'))
+    return tag_index if tag_index.exists() else None
+
 @click.group()
 def node():
     """Node management commands"""
@@ -48,10 +66,11 @@ def sharing():
 @sharing.command()
 @click.option('--node-id', required=True, help='Node ID to initiate mapping for')
 @click.option('--version', default='v1', help='API version')
-def initiate_mapping(node_id: str, version: str):
+@click.pass_context
+def initiate_mapping(ctx, node_id: str, version: str):
     """Initiate challenge-based node mapping"""
     try:
-        api_client = ApiClient()
+        api_client = ctx.obj['api_client']
         sharing_service = NodeSharingService(api_client)
         result = sharing_service.initiate_mapping(node_id, version)
         click.echo(json.dumps(result, indent=2))
@@ -69,11 +88,12 @@ def initiate_mapping(node_id: str, version: str):
 @click.option('--tags', help='Comma-separated list of tags')
 @click.option('--metadata', help='JSON string of metadata')
 @click.option('--version', default='v1', help='API version')
-def verify_mapping(request_id: str, challenge_response: str, group_id: Optional[str], 
+@click.pass_context
+def verify_mapping(ctx, request_id: str, challenge_response: str, group_id: Optional[str],
                   tags: Optional[str], metadata: Optional[str], version: str):
     """Verify node mapping request"""
     try:
-        api_client = ApiClient()
+        api_client = ctx.obj['api_client']
         sharing_service = NodeSharingService(api_client)
         
         tags_list = tags.split(',') if tags else None
@@ -95,6 +115,70 @@ def verify_mapping(request_id: str, challenge_response: str, group_id: Optional[
         click.echo(f"Error: {str(e)}", err=True)
         raise click.Abort()
 
+@sharing.command()
+@click.option('--nodes', help='Comma-separated list of node IDs')
+@click.option('--nodes-file', type=click.File('r'), help="File with one node ID per line ('-' for stdin)")
+@click.option('--responses', 'responses_file', type=click.Path(dir_okay=False),
+              help='CSV/JSON lines of node_id,challenge_response; re-read as it is filled in')
+@click.option('--responder', 'responder_spec', help="Python callable 'module:function' taking (node_id, challenge)")
+@click.option('--challenges-out', type=click.File('w'), help='Write each challenge as a JSON line once initiated')
+@click.option('--group-id', help='Group ID for all nodes')
+@click.option('--tags', help='Comma-separated list of tags for all nodes')
+@click.option('--metadata', help='JSON string of metadata for all nodes')
+@click.option('--workers', type=int, default=8, help='Concurrent requests')
+@click.option('--rate', type=float, help='Maximum requests per second')
+@click.option('--timeout', type=float, default=300, help='Seconds to wait for challenge responses')
+@click.option('--version', default='v1', help='API version')
+@click.pass_context
+def map_batch(ctx, nodes, nodes_file, responses_file, responder_spec, challenges_out, group_id,
+              tags, metadata, workers, rate, timeout, version):
+    """Initiate and verify challenge-based mapping for many nodes"""
+    try:
+        node_ids = [n.strip() for n in (nodes or "").split(',') if n.strip()]
+        if nodes_file:
+            node_ids += [line.strip() for line in nodes_file if line.strip()]
+        node_ids = [*dict.fromkeys(node_ids)]
+        if not node_ids:
+            raise click.UsageError("Give node IDs with --nodes or --nodes-file")
+        if bool(responses_file) == bool(responder_spec):
+            raise click.UsageError("Give exactly one of --responses or --responder")
+        responder = FileResponder(responses_file) if responses_file else load_responder(responder_spec)
+
+        def write_challenge(node_id, response):
+            challenges_out.write(json.dumps({"node_id": node_id, "request_id": response["request_id"],
+                                             "challenge": response["challenge"]}) + "\n")
+            challenges_out.flush()
+
+        api_client = ctx.obj['api_client']
+        api_client.set_pool_size(max(workers, api_client.pool_size))
+        pipeline = ChallengeMappingPipeline(
+            NodeSharingService(api_client),
+            responder,
+            group_id=group_id,
+            tags=tags.split(',') if tags else None,
+            metadata=parse_json_input(metadata),
+            max_workers=workers,
+            rate=rate,
+            timeout=timeout,
+            on_challenge=write_challenge if challenges_out else None,
+            version=version
+        )
+        summary = pipeline.run(node_ids)
+        status = "success" if summary["verified"] == summary["total"] else "partial_failure"
+        click.echo(json.dumps({"status": status, "response": summary}, indent=2))
+    except click.UsageError:
+        raise
+    except ValueError as e:
+        handle_validation_error(e)
+    except Exception as e:
+        logger.error(f"Error running batch mapping: {str(e)}")
+        click.echo(json.dumps({
+            "status": "failure",
+            "description": str(e),
+            "error_code": 500
+        }, indent=2))
+        raise click.Abort()
+
 @sharing.command()
 @click.option('--nodes', required=True, help='Comma-separated list of node IDs')
 @click.option('--user-name', required=True, help='Username to share with')
@@ -131,6 +215,47 @@ def share(ctx, nodes: str, user_name: str, primary: bool, metadata: Optional[str
         }, indent=2))
         raise click.Abort()
 
+@sharing.command()
+@click.option('--file', 'rows_file', type=click.File('r'), required=True,
+              help="CSV (user_name,nodes,primary) or JSON lines sharing matrix ('-' for stdin)")
+@click.option('--metadata', help='JSON string of metadata sent with every request')
+@click.option('--max-nodes', type=int, default=100, help='Maximum nodes per share request')
+@click.option('--workers', type=int, default=8, help='Concurrent requests')
+@click.option('--rate', type=float, help='Maximum requests per second')
+@click.option('--dry-run', is_flag=True, help='Only print the grouped share requests')
+@click.option('--version', default='v1', help='API version')
+@click.pass_context
+def share_bulk(ctx, rows_file, metadata, max_nodes, workers, rate, dry_run, version):
+    """Share nodes with many users from a sharing matrix file"""
+    try:
+        api_client = ctx.obj['api_client']
+        api_client.set_pool_size(max(workers, api_client.pool_size))
+        sharer = BulkSharer(NodeSharingService(api_client), max_nodes_per_request=max_nodes,
+                            max_workers=workers, rate=rate, metadata=parse_json_input(metadata),
+                            version=version)
+        rows = [row for row in parse_sharing_rows(rows_file)]
+        if dry_run:
+            plan = sharer.plan(rows)
+            click.echo(json.dumps({"status": "success", "response": {"requests": len(plan), "plan": plan}}, indent=2))
+            return
+
+        def progress(done, total):
+            click.echo(f"\rShared {done}/{total} requests", nl=done == total, err=True)
+
+        summary = sharer.run(rows, on_progress=progress)
+        status = "success" if not summary["failed"] else "partial_failure"
+        click.echo(json.dumps({"status": status, "response": summary}, indent=2))
+    except ValueError as e:
+        handle_validation_error(e)
+    except Exception as e:
+        logger.error(f"Error sharing nodes in bulk: {str(e)}")
+        click.echo(json.dumps({
+            "status": "failure",
+            "description": str(e),
+            "error_code": 500
+        }, indent=2))
+        raise click.Abort()
+
 @sharing.command()
 @click.option('--nodes', required=True, help='Comma-separated list of node IDs')
 @click.option('--user-name', required=True, help='Username to transfer to')
@@ -162,17 +287,32 @@ def transfer(ctx, nodes: str, user_name: str, metadata: Optional[str], version:
         raise click.Abort()
 
 @sharing.command()
-@click.option('--request-id', required=True, help='Share request ID')
+@click.option('--request-id', help='Share request ID')
+@click.option('--all', 'respond_all', is_flag=True, help='Respond to every pending sharing request')
+@click.option('--filter-primary-user', help='With --all, only requests from this primary user')
 @click.option('--accept/--decline', required=True, help='Accept or decline the request')
+@click.option('--workers', type=int, default=8, help='Concurrent requests (with --all)')
+@click.option('--rate', type=float, help='Maximum requests per second (with --all)')
 @click.option('--version', default='v1', help='API version')
 @click.pass_context
-def respond(ctx, request_id: str, accept: bool, version: str):
-    """Respond to a node sharing request"""
+def respond(ctx, request_id: Optional[str], respond_all: bool, filter_primary_user: Optional[str],
+            accept: bool, workers: int, rate: Optional[float], version: str):
+    """Respond to a node sharing request, or to all pending requests"""
+    if bool(request_id) == respond_all:
+        raise click.UsageError("Give exactly one of --request-id or --all")
     try:
         # Use the API client from context which has the correct config_id
         api_client = ctx.obj['api_client']
         sharing_service = NodeSharingService(api_client)
-        
+
+        if respond_all:
+            api_client.set_pool_size(max(workers, api_client.pool_size))
+            summary = respond_to_pending(sharing_service, accept, primary_user_name=filter_primary_user,
+                                         max_workers=workers, rate=rate, version=version)
+            status = "success" if not summary["failed"] else "partial_failure"
+            click.echo(json.dumps({"status": status, "response": summary}, indent=2))
+            return
+
         result = sharing_service.respond_to_request(
             request_id=request_id,
             accept=accept,
@@ -267,10 +407,11 @@ def requests(ctx, request_id: Optional[str], primary_user: Optional[str],
 @sharing.command()
 @click.option('--request-id', required=True, help='Request ID to delete')
 @click.option('--version', default='v1', help='API version')
-def delete_request(request_id: str, version: str):
+@click.pass_context
+def delete_request(ctx, request_id: str, version: str):
     """Delete a node sharing request"""
     try:
-        api_client = ApiClient()
+        api_client = ctx.obj['api_client']
         sharing_service = NodeSharingService(api_client)
         
         result = sharing_service.delete_sharing_request(
@@ -285,6 +426,105 @@ def delete_request(request_id: str, version: str):
         click.echo(f"Error: {str(e)}", err=True)
         raise click.Abort()
 
+@sharing.group(name='index')
+def sharing_index_group():
+    """Local user-to-node sharing index"""
+    pass
+
+def load_sharing_index(ctx) -> SharingIndex:
+    """Return the sharing index for the active config, failing if it was never built"""
+    sharing_index = SharingIndex.for_config(ctx.obj.get('config_id'))
+    if not sharing_index.exists():
+        raise click.ClickException("No sharing index yet, run 'rmcli node sharing index build' first")
+    return sharing_index
+
+@sharing_index_group.command(name='build')
+@click.option('--nodes-file', type=click.File('r'), help="File with one node ID per line ('-' for stdin)")
+@click.option('--use-inventory', is_flag=True, help='Index every node in the local admin inventory')
+@click.option('--workers', type=int, default=8, help='Concurrent requests')
+@click.option('--rate', type=float, help='Maximum requests per second')
+@click.pass_context
+def index_build(ctx, nodes_file, use_inventory: bool, workers: int, rate: Optional[float]):
+    """Build the sharing index (default: all nodes of the current user)"""
+    try:
+        api_client = ctx.obj['api_client']
+        api_client.set_pool_size(max(workers, api_client.pool_size))
+        if nodes_file:
+            node_ids = [line.strip() for line in nodes_file if line.strip()]
+        elif use_inventory:
+            inventory = NodeInventory(NodeAdminService(api_client), config_id=ctx.obj.get('config_id'))
+            node_ids = [*inventory.nodes()]
+        else:
+            node_ids = [*dict.fromkeys(ctx.obj['node_service'].iter_user_node_ids())]
+
+        sharing_index = SharingIndex.for_config(ctx.obj.get('config_id'))
+        summary = sharing_index.build(NodeSharingService(api_client), node_ids, max_workers=workers, rate=rate)
+        status = "success" if not summary["failed"] else "partial_failure"
+        click.echo(json.dumps({"status": status, "response": summary}, indent=2))
+    except click.Abort:
+        raise
+    except Exception as e:
+        logger.error(f"Error building sharing index: {str(e)}")
+        click.echo(json.dumps({
+            "status": "failure",
+            "description": str(e),
+            "error_code": 500
+        }, indent=2))
+        raise click.Abort()
+
+@sharing_index_group.command(name='refresh')
+@click.option('--node-id', 'node_ids', multiple=True, help='Node to refresh (repeatable)')
+@click.option('--user-name', 'user_names', multiple=True, help='User to refresh through the admin API (repeatable)')
+@click.pass_context
+def index_refresh(ctx, node_ids, user_names):
+    """Refresh single nodes or users in the sharing index"""
+    if not node_ids and not user_names:
+        raise click.UsageError("Give at least one --node-id or --user-name")
+    try:
+        api_client = ctx.obj['api_client']
+        sharing_index = load_sharing_index(ctx)
+        sharing_service = NodeSharingService(api_client)
+        admin_service = NodeAdminService(api_client)
+        result = {
+            "nodes": {node_id: sharing_index.refresh_node(sharing_service, node_id) for node_id in node_ids},
+            "users": {user_name: sharing_index.refresh_user(admin_service, user_name) for user_name in user_names}
+        }
+        click.echo(json.dumps({"status": "success", "response": result}, indent=2))
+    except click.ClickException:
+        raise
+    except Exception as e:
+        logger.error(f"Error refreshing sharing index: {str(e)}")
+        click.echo(json.dumps({
+            "status": "failure",
+            "description": str(e),
+            "error_code": 500
+        }, indent=2))
+        raise click.Abort()
+
+@sharing_index_group.command(name='query')
+@click.option('--node-id', help='List the users that can reach this node')
+@click.option('--user-name', help='List the nodes this user can reach')
+@click.pass_context
+def index_query(ctx, node_id: Optional[str], user_name: Optional[str]):
+    """Answer who-has-access queries from the sharing index"""
+    if bool(node_id) == bool(user_name):
+        raise click.UsageError("Give exactly one of --node-id or --user-name")
+    sharing_index = load_sharing_index(ctx)
+    if node_id:
+        result = {"node_id": node_id, "users": sharing_index.users_of(node_id)}
+    else:
+        result = {"user_name": user_name, "nodes": sharing_index.nodes_of(user_name)}
+    click.echo(json.dumps({"status": "success", "response": result}, indent=2))
+
+@sharing_index_group.command(name='audit')
+@click.option('--max-users', type=int, help='Flag nodes shared with more users than this')
+@click.pass_context
+def index_audit(ctx, max_users: Optional[int]):
+    """Report sharing anomalies found in the sharing index"""
+    sharing_index = load_sharing_index(ctx)
+    result = {"stats": sharing_index.stats(), **sharing_index.audit(max_users=max_users)}
+    click.echo(json.dumps({"status": "success", "response": result}, indent=2))
+
 @node.group()
 def admin():
     """Admin node operations"""
@@ -335,11 +575,12 @@ def list_nodes(node_id: Optional[str], node_type: Optional[str], model: Optional
 @click.option('--metadata', help='JSON string of metadata')
 @click.option('--tags', help='Comma-separated list of tags')
 @click.option('--version', default='v1', help='API version')
-def update_node(node_id: str, metadata: Optional[str], tags: Optional[str], version: str):
+@click.pass_context
+def update_node(ctx, node_id: str, metadata: Optional[str], tags: Optional[str], version: str):
     """Update admin node metadata or tags"""
     try:
-        api_client = ApiClient()
-        admin_service = NodeAdminService(api_client)
+        api_client = ctx.obj['api_client']
+        admin_service = NodeAdminService(api_client, tag_index=load_tag_index(ctx))
         
         metadata_dict = parse_json_input(metadata)
         tags_list = tags.split(',') if tags else None
@@ -362,11 +603,12 @@ def update_node(node_id: str, metadata: Optional[str], tags: Optional[str], vers
 @click.option('--node-id', required=True, help='Node ID')
 @click.option('--tags', required=True, help='Comma-separated list of tags to remove')
 @click.option('--version', default='v1', help='API version')
-def remove_tags(node_id: str, tags: str, version: str):
+@click.pass_context
+def remove_tags(ctx, node_id: str, tags: str, version: str):
     """Remove tags from an admin node"""
     try:
-        api_client = ApiClient()
-        admin_service = NodeAdminService(api_client)
+        api_client = ctx.obj['api_client']
+        admin_service = NodeAdminService(api_client, tag_index=load_tag_index(ctx))
         
         tags_list = tags.split(',')
         
@@ -417,6 +659,107 @@ def list_user_nodes(user_name: Optional[str], version: str):
         click.echo(f"Error: {str(e)}", err=True)
         raise click.Abort()
 
+@admin.command()
+@click.option('--node-type', help='Only refresh nodes of this type')
+@click.option('--model', help='Only refresh nodes of this model')
+@click.option('--fw-version', help='Only refresh nodes on this firmware version')
+@click.option('--subtype', help='Only refresh nodes of this subtype')
+@click.option('--project-name', help='Only refresh nodes of this project')
+@click.option('--status', help='Only refresh nodes with this status (e.g. online)')
+@click.option('--page-size', type=int, default=500, help='Nodes fetched per request')
+@click.option('--max-pages', type=int, help='Stop after this many pages (resume later)')
+@click.option('--restart', is_flag=True, help='Ignore the saved cursor and rescan the slice')
+@click.pass_context
+def sync(ctx, node_type: Optional[str], model: Optional[str], fw_version: Optional[str],
+         subtype: Optional[str], project_name: Optional[str], status: Optional[str],
+         page_size: int, max_pages: Optional[int], restart: bool):
+    """Incrementally refresh the local admin node inventory"""
+    try:
+        admin_service = NodeAdminService(ctx.obj['api_client'])
+        inventory = NodeInventory(admin_service, config_id=ctx.obj.get('config_id'))
+
+        result = inventory.sync(
+            filters={
+                "node_type": node_type,
+                "model": model,
+                "fw_version": fw_version,
+                "subtype": subtype,
+                "project_name": project_name,
+                "status": status
+            },
+            page_size=page_size,
+            max_pages=max_pages,
+            restart=restart
+        )
+        result["inventory_size"] = len(inventory)
+
+        tag_index = load_tag_index(ctx)
+        if tag_index is not None:
+            tag_index.rebuild((node_id, entry.get("tags")) for node_id, entry in inventory.nodes().items())
+            tag_index.save()
+            result["tag_index_rebuilt"] = True
+        click.echo(json.dumps({"status": "success", "response": result}, indent=2))
+    except ValueError as e:
+        handle_validation_error(e)
+    except Exception as e:
+        logger.error(f"Error syncing node inventory: {str(e)}")
+        click.echo(json.dumps({
+            "status": "failure",
+            "description": str(e),
+            "error_code": 500
+        }, indent=2))
+        raise click.Abort()
+
+@admin.command()
+@click.option('--tag', 'tags', multiple=True, help='Node must carry this tag (repeatable)')
+@click.option('--any-tag', 'any_tags', multiple=True, help='Node must carry at least one of these tags (repeatable)')
+@click.option('--not-tag', 'not_tags', multiple=True, help='Node must not carry this tag (repeatable)')
+@click.option('--rebuild', is_flag=True, help='Rebuild the tag index from the local inventory first')
+@click.option('--count', is_flag=True, help='Only print the number of matching nodes')
+@click.pass_context
+def find(ctx, tags, any_tags, not_tags, rebuild: bool, count: bool):
+    """Find admin nodes by tag using the local tag index"""
+    try:
+        config_id = ctx.obj.get('config_id')
+        tag_index = TagIndex.for_config(config_id)
+        if rebuild or not tag_index.exists():
+            inventory = NodeInventory(NodeAdminService(ctx.obj['api_client']), config_id=config_id)
+            if not len(inventory):
+                inventory.sync()
+            tag_index.rebuild((node_id, entry.get("tags")) for node_id, entry in inventory.nodes().items())
+            tag_index.save()
+
+        matches = tag_index.query(all_tags=tags, any_tags=any_tags, not_tags=not_tags)
+        response = {"count": len(matches)}
+        if not count:
+            response["nodes"] = sorted(matches)
+        click.echo(json.dumps({"status": "success", "response": response}, indent=2))
+    except Exception as e:
+        logger.error(f"Error querying tag index: {str(e)}")
+        click.echo(json.dumps({
+            "status": "failure",
+            "description": str(e),
+            "error_code": 500
+        }, indent=2))
+        raise click.Abort()
+
+@admin.command()
+@click.option('--since', type=int, default=0, help='Only show changes after this sequence number')
+@click.option('--event', 'events', multiple=True,
+              type=click.Choice(['added', 'removed', 'fw_changed', 'tags_changed']),
+              help='Only show this event type (repeatable)')
+@click.pass_context
+def changes(ctx, since: int, events):
+    """Print inventory change events as NDJSON"""
+    try:
+        inventory = NodeInventory(NodeAdminService(ctx.obj['api_client']), config_id=ctx.obj.get('config_id'))
+        for entry in inventory.changes_since(since, events=[e for e in events] or None):
+            click.echo(json.dumps(entry))
+    except Exception as e:
+        logger.error(f"Error reading inventory changes: {str(e)}")
+        click.echo(f"Error: {str(e)}", err=True)
+        raise click.Abort()
+
 # Basic node commands
 @node.command()
 @click.pass_context
@@ -449,11 +792,13 @@ def status(ctx, node_id):
             "error_code": 500
         }, indent=2))
 
-@node.command()
+@node.group(invoke_without_command=True)
 @click.option('--node-id', help="Node ID to get configuration")
 @click.pass_context
 def config(ctx, node_id):
     """Get node configuration"""
+    if ctx.invoked_subcommand is not None:
+        return
     node_service = ctx.obj['node_service']
     try:
         result = node_service.get_node_config(node_id)
@@ -471,6 +816,42 @@ def config(ctx, node_id):
         }
         click.echo(json.dumps(output, indent=2))
 
+@config.command(name='diff')
+@click.option('--node-ids-file', type=click.File('r'), help="File with one node ID per line ('-' for stdin)")
+@click.option('--node-id', 'node_ids', multiple=True, help="Node ID to check (repeatable, default: all user nodes)")
+@click.option('--workers', type=int, default=8, help="Concurrent requests")
+@click.option('--rate', type=float, help="Maximum requests per second")
+@click.option('--max-paths', type=int, default=50, help="Maximum changed paths reported per node")
+@click.option('--no-update', is_flag=True, help="Report drift without storing the fetched configs as the new baseline")
+@click.pass_context
+def config_diff(ctx, node_ids_file, node_ids, workers, rate, max_paths, no_update):
+    """Report nodes whose config changed since the last run"""
+    try:
+        node_service = ctx.obj['node_service']
+        node_ids = [*node_ids]
+        if node_ids_file:
+            node_ids += [line.strip() for line in node_ids_file if line.strip()]
+        if not node_ids:
+            node_ids = [*dict.fromkeys(node_service.iter_user_node_ids())]
+
+        api_client = ctx.obj['api_client']
+        api_client.set_pool_size(max(workers, api_client.pool_size))
+        tracker = ConfigDriftTracker(node_service, config_id=ctx.obj.get('config_id'), max_workers=workers,
+                                     rate=rate, max_diff_paths=max_paths)
+        report = tracker.check(node_ids, update=not no_update)
+        status = "success" if not report["failures"] else "partial_failure"
+        click.echo(json.dumps({"status": status, "response": report}, indent=2))
+    except click.Abort:
+        raise
+    except Exception as e:
+        logger.error(f"Error checking config drift: {str(e)}")
+        click.echo(json.dumps({
+            "status": "failure",
+            "description": str(e),
+            "error_code": 500
+        }, indent=2))
+        raise click.Abort()
+
 @node.command()
 @click.option('--node-id', required=True, help="Node ID to update")
 @click.option('--tags', required=True, help="Comma-separated tags to add/update")
@@ -497,13 +878,100 @@ def update(ctx, node_id, tags):
         click.echo(json.dumps(output, indent=2))
 
 @node.command()
-@click.option('--node-id', required=True, help="Node ID to map")
-@click.option('--secret-key', required=True, help="Secret key for mapping")
+@click.option('--file', 'rows_file', type=click.File('r'), required=True,
+              help="JSON lines or CSV of node_id, tags, metadata rows ('-' for stdin)")
+@click.option('--format', 'rows_format', type=click.Choice(['jsonl', 'csv']), help="Input format (default: detect)")
+@click.option('--admin', 'use_admin', is_flag=True, help="Update through the admin node API")
+@click.option('--use-inventory', is_flag=True, help="Compare against the local admin inventory instead of fetching")
+@click.option('--workers', type=int, default=8, help="Concurrent requests")
+@click.option('--rate', type=float, help="Maximum requests per second")
+@click.option('--dry-run', is_flag=True, help="Only report which nodes would be written")
+@click.pass_context
+def bulk_update(ctx, rows_file, rows_format, use_admin, use_inventory, workers, rate, dry_run):
+    """Apply tags/metadata to many nodes concurrently, skipping no-op writes"""
+    try:
+        api_client = ctx.obj['api_client']
+        api_client.set_pool_size(max(workers, api_client.pool_size))
+        rows = [row for row in parse_update_rows(rows_file, rows_format)]
+
+        if use_admin:
+            admin_service = NodeAdminService(api_client, tag_index=load_tag_index(ctx))
+            inventory = NodeInventory(admin_service, config_id=ctx.obj.get('config_id')) if use_inventory else None
+            updater = BulkNodeUpdater(admin_service=admin_service, inventory=inventory,
+                                      max_workers=workers, rate=rate, dry_run=dry_run)
+        else:
+            updater = BulkNodeUpdater(node_service=ctx.obj['node_service'],
+                                      max_workers=workers, rate=rate, dry_run=dry_run)
+
+        summary = updater.run(rows)
+        status = "success" if not summary["failed"] else "partial_failure"
+        click.echo(json.dumps({"status": status, "response": summary}, indent=2))
+    except ValueError as e:
+        handle_validation_error(e)
+    except Exception as e:
+        logger.error(f"Error running bulk update: {str(e)}")
+        click.echo(json.dumps({
+            "status": "failure",
+            "description": str(e),
+            "error_code": 500
+        }, indent=2))
+        raise click.Abort()
+
+@node.command()
+@click.option('--desired', 'desired_file', type=click.File('r'), required=True,
+              help="JSON lines or CSV of desired node_id, tags, metadata ('-' for stdin)")
+@click.option('--use-inventory', is_flag=True, help="Take current state from the local admin inventory")
+@click.option('--workers', type=int, default=8, help="Concurrent requests")
+@click.option('--rate', type=float, help="Maximum requests per second")
+@click.option('--dry-run', is_flag=True, help="Print the plan and estimated request count without writing")
+@click.pass_context
+def reconcile(ctx, desired_file, use_inventory, workers, rate, dry_run):
+    """Bring admin node tags/metadata in line with a desired-state file"""
+    try:
+        api_client = ctx.obj['api_client']
+        api_client.set_pool_size(max(workers, api_client.pool_size))
+        admin_service = NodeAdminService(api_client, tag_index=load_tag_index(ctx))
+        inventory = NodeInventory(admin_service, config_id=ctx.obj.get('config_id')) if use_inventory else None
+        reconciler = NodeReconciler(admin_service, inventory=inventory, max_workers=workers, rate=rate)
+
+        plan = reconciler.plan(parse_update_rows(desired_file))
+        if dry_run:
+            click.echo(json.dumps({"status": "success", "response": {"plan": plan}}, indent=2))
+            return
+
+        summary = reconciler.apply(plan)
+        summary["plan"] = {k: v for k, v in plan.items() if k != "nodes"}
+        status = "success" if not summary["failed"] and not plan["read_failures"] else "partial_failure"
+        click.echo(json.dumps({"status": status, "response": summary}, indent=2))
+    except ValueError as e:
+        handle_validation_error(e)
+    except Exception as e:
+        logger.error(f"Error reconciling nodes: {str(e)}")
+        click.echo(json.dumps({
+            "status": "failure",
+            "description": str(e),
+            "error_code": 500
+        }, indent=2))
+        raise click.Abort()
+
+@node.command()
+@click.option('--node-id', help="Node ID to map")
+@click.option('--secret-key', help="Secret key for mapping")
 @click.option('--unmap', is_flag=True, help="Unmap instead of map")
+@click.option('--from-csv', 'csv_file', type=click.File('r'),
+              help="CSV of node_id,secret_key rows to map in bulk ('-' for stdin)")
+@click.option('--workers', type=int, default=8, help="Concurrent requests (with --from-csv)")
+@click.option('--rate', type=float, help="Maximum requests per second (with --from-csv)")
+@click.option('--timeout', type=float, default=300, help="Seconds to wait for confirmations (with --from-csv)")
 @click.pass_context
-def map(ctx, node_id, secret_key, unmap):
-    """Map or unmap a node"""
+def map(ctx, node_id, secret_key, unmap, csv_file, workers, rate, timeout):
+    """Map or unmap a node, or a batch of nodes from a CSV"""
     node_service = ctx.obj['node_service']
+    if csv_file:
+        map_from_csv(ctx, csv_file, "unmap" if unmap else "map", workers, rate, timeout)
+        return
+    if not node_id or not secret_key:
+        raise click.UsageError("--node-id and --secret-key are required unless --from-csv is given")
     try:
         result = node_service.map_user_node(node_id, secret_key, "unmap" if unmap else "map")
         output = {
@@ -520,6 +988,33 @@ def map(ctx, node_id, secret_key, unmap):
         }
         click.echo(json.dumps(output, indent=2))
 
+def map_from_csv(ctx, csv_file, operation, workers, rate, timeout):
+    """Run the bulk mapping pipeline and print a result table"""
+    try:
+        api_client = ctx.obj['api_client']
+        api_client.set_pool_size(max(workers, api_client.pool_size))
+        rows = [row for row in parse_mapping_csv(csv_file)]
+        pipeline = MappingPipeline(ctx.obj['node_service'], max_workers=workers, rate=rate,
+                                   timeout=timeout, operation=operation)
+        summary = pipeline.run(rows)
+
+        table = [[r["node_id"], r["request_id"] or "-", r["status"], r["detail"] or ""] for r in summary["results"]]
+        click.echo(tabulate(table, headers=["Node ID", "Request ID", "Status", "Detail"]))
+        click.echo(
+            f"\n{summary['confirmed']} confirmed, {summary['timed_out']} timed out, {summary['failed']} failed "
+            f"of {summary['total']} in {summary['elapsed_seconds']}s ({summary['mappings_per_second']} mappings/s)"
+        )
+    except ValueError as e:
+        handle_validation_error(e)
+    except Exception as e:
+        logger.error(f"Error mapping nodes: {str(e)}")
+        click.echo(json.dumps({
+            "status": "failure",
+            "description": str(e),
+            "error_code": 500
+        }, indent=2))
+        raise click.Abort()
+
 @node.command()
 @click.option('--request-id', required=True, help="Request ID from the map operation")
 @click.pass_context
@@ -556,4 +1051,150 @@ def delete_tags(ctx, node_id, tags):
             "response": None,
             "error": str(e)
         }
-        click.echo(json.dumps(output, indent=2)) 
\ No newline at end of file
+        click.echo(json.dumps(output, indent=2)) 
+
+
+@node.group(name='params')
+def node_params():
+    """Node parameter operations"""
+    pass
+
+@node_params.command(name='get')
+@click.option('--node-id', required=True, help="Node ID to read params from")
+@click.pass_context
+def params_get(ctx, node_id):
+    """Get the current params of a node"""
+    try:
+        result = ctx.obj['node_service'].get_node_params(node_id)
+        click.echo(json.dumps(result, indent=2))
+    except Exception as e:
+        logger.error(f"Error getting node params: {str(e)}")
+        click.echo(f"Error: {str(e)}", err=True)
+        raise click.Abort()
+
+@node_params.command(name='set')
+@click.option('--node-id', help="Node ID to set params on")
+@click.option('--nodes', help="Comma-separated node IDs that all get the same --data")
+@click.option('--data', help='JSON params payload, e.g. \'{"Light": {"Power": true}}\'')
+@click.option('--file', 'updates_file', type=click.File('r'),
+              help="JSON lines of {\"node_id\": ..., \"payload\": {...}} ('-' for stdin)")
+@click.option('--batch-size', type=int, default=25, help="Nodes per multi-node request")
+@click.option('--workers', type=int, default=8, help="Concurrent requests")
+@click.option('--compress', is_flag=True, help="Gzip large request bodies (only if the server accepts gzip)")
+@click.pass_context
+def params_set(ctx, node_id, nodes, data, updates_file, batch_size, workers, compress):
+    """Set params on one node, or on many nodes in batched requests"""
+    if sum(1 for given in (node_id, nodes, updates_file) if given) != 1:
+        raise click.UsageError("Give exactly one of --node-id, --nodes or --file")
+    if (node_id or nodes) and not data:
+        raise click.UsageError("--data is required with --node-id and --nodes")
+    try:
+        node_service = ctx.obj['node_service']
+        payload = parse_json_input(data)
+        if compress:
+            ctx.obj['api_client'].enable_compression("/v1/user/nodes/params")
+        if node_id:
+            click.echo(json.dumps(node_service.set_node_params(node_id, payload), indent=2))
+            return
+
+        if nodes:
+            updates = [{"node_id": n.strip(), "payload": payload} for n in nodes.split(',') if n.strip()]
+        else:
+            updates = []
+            for line_number, line in enumerate(updates_file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    update = json.loads(line)
+                except JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+                if not update.get("node_id") or not isinstance(update.get("payload"), dict):
+                    raise ValueError(f"Expected node_id and payload object on line {line_number}")
+                updates.append({"node_id": update["node_id"], "payload": update["payload"]})
+
+        api_client = ctx.obj['api_client']
+        api_client.set_pool_size(max(workers, api_client.pool_size))
+        result = node_service.set_multi_node_params(updates, batch_size=batch_size, max_workers=workers)
+        if compress:
+            result["transfer"] = api_client.metrics.summary()
+        status = "success" if not result["failed_nodes"] else "partial_failure"
+        click.echo(json.dumps({"status": status, "response": result}, indent=2))
+    except ValueError as e:
+        handle_validation_error(e)
+    except Exception as e:
+        logger.error(f"Error setting node params: {str(e)}")
+        click.echo(json.dumps({
+            "status": "failure",
+            "description": str(e),
+            "error_code": 500
+        }, indent=2))
+        raise click.Abort()
+
+@node.command()
+@click.option('--node-id', required=True, help="Node ID")
+@click.option('--param', 'param_name', required=True, help="Param name, e.g. Temperature.Temperature")
+@click.option('--type', 'data_type', type=click.Choice(['float', 'int', 'bool']), default='float',
+              help="Param data type")
+@click.option('--start', 'start_time', type=int, help="Range start (epoch seconds, default: 24h before --end)")
+@click.option('--end', 'end_time', type=int, help="Range end (epoch seconds, default: now)")
+@click.option('--bucket', type=int, default=3600, help="Aggregation bucket in seconds")
+@click.option('--raw', is_flag=True, help="Print the cached points instead of aggregates")
+@click.option('--page-size', type=int, default=200, help="Records fetched per request")
+@click.option('--settle', 'settle_seconds', type=int, default=DEFAULT_SETTLE_SECONDS,
+              help="Recent seconds re-fetched on the next run since late points may still arrive")
+@click.pass_context
+def tsdata(ctx, node_id, param_name, data_type, start_time, end_time, bucket, raw, page_size, settle_seconds):
+    """Fetch param time-series into the local cache and aggregate it"""
+    try:
+        end_time = end_time or int(time.time())
+        start_time = start_time if start_time is not None else end_time - 86400
+        if start_time > end_time:
+            raise ValueError("--start must not be after --end")
+        cache = TsDataCache(ctx.obj['node_service'], node_id, param_name, data_type=data_type,
+                            config_id=ctx.obj.get('config_id'), settle_seconds=settle_seconds)
+        fetched = cache.fetch(start_time, end_time, page_size=page_size)
+        if raw:
+            response = {"fetch": fetched, "points": cache.points(start_time, end_time)}
+        else:
+            response = {"fetch": fetched, "buckets": cache.aggregate(start_time, end_time, bucket)}
+        click.echo(json.dumps({"status": "success", "response": response}, indent=2))
+    except ValueError as e:
+        handle_validation_error(e)
+    except Exception as e:
+        logger.error(f"Error fetching time-series data: {str(e)}")
+        click.echo(json.dumps({
+            "status": "failure",
+            "description": str(e),
+            "error_code": 500
+        }, indent=2))
+        raise click.Abort()
+
+@node.command()
+@click.option('--node-ids-file', type=click.File('r'), help="File with one node ID per line ('-' for stdin)")
+@click.option('--node-id', 'node_ids', multiple=True, help="Node ID to watch (repeatable)")
+@click.option('--budget', type=float, default=5, help="Maximum status requests per second across all nodes")
+@click.option('--fast', 'fast_interval', type=float, default=5, help="Poll interval (s) right after a node changes")
+@click.option('--slow', 'slow_interval', type=float, default=120, help="Longest poll interval (s) for stable nodes")
+@click.option('--duration', type=float, help="Stop after this many seconds (default: until interrupted)")
+@click.option('--emit-initial', is_flag=True, help="Also emit an event with each node's first known state")
+@click.pass_context
+def watch(ctx, node_ids_file, node_ids, budget, fast_interval, slow_interval, duration, emit_initial):
+    """Watch node connectivity and print online/offline transitions as JSON lines"""
+    node_ids = [*node_ids]
+    if node_ids_file:
+        node_ids += [line.strip() for line in node_ids_file if line.strip()]
+    if not node_ids:
+        raise click.UsageError("Give node IDs with --node-id or --node-ids-file")
+
+    def emit(event):
+        click.echo(json.dumps(event))
+        # Flush per event so the stream can be piped into other tools live
+        click.get_text_stream('stdout').flush()
+
+    watcher = StatusWatcher(ctx.obj['node_service'], budget=budget, fast_interval=fast_interval,
+                            slow_interval=slow_interval, emit_initial=emit_initial)
+    try:
+        summary = watcher.watch(node_ids, emit, duration=duration)
+        click.echo(json.dumps(summary), err=True)
+    except KeyboardInterrupt:
+        click.echo(json.dumps({"polls": watcher.polls, "interrupted": True}), err=True)
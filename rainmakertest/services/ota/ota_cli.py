@@ -1,11 +1,17 @@
 import click
 from typing import Optional
 from ...utils.api_client import ApiClient
-from ...ota.ota_image_service import OTAService
-from ...ota.ota_job_service import OTAJobService
+from ...ota.ota_image_service import OTA_IMAGE_ENDPOINT, OTAService
+from ...ota.firmware_cache import FirmwareCache
+from ...ota.bulk_upload import BulkImageUploader, load_manifest
+from ...ota.ota_job_service import DEFAULT_JOB_CHUNK_SIZE, OTAJobService
+from ...ota.rollout import RolloutOrchestrator, parse_target_query, plan_waves, select_targets
+from ...ota.targeting import differential_targets
+from ...nodes.node_admin_service import NodeAdminService
+from ...nodes.node_inventory import NodeInventory
 from tabulate import tabulate
-import base64
 import json
+import os
 
 @click.group()
 @click.pass_context
@@ -25,10 +31,18 @@ def image():
 @click.option('--version', help="Firmware version")
 @click.option('--model', help="Device model")
 @click.option('--type', help="Device type")
+@click.option('--force', is_flag=True, help="Upload even if identical bytes were already uploaded")
+@click.option('--no-cache', is_flag=True, help="Encode the file directly instead of using the local firmware cache")
+@click.option('--chip', help="Reject the image unless it is built for this chip (e.g. ESP32-C3)")
+@click.option('--skip-validation', is_flag=True, help="Upload without checking the ESP image header")
+@click.option('--compress', is_flag=True, help="Gzip the request body (only if the server accepts gzip uploads)")
 @click.pass_context
-def upload(ctx, base64_str, file, name, version, model, type):
+def upload(ctx, base64_str, file, name, version, model, type, force, no_cache, chip, skip_validation, compress):
     """Upload a new OTA image"""
     ota_service = ctx.obj['ota_image_service']
+    ota_service.use_cache = not no_cache
+    if compress:
+        ota_service.api_client.enable_compression(OTA_IMAGE_ENDPOINT)
     
     try:
         # Handle base64 input
@@ -40,12 +54,11 @@ def upload(ctx, base64_str, file, name, version, model, type):
             bin_file_path = file
             base64_fwimage = None
         else:
-            # Try to use default switch.bin
-            try:
-                with open('switch.bin', 'rb') as f:
-                    base64_fwimage = base64.b64encode(f.read()).decode('utf-8')
-                bin_file_path = None
-            except FileNotFoundError:
+            # Try to use default switch.bin (streamed by the service like --file)
+            if os.path.exists('switch.bin'):
+                bin_file_path = 'switch.bin'
+                base64_fwimage = None
+            else:
                 output = {
                     "status": "error",
                     "response": None,
@@ -60,13 +73,60 @@ def upload(ctx, base64_str, file, name, version, model, type):
             model=model,
             type=type,
             base64_fwimage=base64_fwimage,
-            bin_file_path=bin_file_path
+            bin_file_path=bin_file_path,
+            force=force,
+            validate=not skip_validation,
+            chip=chip
         )
         output = {
             "status": "success",
             "response": result,
             "error": None
         }
+        if compress:
+            output["transfer"] = ota_service.api_client.metrics.summary()
+        click.echo(json.dumps(output, indent=2))
+    except Exception as e:
+        output = {
+            "status": "error",
+            "response": None,
+            "error": str(e)
+        }
+        click.echo(json.dumps(output, indent=2))
+
+@image.command(name='upload-many')
+@click.option('--manifest', type=click.Path(exists=True), required=True,
+              help='JSON list of images: {"file", "name", "version", "model", "type", "chip"}')
+@click.option('--processes', type=int, help="Worker processes for validation and encoding (default: CPU count)")
+@click.option('--workers', type=int, default=4, help="Concurrent uploads")
+@click.option('--force', is_flag=True, help="Upload even if identical bytes were already uploaded")
+@click.option('--skip-validation', is_flag=True, help="Upload without checking the ESP image headers")
+@click.option('--compress', is_flag=True, help="Gzip the request bodies (only if the server accepts gzip uploads)")
+@click.pass_context
+def upload_many(ctx, manifest, processes, workers, force, skip_validation, compress):
+    """Upload several OTA images listed in a manifest"""
+    ota_service = ctx.obj['ota_image_service']
+    try:
+        entries = load_manifest(manifest)
+        api_client = ctx.obj['api_client']
+        api_client.set_pool_size(max(workers, api_client.pool_size))
+        if compress:
+            api_client.enable_compression(OTA_IMAGE_ENDPOINT)
+        uploader = BulkImageUploader(ota_service, processes=processes, max_workers=workers, force=force,
+                                     validate=not skip_validation)
+
+        def progress(stage, done, total, size, elapsed):
+            verb = "Prepared" if stage == "prepare" else "Uploaded"
+            rate = size / (1024 * 1024) / elapsed if elapsed > 0 else 0
+            click.echo(f"\r{verb} {done}/{total} images ({rate:.1f} MB/s)", nl=done == total, err=True)
+
+        summary = uploader.run(entries, on_progress=progress)
+        summary["transfer"] = api_client.metrics.summary()
+        output = {
+            "status": "success" if not summary["failed"] else "partial_failure",
+            "response": summary,
+            "error": None
+        }
         click.echo(json.dumps(output, indent=2))
     except Exception as e:
         output = {
@@ -165,6 +225,61 @@ def archive(ctx, image_id, unarchive):
         }
         click.echo(json.dumps(output, indent=2))
 
+@image.command()
+@click.option('--file', type=click.Path(exists=True), required=True, help="Path to .bin firmware file")
+@click.option('--chip', help="Expected chip (e.g. ESP32-C3)")
+@click.pass_context
+def inspect(ctx, file, chip):
+    """Validate a firmware file and show its image header and app descriptor"""
+    ota_service = ctx.obj['ota_image_service']
+    try:
+        result = ota_service.inspect_image(file, chip=chip)
+        output = {
+            "status": "success" if result.get("status") != "failure" else "error",
+            "response": result.get("image"),
+            "error": result.get("description")
+        }
+        click.echo(json.dumps(output, indent=2))
+    except Exception as e:
+        output = {
+            "status": "error",
+            "response": None,
+            "error": str(e)
+        }
+        click.echo(json.dumps(output, indent=2))
+
+@image.group(name='cache')
+def image_cache():
+    """Local firmware cache operations"""
+    pass
+
+@image_cache.command(name='list')
+def cache_list():
+    """List cached firmware images"""
+    try:
+        cache = FirmwareCache()
+        images = [
+            {"sha256": sha256, "size": entry["size"], "source": entry.get("source"), "hits": entry.get("hits", 0),
+             "last_used": entry["last_used"], "metadata": entry.get("metadata", {})}
+            for sha256, entry in sorted(cache.entries.items(), key=lambda item: -item[1]["last_used"])
+        ]
+        click.echo(json.dumps({"status": "success", "response": {"stats": cache.stats(), "images": images},
+                               "error": None}, indent=2))
+    except Exception as e:
+        click.echo(json.dumps({"status": "error", "response": None, "error": str(e)}, indent=2))
+
+@image_cache.command(name='prune')
+@click.option('--max-mb', type=float, default=0, help="Keep at most this many MB of encodings (default: clear all)")
+def cache_prune(max_mb):
+    """Evict least recently used cached firmware images"""
+    try:
+        cache = FirmwareCache()
+        evicted = cache.evict(max_bytes=int(max_mb * 1024 * 1024))
+        click.echo(json.dumps({"status": "success", "response": {"evicted": evicted, "stats": cache.stats()},
+                               "error": None}, indent=2))
+    except Exception as e:
+        click.echo(json.dumps({"status": "error", "response": None, "error": str(e)}, indent=2))
+
 @ota.group()
 def job():
     """OTA job operations"""
@@ -182,15 +297,45 @@ def job():
 @click.option('--notify', is_flag=True, help="Notify end users")
 @click.option('--continuous', is_flag=True, help="Keep job active after completion")
 @click.option('--serialized', is_flag=True, help="Network serialized delivery")
+@click.option('--skip-updated', is_flag=True, help="Leave out nodes already running the image's fw_version")
+@click.option('--versions-from', type=click.Choice(['admin', 'inventory']), default='admin',
+              help="Where current node versions come from with --skip-updated (inventory falls back to admin)")
+@click.option('--match-model', is_flag=True, help="With --skip-updated, also leave out nodes of another model")
+@click.option('--nodes-file', type=click.File('r'), help="File with one node ID per line ('-' for stdin)")
+@click.option('--chunk-size', type=int, default=DEFAULT_JOB_CHUNK_SIZE,
+              help="Most nodes per job; longer lists become a job group (default:1000)")
+@click.option('--workers', type=int, default=4, help="Concurrent job creations for a job group")
 @click.pass_context
 def create(ctx, name, image_id, description, nodes, priority, timeout,
-           force, approval, notify, continuous, serialized):
+           force, approval, notify, continuous, serialized, skip_updated, versions_from, match_model,
+           nodes_file, chunk_size, workers):
     """Create a new OTA job"""
     ota_job_service = ctx.obj['ota_job_service']
     
     try:
         # Convert comma-separated nodes string to list
         node_list = nodes.split(',') if nodes else []
+        if nodes_file:
+            node_list += [line.strip() for line in nodes_file if line.strip()]
+
+        targeting = None
+        if skip_updated and node_list:
+            admin_service = NodeAdminService(ctx.obj['api_client'])
+            inventory = None
+            if versions_from == 'inventory':
+                inventory = NodeInventory(admin_service, config_id=ctx.obj.get('config_id'))
+            targeting = differential_targets(ctx.obj['ota_image_service'], image_id, node_list, admin_service,
+                                             inventory=inventory, match_model=match_model)
+            node_list = targeting["nodes"]
+            if not node_list:
+                click.echo(json.dumps({
+                    "status": "success",
+                    "response": None,
+                    "targeting": targeting,
+                    "error": None,
+                    "message": "All nodes are already up to date; no job created"
+                }, indent=2))
+                return
         
         result = ota_job_service.create_job(
             ota_job_name=name,
@@ -203,13 +348,17 @@ def create(ctx, name, image_id, description, nodes, priority, timeout,
             user_approval=approval,
             notify=notify,
             continuous=continuous,
-            network_serialised=serialized
+            network_serialised=serialized,
+            chunk_size=chunk_size,
+            max_workers=workers
         )
         output = {
             "status": "success",
             "response": result,
             "error": None
         }
+        if targeting is not None:
+            output["targeting"] = targeting
         click.echo(json.dumps(output, indent=2))
     except Exception as e:
         output = {
@@ -265,13 +414,17 @@ def list(ctx):
 
 @job.command()
 @click.option('--job-id', help="Job ID to update")
+@click.option('--group-id', help="Job group ID (from a chunked create) to update every job of")
 @click.option('--archive', is_flag=True, help="Archive instead of cancel")
 @click.pass_context
-def update(ctx, job_id, archive):
+def update(ctx, job_id, group_id, archive):
     """Update an OTA job"""
     ota_job_service = ctx.obj['ota_job_service']
     try:
-        result = ota_job_service.update_job(job_id, archive)
+        if group_id:
+            result = ota_job_service.update_job_group(group_id, archive)
+        else:
+            result = ota_job_service.update_job(job_id, archive)
         click.echo(json.dumps(result, indent=2))
     except Exception as e:
         click.echo(json.dumps({
@@ -282,12 +435,16 @@ def update(ctx, job_id, archive):
 
 @job.command()
 @click.option('--job-id', help="Job ID to check status")
+@click.option('--group-id', help="Job group ID (from a chunked create) to aggregate status over")
 @click.pass_context
-def status(ctx, job_id):
+def status(ctx, job_id, group_id):
     """Check OTA job status"""
     ota_job_service = ctx.obj['ota_job_service']
     try:
-        result = ota_job_service.get_job_status(job_id)
+        if group_id:
+            result = ota_job_service.get_job_group_status(group_id)
+        else:
+            result = ota_job_service.get_job_status(job_id)
         output = {
             "status": "success",
             "response": result,
@@ -300,4 +457,91 @@ def status(ctx, job_id):
             "response": None,
             "error": str(e)
         }
-        click.echo(json.dumps(output, indent=2)) 
\ No newline at end of file
+        click.echo(json.dumps(output, indent=2))
+
+@ota.command()
+@click.option('--image-id', required=True, help="OTA image ID to roll out")
+@click.option('--name', help="Rollout name, also the job name prefix (default: rollout-<image-id>)")
+@click.option('--waves', default="1,10,100", help="Cumulative percentages of the targets per wave")
+@click.option('--canary', type=int, default=0, help="Number of nodes in a canary wave before the first percentage")
+@click.option('--target-query', help="Target filter, e.g. 'model=switch,fw_version=1.0,tag=lab,tag!=beta,online=true'")
+@click.option('--nodes-file', type=click.File('r'), help="File with one target node ID per line instead of a query")
+@click.option('--all-nodes', is_flag=True, help="Target every node in the inventory (instead of a query or file)")
+@click.option('--no-sync', is_flag=True, help="Select targets from the local inventory without syncing it first")
+@click.option('--max-failure-rate', type=float, default=0.05, help="Highest failure rate a wave may have (0-1)")
+@click.option('--min-completion', type=float, default=0.9, help="Fraction of a wave that must finish before the next starts")
+@click.option('--poll-interval', type=float, default=30, help="Seconds between job status polls")
+@click.option('--wave-timeout', type=float, default=6 * 3600, help="Seconds a wave may take to reach --min-completion")
+@click.option('--cancel-on-halt', is_flag=True, help="Cancel the running wave's job when the rollout halts")
+@click.option('--priority', type=int, default=5, help="Job priority (1-10, default:5)")
+@click.option('--timeout', type=int, default=1296000, help="Job timeout in seconds (default:15 days)")
+@click.option('--approval', is_flag=True, help="Require user approval")
+@click.option('--notify', is_flag=True, help="Notify end users")
+@click.option('--skip-updated', is_flag=True, help="Leave out targets already running the image's fw_version")
+@click.option('--restart', is_flag=True, help="Start over even if a rollout with this name exists")
+@click.option('--dry-run', is_flag=True, help="Only print the planned waves")
+@click.pass_context
+def rollout(ctx, image_id, name, waves, canary, target_query, nodes_file, all_nodes, no_sync, max_failure_rate,
+            min_completion, poll_interval, wave_timeout, cancel_on_halt, priority, timeout, approval, notify,
+            skip_updated, restart, dry_run):
+    """Roll an OTA image out in health-gated waves, printing progress events as JSON lines"""
+    # Never default to the whole fleet: the targets must be chosen explicitly
+    if sum(map(bool, (target_query and target_query.strip(), nodes_file, all_nodes))) != 1:
+        raise click.UsageError("Give exactly one of --target-query, --nodes-file or --all-nodes")
+    try:
+        name = name or f"rollout-{image_id}"
+        orchestrator = RolloutOrchestrator(
+            ctx.obj['ota_job_service'], image_id, name,
+            max_failure_rate=max_failure_rate, min_completion=min_completion,
+            poll_interval=poll_interval, wave_timeout=wave_timeout, cancel_on_halt=cancel_on_halt,
+            job_options={"priority": priority, "timeout": timeout, "user_approval": approval, "notify": notify},
+            config_id=ctx.obj.get('config_id')
+        )
+        resuming = not restart and (orchestrator.load() or {}).get("status") == "running"
+        planned = None
+        excluded = None
+        if not resuming:
+            admin_service = NodeAdminService(ctx.obj['api_client'])
+            inventory = NodeInventory(admin_service, config_id=ctx.obj.get('config_id'))
+            if nodes_file:
+                targets = sorted({line.strip() for line in nodes_file if line.strip()})
+            else:
+                targets = select_targets(inventory, parse_target_query(None if all_nodes else target_query),
+                                         sync=not no_sync)
+            if skip_updated:
+                targeting = differential_targets(ctx.obj['ota_image_service'], image_id, targets, admin_service,
+                                                 inventory=inventory)
+                targets = targeting["nodes"]
+                excluded = targeting["excluded"]
+            percentages = [float(p) for p in waves.split(',') if p.strip()]
+            planned = plan_waves(targets, percentages, canary=canary, seed=name)
+        if dry_run:
+            plan = [{"wave": i + 1, "nodes": len(nodes), "sample": nodes[:5]} for i, nodes in enumerate(planned or [])]
+            click.echo(json.dumps({"status": "success", "response": {"name": name, "resume": resuming,
+                                                                     "excluded_up_to_date": excluded,
+                                                                     "waves": plan}, "error": None}, indent=2))
+            return
+
+        def emit(event):
+            click.echo(json.dumps(event))
+            click.get_text_stream('stdout').flush()
+
+        if excluded:
+            emit({"event": "targets_excluded", "up_to_date": excluded})
+        summary = orchestrator.run(planned, on_event=emit, restart=restart)
+        output = {
+            "status": "success" if summary["status"] == "complete" else "error",
+            "response": summary,
+            "error": None if summary["status"] == "complete" else "Rollout halted"
+        }
+        click.echo(json.dumps(output, indent=2))
+    except KeyboardInterrupt:
+        click.echo(json.dumps({"status": "error", "response": None,
+                               "error": "Interrupted; run the same command again to resume"}, indent=2))
+    except Exception as e:
+        output = {
+            "status": "error",
+            "response": None,
+            "error": str(e)
+        }
+        click.echo(json.dumps(output, indent=2))
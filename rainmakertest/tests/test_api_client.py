@@ -0,0 +1,93 @@
+import gzip
+import io
+import json
+import os
+
+import pytest
+import requests
+
+from ..utils.api_client import ApiClient
+
+
+class SizedBody(io.BytesIO):
+    """Stand-in for a streamed request body with a known length"""
+
+    def __len__(self):
+        return len(self.getvalue())
+
+
+class FakeSession:
+    """Records the headers and body of each request and answers with a success response"""
+
+    def __init__(self):
+        self.requests = []
+
+    def post(self, url, headers=None, data=None, params=None):
+        body = data.read() if hasattr(data, "read") else data
+        self.requests.append((headers, body))
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"status": "success"}'
+        return response
+
+    put = post
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    api_client = ApiClient()
+    api_client._config_data = {"environments": {"http_base_url": "http://rainmaker.test"},
+                               "session": {"access_token": "token"}}
+    api_client.session = FakeSession()
+    return api_client
+
+
+PAYLOAD = {"nodes": [{"node_id": f"node{i}", "payload": {"Light": {"Power": True}}} for i in range(200)]}
+
+
+def test_json_bodies_over_the_threshold_are_gzipped(client):
+    client.enable_compression("/v1/user/nodes/params", min_size=1024)
+    client.put("/v1/user/nodes/params", json=PAYLOAD)
+    headers, body = client.session.requests[-1]
+    assert headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" not in headers
+    assert json.loads(gzip.decompress(body)) == PAYLOAD
+
+    metrics = client.metrics.summary()
+    assert metrics["compressed_requests"] == 1
+    assert metrics["request_bytes"] == len(json.dumps(PAYLOAD).encode())
+    assert metrics["request_bytes_sent"] == len(body)
+    assert metrics["response_bytes"] == len(b'{"status": "success"}')
+
+
+def test_small_bodies_and_other_endpoints_are_sent_as_is(client):
+    client.enable_compression("/v1/user/nodes/params", min_size=10 ** 6)
+    client.put("/v1/user/nodes/params", json=PAYLOAD)
+    client.post("/v1/admin/otajob", json=PAYLOAD)
+    for headers, body in client.session.requests:
+        assert "Content-Encoding" not in headers
+        assert json.loads(body) == PAYLOAD
+    metrics = client.metrics.summary()
+    assert metrics["compressed_requests"] == 0 and metrics["request_bytes_saved"] == 0
+
+
+def test_streamed_bodies_are_gzipped_with_matching_length(client):
+    client.enable_compression("/v1/admin/otaimage", min_size=1024)
+    raw = json.dumps(PAYLOAD).encode()
+    client.post_stream("/v1/admin/otaimage", SizedBody(raw))
+    headers, body = client.session.requests[-1]
+    assert headers["Content-Encoding"] == "gzip"
+    assert int(headers["Content-Length"]) == len(body)
+    assert gzip.decompress(body) == raw
+    assert client.metrics.summary()["request_bytes_saved"] == len(raw) - len(body)
+
+
+def test_incompressible_streamed_bodies_are_sent_uncompressed(client):
+    client.enable_compression("/v1/admin/otaimage", min_size=1024)
+    raw = os.urandom(64 * 1024)
+    client.post_stream("/v1/admin/otaimage", SizedBody(raw))
+    headers, body = client.session.requests[-1]
+    assert "Content-Encoding" not in headers and body == raw
+    metrics = client.metrics.summary()
+    assert (metrics["compressed_requests"], metrics["request_bytes_saved"]) == (0, 0)
@@ -0,0 +1,108 @@
+import io
+
+from ..nodes.bulk_sharing import BulkSharer, parse_sharing_rows, plan_share_requests, respond_to_pending
+from ..nodes.node_sharing_service import NodeSharingService
+
+
+class FakeSharingApiClient:
+    """Records PUT /v1/user/nodes/sharing payloads; shares with users in `failing` fail"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.shares = []
+
+    def put(self, endpoint, json=None, params=None):
+        self.shares.append(json)
+        if json["user_name"] in self.failing:
+            return {"status": "failure", "description": "user not found"}
+        return {"status": "success"}
+
+
+class PagedRequestsApiClient:
+    """Serves GET /v1/user/nodes/sharing/requests in pages of two and records PUT responses"""
+
+    def __init__(self, requests, page_size=2):
+        self.requests = requests
+        self.page_size = page_size
+        self.pages_served = 0
+        self.responses = []
+
+    def get(self, endpoint, params=None):
+        self.pages_served += 1
+        ids = [request["request_id"] for request in self.requests]
+        start = ids.index(params["start_request_id"]) if "start_request_id" in params else 0
+        page = self.requests[start:start + self.page_size]
+        response = {"sharing_requests": page}
+        if start + self.page_size < len(self.requests):
+            response["next_request_id"] = ids[start + self.page_size]
+        return response
+
+    def put(self, endpoint, json=None, params=None):
+        self.responses.append(json)
+        return {"status": "success"}
+
+
+def sharing_requests():
+    return [
+        {"request_id": "r1", "request_status": "pending", "primary_user_name": "a"},
+        {"request_id": "r2", "request_status": "accepted", "primary_user_name": "a"},
+        {"request_id": "r3", "request_status": "pending", "primary_user_name": "b"},
+        {"request_id": "r4", "request_status": "pending", "primary_user_name": "a"},
+        {"request_id": "r5", "request_status": "pending", "primary_user_name": "a"}
+    ]
+
+
+def test_iter_sharing_requests_follows_next_request_id():
+    api_client = PagedRequestsApiClient(sharing_requests())
+    requests = [*NodeSharingService(api_client).iter_sharing_requests()]
+    assert [request["request_id"] for request in requests] == ["r1", "r2", "r3", "r4", "r5"]
+    assert api_client.pages_served == 3
+
+
+def test_respond_to_pending_only_answers_matching_pending_requests():
+    api_client = PagedRequestsApiClient(sharing_requests())
+    summary = respond_to_pending(NodeSharingService(api_client), accept=False, primary_user_name="a")
+    assert (summary["total"], summary["failed"], summary["action"]) == (3, 0, "declined")
+    assert sorted(response["request_id"] for response in api_client.responses) == ["r1", "r4", "r5"]
+    assert not any(response["accept"] for response in api_client.responses)
+
+
+def test_parse_sharing_rows_detects_csv_and_jsonl():
+    csv_rows = [*parse_sharing_rows(io.StringIO('user_name,nodes,primary\na@x.com,"n1;n2",yes\nb@x.com,n3,\n'))]
+    assert csv_rows == [
+        {"user_name": "a@x.com", "nodes": ["n1", "n2"], "primary": True},
+        {"user_name": "b@x.com", "nodes": ["n3"], "primary": False}
+    ]
+    jsonl_rows = [*parse_sharing_rows(io.StringIO('{"user_name": "c@x.com", "nodes": "n4, n5"}\n'))]
+    assert jsonl_rows == [{"user_name": "c@x.com", "nodes": ["n4", "n5"], "primary": False}]
+
+
+def test_plan_merges_rows_per_user_and_chunks_node_lists():
+    rows = [
+        {"user_name": "a", "nodes": ["n1", "n2", "n3"], "primary": False},
+        {"user_name": "a", "nodes": ["n3", "n4", "n5"], "primary": False},
+        {"user_name": "a", "nodes": ["n1"], "primary": True}
+    ]
+    assert plan_share_requests(rows, max_nodes=2) == [
+        {"user_name": "a", "primary": False, "nodes": ["n1", "n2"]},
+        {"user_name": "a", "primary": False, "nodes": ["n3", "n4"]},
+        {"user_name": "a", "primary": False, "nodes": ["n5"]},
+        {"user_name": "a", "primary": True, "nodes": ["n1"]}
+    ]
+
+
+def test_run_shares_concurrently_and_reports_failed_requests():
+    api_client = FakeSharingApiClient(failing={"ghost"})
+    sharer = BulkSharer(NodeSharingService(api_client), max_nodes_per_request=2, max_workers=4)
+    progress = []
+    rows = [
+        {"user_name": "a", "nodes": ["n1", "n2", "n3"], "primary": False},
+        {"user_name": "ghost", "nodes": ["n1"], "primary": False}
+    ]
+    summary = sharer.run(rows, on_progress=lambda done, total: progress.append((done, total)))
+
+    assert (summary["requests"], summary["succeeded"], summary["failed"]) == (3, 2, 1)
+    assert summary["users"] == 2 and summary["node_shares"] == 4
+    assert summary["failures"][0]["item"]["user_name"] == "ghost"
+    assert sorted(len(share["nodes"]) for share in api_client.shares) == [1, 1, 2]
+    assert progress[-1] == (3, 3)
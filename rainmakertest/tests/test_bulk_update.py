@@ -0,0 +1,60 @@
+import io
+
+from ..nodes.bulk_update import BulkNodeUpdater, parse_update_rows
+from ..nodes.node_admin_service import NodeAdminService
+from ..nodes.tag_index import TagIndex
+
+
+class FakeAdminApiClient:
+    """In-memory /v1/admin/nodes: GET by node_id, PUT adds tags/metadata; writes to `failing` fail"""
+
+    def __init__(self, nodes, failing=()):
+        self.nodes = nodes
+        self.failing = set(failing)
+        self.writes = []
+
+    def get(self, endpoint, params=None):
+        node = self.nodes.get(params["node_id"])
+        return {"nodes": [{"node_id": params["node_id"], **node}] if node else []}
+
+    def put(self, endpoint, json=None, params=None):
+        node_id = params["node_id"]
+        self.writes.append(node_id)
+        if node_id in self.failing:
+            return {"status": "failure", "description": "rejected"}
+        node = self.nodes.setdefault(node_id, {"tags": [], "metadata": {}})
+        node["tags"] = sorted(set(node["tags"]) | set(json.get("tags") or []))
+        node["metadata"].update(json.get("metadata") or {})
+        return {"status": "success"}
+
+
+def test_parse_update_rows_detects_csv_and_jsonl():
+    csv_rows = [*parse_update_rows(io.StringIO('node_id,tags,metadata\nn1,"a, b","{""k"": 1}"\n'))]
+    assert csv_rows == [{"node_id": "n1", "tags": ["a", "b"], "metadata": {"k": 1}}]
+    jsonl_rows = [*parse_update_rows(io.StringIO('\n{"node_id": "n2", "tags": "x"}\n'))]
+    assert jsonl_rows == [{"node_id": "n2", "tags": ["x"], "metadata": None}]
+
+
+def test_run_skips_no_op_rows_and_reports_failed_writes(tmp_path):
+    api_client = FakeAdminApiClient({
+        "n1": {"tags": ["lab"], "metadata": {"room": "a"}},
+        "n2": {"tags": [], "metadata": {}},
+        "n3": {"tags": [], "metadata": {}},
+    }, failing={"n3"})
+    tag_index = TagIndex.for_config("test", inventory_dir=tmp_path)
+    updater = BulkNodeUpdater(admin_service=NodeAdminService(api_client, tag_index=tag_index), max_workers=4)
+    summary = updater.run([
+        {"node_id": "n1", "tags": ["lab"], "metadata": {"room": "a"}},
+        {"node_id": "n2", "tags": ["lab", "beta"], "metadata": None},
+        {"node_id": "n3", "tags": ["lab"], "metadata": None},
+    ])
+    assert (summary["updated"], summary["skipped"], summary["failed"]) == (1, 1, 1)
+    assert sorted(api_client.writes) == ["n2", "n3"]
+    assert TagIndex.for_config("test", inventory_dir=tmp_path).query(all_tags=["beta"]) == {"n2"}
+
+
+def test_dry_run_plans_only_missing_changes():
+    api_client = FakeAdminApiClient({"n1": {"tags": ["lab"], "metadata": {}}})
+    updater = BulkNodeUpdater(admin_service=NodeAdminService(api_client), dry_run=True)
+    summary = updater.run([{"node_id": "n1", "tags": ["lab", "new"], "metadata": None}])
+    assert summary["planned"] == [{"node_id": "n1", "tags": ["new"]}] and not api_client.writes
@@ -0,0 +1,80 @@
+import json
+import threading
+
+import pytest
+
+from ..ota.bulk_upload import BulkImageUploader, load_manifest
+from ..ota.firmware_cache import FirmwareCache
+from ..ota.firmware_digest import DigestStore
+from ..ota.ota_image_service import OTAService
+
+
+class FakeImageApiClient:
+    """In-memory /v1/admin/otaimage fed by streamed upload bodies"""
+    config_id = "test"
+
+    def __init__(self):
+        self.images = {}
+        self.lock = threading.Lock()
+
+    def post_stream(self, endpoint, body):
+        fields = json.loads(body.read())
+        with self.lock:
+            ota_image_id = f"img-{len(self.images) + 1}"
+            self.images[ota_image_id] = {"ota_image_id": ota_image_id,
+                                         **{k: v for k, v in fields.items() if k != "base64_fwimage"}}
+        return {"status": "success", "ota_image_id": ota_image_id}
+
+    def get(self, endpoint, params=None):
+        return {"ota_images": [*self.images.values()]}
+
+
+def write_manifest(tmp_path, images):
+    (tmp_path / "fw").mkdir(exist_ok=True)
+    (tmp_path / "fw" / "a.bin").write_bytes(b"\xe9a" * 1000)
+    (tmp_path / "fw" / "b.bin").write_bytes(b"\xe9b" * 1000)
+    (tmp_path / "fw" / "a-copy.bin").write_bytes(b"\xe9a" * 1000)
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps(images))
+    return str(path)
+
+
+def test_load_manifest_resolves_paths_and_rejects_bad_entries(tmp_path):
+    path = write_manifest(tmp_path, {"images": [{"file": "fw/a.bin", "name": "a", "version": "1.0"}]})
+    assert load_manifest(path) == [{"file": str(tmp_path / "fw" / "a.bin"), "name": "a", "version": "1.0"}]
+
+    for images, error in [
+        ([], "non-empty list"),
+        ([{"file": "fw/a.bin"}], "needs 'file' and 'name'"),
+        ([{"file": "fw/a.bin", "name": "a"}, {"file": "fw/b.bin", "name": "a"}], "Duplicate image name"),
+        ([{"file": "fw/missing.bin", "name": "m"}], "not found")
+    ]:
+        with pytest.raises(ValueError, match=error):
+            load_manifest(write_manifest(tmp_path, images))
+
+
+def test_prepared_images_upload_once_per_distinct_bytes(tmp_path):
+    path = write_manifest(tmp_path, [
+        {"file": "fw/a.bin", "name": "a", "version": "1.0", "model": "switch"},
+        {"file": "fw/b.bin", "name": "b", "version": "1.0", "model": "switch"},
+        {"file": "fw/a-copy.bin", "name": "a-copy", "version": "1.0", "model": "switch"}
+    ])
+    api_client = FakeImageApiClient()
+    service = OTAService(api_client, digest_store=DigestStore(tmp_path / "digests.json"),
+                         firmware_cache=FirmwareCache(tmp_path / "cache"))
+    uploader = BulkImageUploader(service, processes=2, validate=False)
+
+    stage = uploader.prepare(load_manifest(path))
+    assert sorted(stage["prepared"]) == ["a", "a-copy", "b"] and not stage["failures"]
+    assert not api_client.images
+    prepared = stage["prepared"]
+    assert prepared["a"]["digest"]["sha256"] == prepared["a-copy"]["digest"]["sha256"]
+    assert prepared["a"]["payload"] == {"image_name": "a", "fw_version": "1.0", "model": "switch",
+                                        "type": "development"}
+
+    summary = uploader.run(load_manifest(path))
+    assert (summary["total"], summary["succeeded"], summary["failed"]) == (3, 3, 0)
+    assert len(api_client.images) == 2
+    images = summary["images"]
+    assert images["a-copy"]["deduplicated"] is True
+    assert images["a-copy"]["ota_image_id"] == images["a"]["ota_image_id"] != images["b"]["ota_image_id"]
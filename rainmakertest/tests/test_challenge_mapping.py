@@ -0,0 +1,52 @@
+import time
+
+from ..nodes.challenge_mapping import ChallengeMappingPipeline
+
+
+class FakeSharingService:
+    """Initiates with a challenge per node and verifies any response; `slow` nodes take a while to initiate"""
+
+    def __init__(self, slow=()):
+        self.slow = set(slow)
+        self.verified_at = {}
+
+    def initiate_mapping(self, node_id, version="v1"):
+        if node_id in self.slow:
+            time.sleep(0.5)
+        return {"request_id": f"req-{node_id}", "challenge": f"challenge-{node_id}"}
+
+    def verify_mapping(self, request_id, challenge_response, group_id=None, tags=None, metadata=None, version="v1"):
+        self.verified_at[request_id] = time.monotonic()
+        return {"status": "success", "description": "Node mapped"}
+
+
+class LateResponder:
+    """Has no answer on the first ask for each node; never answers for `silent` nodes"""
+
+    def __init__(self, silent=()):
+        self.silent = set(silent)
+        self.asked = {}
+
+    def __call__(self, node_id, challenge):
+        self.asked[node_id] = self.asked.get(node_id, 0) + 1
+        if node_id in self.silent or self.asked[node_id] == 1:
+            return None
+        return f"answer-{challenge}"
+
+
+def test_retries_unanswered_challenges_and_times_out_silent_nodes():
+    responder = LateResponder(silent={"n3"})
+    pipeline = ChallengeMappingPipeline(FakeSharingService(), responder, timeout=0.3, poll_interval=0.02)
+    summary = pipeline.run(["n1", "n2", "n3"])
+    statuses = {result["node_id"]: result["status"] for result in summary["results"]}
+    assert statuses == {"n1": "verified", "n2": "verified", "n3": "timedout"}
+    assert responder.asked["n1"] == 2 and responder.asked["n3"] > 2
+
+
+def test_re_polls_are_not_held_up_by_slow_requests():
+    service = FakeSharingService(slow={"slow"})
+    pipeline = ChallengeMappingPipeline(service, LateResponder(), timeout=2, poll_interval=0.02)
+    started = time.monotonic()
+    summary = pipeline.run(["fast", "slow"])
+    assert summary["verified"] == 2
+    assert service.verified_at["req-fast"] - started < 0.3
@@ -0,0 +1,49 @@
+from ..nodes.config_drift import ConfigDriftTracker
+
+
+class FakeConfigNodeService:
+    """Serves node configs from a dict; unknown nodes fail"""
+
+    def __init__(self, configs):
+        self.configs = configs
+
+    def get_node_config(self, node_id):
+        if node_id not in self.configs:
+            return {"status": "failure", "description": "node not found"}
+        return self.configs[node_id]
+
+
+def config(power_default=False, fw="1.0"):
+    return {"info": {"fw_version": fw, "name": "lamp"},
+            "devices": [{"name": "Light", "params": [{"name": "Power", "value": power_default}]}]}
+
+
+def test_reports_new_then_changed_nodes_with_path_diff(tmp_path):
+    service = FakeConfigNodeService({"n1": config(), "n2": config()})
+    first = ConfigDriftTracker(service, inventory_dir=tmp_path).check(["n1", "n2", "ghost"])
+    assert first["new"] == ["n1", "n2"] and len(first["failures"]) == 1
+
+    # Key order does not count as drift
+    service.configs["n2"] = {"devices": config()["devices"], "info": {"name": "lamp", "fw_version": "1.0"}}
+    service.configs["n1"] = config(power_default=True, fw="1.1")
+    report = ConfigDriftTracker(service, inventory_dir=tmp_path).check(["n1", "n2"])
+    assert (report["checked"], report["unchanged"], report["changed_count"]) == (2, 1, 1)
+    changed = report["changed"][0]
+    assert changed["node_id"] == "n1" and changed["old_hash"] != changed["new_hash"]
+    assert changed["diff"] == [
+        {"path": "$.devices[0].params[0].value", "op": "changed", "old": False, "new": True},
+        {"path": "$.info.fw_version", "op": "changed", "old": "1.0", "new": "1.1"}
+    ]
+
+
+def test_no_update_keeps_the_stored_baseline(tmp_path):
+    service = FakeConfigNodeService({"n1": config()})
+    ConfigDriftTracker(service, inventory_dir=tmp_path).check(["n1"])
+    service.configs["n1"] = config(fw="2.0")
+
+    for _ in range(2):
+        tracker = ConfigDriftTracker(service, inventory_dir=tmp_path)
+        report = tracker.check(["n1"], update=False)
+        assert report["changed_count"] == 1
+        assert report["changed"][0]["diff"][0]["old"] == "1.0"
+    assert tracker.last_seen("n1") == config()
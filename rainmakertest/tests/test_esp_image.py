@@ -0,0 +1,44 @@
+import hashlib
+import struct
+
+import pytest
+
+from ..ota.esp_image import APP_DESC_MAGIC, EspImageError, check_chip, parse_esp_image
+
+
+def build_image(chip_id=5, version=b"2.1.0", project=b"switch", hash_appended=True):
+    """Assemble a minimal ESP application image: one DROM segment holding the app descriptor"""
+    app_desc = struct.pack("<II8s32s32s16s16s32s32s", APP_DESC_MAGIC, 0, b"", version, project,
+                           b"12:00:00", b"Jan  1 2025", b"v5.1", bytes(32))
+    segment = app_desc + bytes(16)
+    image = struct.pack("<BBBBI", 0xE9, 1, 2, 0x2F, 0x40380000)
+    image += struct.pack("<B3sHBHH4sB", 0xEE, b"", chip_id, 0, 0, 0xFFFF, b"", int(hash_appended))
+    image += struct.pack("<II", 0x3C000020, len(segment)) + segment
+    checksum = 0xEF
+    for byte in segment:
+        checksum ^= byte
+    image += bytes(15 - len(image) % 16) + bytes([checksum])
+    if hash_appended:
+        image += hashlib.sha256(image).digest()
+    return image
+
+
+def test_parses_header_and_app_descriptor():
+    info = parse_esp_image(build_image())
+    assert info["chip"] == "ESP32-C3"
+    assert info["app_desc"]["version"] == "2.1.0"
+    assert info["app_desc"]["project_name"] == "switch"
+    assert info["image_length"] == len(build_image())
+    check_chip(info, "esp32c3")
+    with pytest.raises(EspImageError):
+        check_chip(info, "ESP32-S3")
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda image: b"\x00" + image[1:],                     # magic
+    lambda image: image[:60],                              # truncated segment
+    lambda image: image[:40] + b"\xff" + image[41:],       # checksum / hash
+])
+def test_rejects_broken_images(corrupt):
+    with pytest.raises(EspImageError):
+        parse_esp_image(corrupt(build_image()))
@@ -0,0 +1,33 @@
+import os
+
+from ..ota.firmware_cache import FirmwareCache
+from ..ota.firmware_digest import FirmwareFile
+from ..ota.firmware_stream import base64_length
+
+
+def add_image(cache, tmp_path, name, size):
+    path = tmp_path / f"{name}.bin"
+    path.write_bytes(os.urandom(size))
+    with FirmwareFile(path) as firmware:
+        return cache.add(firmware)["sha256"]
+
+
+def test_hits_and_misses_are_counted_once(tmp_path):
+    cache = FirmwareCache(tmp_path / "cache")
+    sha256 = add_image(cache, tmp_path, "a", 3000)
+    assert cache.entries[sha256]["hits"] == 0
+    assert cache.get("0" * 64) is None
+    cache.get(sha256)
+    cache.get(sha256)
+    assert FirmwareCache(tmp_path / "cache").entries[sha256]["hits"] == 2
+
+
+def test_least_recently_used_images_are_evicted_by_size(tmp_path):
+    cache = FirmwareCache(tmp_path / "cache", max_bytes=2 * base64_length(3000))
+    first = add_image(cache, tmp_path, "a", 3000)
+    second = add_image(cache, tmp_path, "b", 3000)
+    cache.get(first)
+    third = add_image(cache, tmp_path, "c", 3000)
+    assert set(cache.entries) == {first, third}
+    assert not cache.encoding_path(second).exists()
+    assert cache.stats()["bytes"] == 2 * base64_length(3000)
@@ -0,0 +1,55 @@
+import base64
+import json
+import os
+
+import pytest
+
+from ..ota.firmware_digest import FirmwareFile, digest_bytes
+from ..ota.firmware_stream import Base64JsonBody
+
+FIELDS = {"image_name": "switch", "fw_version": "2.1.0", "type": "development"}
+
+
+def read_in_blocks(body, size):
+    data = b""
+    while True:
+        block = body.read(size)
+        if not block:
+            return data
+        data += block
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 100_000])
+def test_firmware_body_is_valid_json_of_declared_length(tmp_path, size):
+    image = os.urandom(size)
+    path = tmp_path / "fw.bin"
+    path.write_bytes(image)
+    with FirmwareFile(path) as firmware:
+        body = Base64JsonBody.from_firmware(firmware, FIELDS, chunk_size=3 * 1024)
+        data = read_in_blocks(body, 8192)
+    assert len(data) == len(body)
+    payload = json.loads(data)
+    assert base64.b64decode(payload.pop("base64_fwimage")) == image
+    assert payload == FIELDS
+
+
+def test_encoded_file_body_round_trips(tmp_path):
+    image = os.urandom(50_000)
+    path = tmp_path / "fw.b64"
+    path.write_bytes(base64.b64encode(image))
+    body = Base64JsonBody.from_encoded_file(str(path), {}, b64_field="file")
+    data = body.read()
+    assert len(data) == len(body)
+    assert base64.b64decode(json.loads(data)["file"]) == image
+
+
+def test_rewound_firmware_body_is_resent_and_hashed_once(tmp_path):
+    image = os.urandom(20_000)
+    path = tmp_path / "fw.bin"
+    path.write_bytes(image)
+    with FirmwareFile(path) as firmware:
+        body = Base64JsonBody.from_firmware(firmware, FIELDS, chunk_size=3 * 1024)
+        first = read_in_blocks(body, 4096)
+        body.seek(0)
+        assert read_in_blocks(body, 8192) == first
+        assert firmware.digest() == digest_bytes(image)
@@ -0,0 +1,17 @@
+from ..fleet.fleet_report import FleetColumns, build_report
+from ..nodes.node_record import NodeRecord
+
+ENTRIES = [
+    {"model": "switch", "fw_version": "1.0", "project_name": "home", "online": True, "tags": ["lab", "lab"]},
+    {"model": "switch", "fw_version": "1.1", "project_name": "home", "online": False, "tags": ["lab"]},
+    {"model": "light", "fw_version": "1.0", "project_name": "office", "online": None, "tags": None},
+]
+
+
+def test_entries_and_records_give_the_same_report_with_tags_counted_once_per_node():
+    columns = FleetColumns.from_entries(ENTRIES)
+    records = FleetColumns.from_records([NodeRecord(node_id=str(i), **entry) for i, entry in enumerate(ENTRIES)])
+    report = build_report(columns)
+    assert report == build_report(records)
+    assert report["tag_coverage"] == [{"tag": "lab", "nodes": 2, "coverage": 0.6667}]
+    assert report["online_ratio_by_model"][0] == {"model": "switch", "nodes": 2, "online": 1, "online_ratio": 0.5}
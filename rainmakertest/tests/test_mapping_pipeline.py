@@ -0,0 +1,47 @@
+import io
+
+import pytest
+
+from ..nodes.mapping_pipeline import MappingPipeline, parse_mapping_csv
+
+
+class FakeNodeService:
+    """Maps nodes with request IDs; `statuses` lists the request_status reported on each poll"""
+
+    def __init__(self, statuses, rejected=()):
+        self.statuses = {node_id: [*values] for node_id, values in statuses.items()}
+        self.rejected = set(rejected)
+
+    def map_user_node(self, node_id, secret_key, operation):
+        if node_id in self.rejected:
+            return {"status": "failure", "description": "invalid secret key"}
+        return {"request_id": f"req-{node_id}"}
+
+    def get_mapping_status(self, request_id):
+        values = self.statuses[request_id[len("req-"):]]
+        return {"request_status": values.pop(0) if len(values) > 1 else values[0]}
+
+
+def test_parse_mapping_csv_skips_header_and_rejects_duplicates():
+    rows = [*parse_mapping_csv(io.StringIO("node_id,secret_key\nn1,s1\n\nn2,s2\n"))]
+    assert [row["node_id"] for row in rows] == ["n1", "n2"]
+    with pytest.raises(ValueError, match="Duplicate node_id n1 on line 2"):
+        [*parse_mapping_csv(io.StringIO("n1,s1\nn1,s2\n"))]
+
+
+def test_pipeline_confirms_fails_and_times_out():
+    service = FakeNodeService({
+        "fast": ["confirmed"],
+        "slow": ["requested", "requested", "confirmed"],
+        "stuck": ["requested"],
+        "declined": ["declined"],
+    }, rejected={"bad"})
+    pipeline = MappingPipeline(service, timeout=0.5, poll_interval=0.01, max_interval=0.02)
+    rows = [{"node_id": node_id, "secret_key": "s"} for node_id in ("fast", "slow", "stuck", "declined", "bad")]
+    summary = pipeline.run(rows)
+    statuses = {result["node_id"]: result["status"] for result in summary["results"]}
+    assert statuses == {"fast": "confirmed", "slow": "confirmed", "stuck": "timedout",
+                        "declined": "failed", "bad": "failed"}
+    assert (summary["total"], summary["confirmed"], summary["timed_out"], summary["failed"]) == (5, 2, 1, 2)
+    with pytest.raises(ValueError):
+        pipeline.run(rows + rows[:1])
@@ -0,0 +1,67 @@
+from ..nodes.node_inventory import NodeInventory
+
+
+class FakeAdminService:
+    """Serves a node list in pages the way /v1/admin/nodes does"""
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def get_admin_nodes(self, start_id=None, num_records=None, status=None, **filters):
+        nodes = [n for n in self.nodes if status is None or n["status"] == status]
+        start = int(start_id or 0)
+        page = {"nodes": nodes[start:start + num_records]}
+        if start + num_records < len(nodes):
+            page["next_id"] = str(start + num_records)
+        return page
+
+
+def make_nodes(count):
+    return [
+        {"node_id": f"node{i}", "fw_version": "1.0", "tags": ["lab"], "status": "online" if i % 2 else "offline"}
+        for i in range(count)
+    ]
+
+
+def test_sync_resumes_from_cursor(tmp_path):
+    service = FakeAdminService(make_nodes(10))
+    inventory = NodeInventory(service, inventory_dir=tmp_path)
+
+    partial = inventory.sync(page_size=3, max_pages=2)
+    assert not partial["complete"]
+    assert partial["cursor"] == "6"
+
+    resumed = NodeInventory(service, inventory_dir=tmp_path).sync(page_size=3)
+    assert resumed["resumed"]
+    assert resumed["complete"]
+    assert resumed["pages"] == 2
+    assert resumed["nodes_seen"] == 10
+
+
+def test_sync_records_changes(tmp_path):
+    nodes = make_nodes(6)
+    service = FakeAdminService(nodes)
+    inventory = NodeInventory(service, inventory_dir=tmp_path)
+    inventory.sync(page_size=4)
+    baseline = inventory.last_seq
+
+    nodes[0]["fw_version"] = "2.0"
+    nodes[1]["tags"] = ["lab", "canary"]
+    del nodes[2]
+    inventory.sync(page_size=4)
+
+    events = {(e["event"], e["node_id"]) for e in inventory.changes_since(baseline)}
+    assert events == {("fw_changed", "node0"), ("tags_changed", "node1"), ("removed", "node2")}
+
+
+def test_filtered_slice_does_not_remove_nodes(tmp_path):
+    nodes = make_nodes(6)
+    service = FakeAdminService(nodes)
+    inventory = NodeInventory(service, inventory_dir=tmp_path)
+    inventory.sync(page_size=10)
+    inventory.sync(filters={"status": "online"}, page_size=10)
+
+    nodes[1]["status"] = "offline"
+    result = inventory.sync(filters={"status": "online"}, page_size=10)
+    assert result["removed"] == 0
+    assert inventory.get("node1") is not None
@@ -0,0 +1,32 @@
+import threading
+
+from ..nodes.node_service import NodeService
+
+
+class FakeParamsApiClient:
+    """PUT /v1/user/nodes/params with a node list: per-node statuses, or a failure for chunks holding `rejected`"""
+
+    def __init__(self, rejected=()):
+        self.rejected = set(rejected)
+        self.chunks = []
+        self.lock = threading.Lock()
+
+    def put(self, endpoint, json=None, params=None):
+        with self.lock:
+            self.chunks.append([update["node_id"] for update in json])
+        if any(update["node_id"] in self.rejected for update in json):
+            return {"status": "failure", "description": "invalid param"}
+        return [{"node_id": update["node_id"], "status": "success"} for update in json]
+
+
+def test_set_multi_node_params_chunks_and_merges_chunk_failures():
+    api_client = FakeParamsApiClient(rejected={"n30"})
+    updates = [{"node_id": f"n{i}", "payload": {"Light": {"Power": True}}} for i in range(60)]
+    summary = NodeService(api_client).set_multi_node_params(updates)
+
+    assert sorted(len(chunk) for chunk in api_client.chunks) == [10, 25, 25]
+    assert (summary["nodes"], summary["requests"], summary["failed_nodes"]) == (60, 3, 25)
+    statuses = {result["node_id"]: result for result in summary["results"]}
+    assert len(statuses) == 60
+    assert statuses["n0"]["status"] == "success" and statuses["n59"]["status"] == "success"
+    assert statuses["n25"] == {"node_id": "n25", "status": "failure", "description": "invalid param"}
@@ -0,0 +1,45 @@
+import sys
+
+import pytest
+
+from ..nodes.node_record import NodeRecord, to_records
+from ..nodes.node_service import NodeService
+
+NODE = {"node_id": "n1", "type": "Switch", "model": "switch", "fw_version": "1.0",
+        "status": {"connectivity": {"connected": True}}, "tags": ["lab", "beta"]}
+
+
+def test_records_use_slots_and_share_interned_strings():
+    first, second = to_records([NODE, {**NODE, "node_id": "n2", "model": "".join(["swi", "tch"])}])
+    assert not hasattr(first, "__dict__")
+    with pytest.raises(AttributeError):
+        first.extra = 1
+    assert first.model is second.model is sys.intern("switch")
+    assert first.online is True and first.tags == ("beta", "lab")
+
+
+def test_raw_is_decompressed_on_access_and_optional():
+    record = NodeRecord.from_dict(NODE)
+    assert isinstance(record._raw, bytes)
+    assert record.raw == NODE
+    assert NodeRecord.from_dict(NODE, keep_raw=False).raw is None
+
+
+class PagedApiClient:
+    """Serves node details two per page, linked with next_id"""
+
+    def __init__(self, count):
+        self.count = count
+
+    def get(self, endpoint, params=None):
+        start = int(params.get("start_id") or 0)
+        page = {"node_details": [{"id": f"n{i}", "config": {"info": {"model": "switch"}}}
+                                 for i in range(start, min(start + 2, self.count))]}
+        if start + 2 < self.count:
+            page["next_id"] = str(start + 2)
+        return page
+
+
+def test_get_user_nodes_as_records_follows_every_page():
+    records = NodeService(PagedApiClient(5)).get_user_nodes(as_records=True, keep_raw=False)
+    assert [record.node_id for record in records] == ["n0", "n1", "n2", "n3", "n4"]
@@ -0,0 +1,69 @@
+import base64
+
+from ..ota.firmware_digest import DigestStore
+from ..ota.ota_image_service import OTAService
+
+FIRMWARE = base64.b64encode(b"\xe9firmware" * 100).decode()
+
+
+class FakeImageApiClient:
+    """In-memory /v1/admin/otaimage: POST adds an image, GET lists them"""
+    config_id = "test"
+
+    def __init__(self):
+        self.images = {}
+
+    def post(self, endpoint, json=None, params=None):
+        ota_image_id = f"img-{len(self.images) + 1}"
+        self.images[ota_image_id] = {"ota_image_id": ota_image_id,
+                                     **{k: v for k, v in json.items() if k != "base64_fwimage"}}
+        return {"status": "success", "ota_image_id": ota_image_id}
+
+    def get(self, endpoint, params=None):
+        return {"ota_images": [*self.images.values()]}
+
+
+def upload(service, image_name, fw_version="1.0"):
+    return service.upload_image(image_name, fw_version=fw_version, model="switch",
+                                base64_fwimage=FIRMWARE, validate=False)
+
+
+def test_identical_bytes_are_aliased_only_when_image_attributes_match(tmp_path):
+    api_client = FakeImageApiClient()
+    store = DigestStore(tmp_path / "digests.json")
+    service = OTAService(api_client, digest_store=store)
+
+    first = upload(service, "switch-1.0")
+    assert first["deduplicated"] is False and first["ota_image_id"] == "img-1"
+
+    alias = upload(service, "switch-1.0-copy")
+    assert alias["deduplicated"] is True and alias["ota_image_id"] == "img-1"
+    assert len(api_client.images) == 1
+
+    # Same bytes under another version or type are a different image
+    assert upload(service, "switch-2.0", fw_version="2.0")["ota_image_id"] == "img-2"
+    production = service.upload_image("switch-prod", fw_version="1.0", model="switch", type="production",
+                                      base64_fwimage=FIRMWARE, validate=False)
+    assert production["deduplicated"] is False and len(api_client.images) == 3
+
+    uploads = store.get(first["firmware_digest"]["sha256"])["uploads"]
+    assert [(u["image_name"], u["fw_version"], u.get("deduplicated", False)) for u in uploads] == [
+        ("switch-1.0", "1.0", False), ("switch-1.0-copy", "1.0", True),
+        ("switch-2.0", "2.0", False), ("switch-prod", "1.0", False)
+    ]
+
+
+def test_refresh_drops_deleted_images_and_takes_server_attributes(tmp_path):
+    api_client = FakeImageApiClient()
+    store = DigestStore(tmp_path / "digests.json")
+    service = OTAService(api_client, digest_store=store)
+    upload(service, "switch-1.0")
+
+    # The server now reports another version for img-1, so it no longer matches a 1.0 upload
+    api_client.images["img-1"]["fw_version"] = "1.0.1"
+    assert upload(service, "switch-1.0-again")["ota_image_id"] == "img-2"
+
+    del api_client.images["img-2"]
+    result = upload(service, "switch-1.0-third")
+    assert result["deduplicated"] is False and result["ota_image_id"] == "img-2"
+    assert service.refresh_image_index() == {"images": 2, "removed": 0, "added": 0}
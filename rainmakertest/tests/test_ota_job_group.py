@@ -0,0 +1,57 @@
+from ..ota.ota_job_service import OTAJobService
+
+
+class FakeApiClient:
+    """Answers otajob create/status calls; creating a job named in `failing` fails"""
+    config_id = "test"
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.created = {}
+
+    def post(self, endpoint, json=None, params=None):
+        if json["ota_job_name"] in self.failing:
+            return {"status": "failure", "description": "request too large"}
+        ota_job_id = f"job-{json['ota_job_name']}"
+        self.created[ota_job_id] = json["nodes"]
+        return {"status": "success", "ota_job_id": ota_job_id}
+
+    def get(self, endpoint, params=None):
+        nodes = self.created[params["ota_job_id"]]
+        return {"node_status": [{"node_id": node, "status": "success" if i % 2 else "in_progress"}
+                                for i, node in enumerate(nodes)]}
+
+
+NODES = [f"n{i}" for i in range(25)]
+
+
+def test_large_node_lists_become_a_job_group_and_failed_chunks_are_retried(tmp_path):
+    api_client = FakeApiClient(failing={"fleet-002"})
+    service = OTAJobService(api_client, group_dir=tmp_path)
+    result = service.create_job("fleet", "img", nodes=NODES, chunk_size=10)
+    assert result["status"] == "partial_failure"
+    assert [job["nodes"] for job in result["jobs"]] == [10, 10, 5]
+    assert result["ota_job_ids"] == ["job-fleet-001", "job-fleet-003"]
+
+    api_client.failing.clear()
+    retried = service.create_job("fleet", "img", nodes=NODES, chunk_size=10)
+    assert retried["status"] == "success" and len(api_client.created) == 3
+
+    status = service.get_job_group_status("fleet")
+    assert status["progress"] == {"total": 25, "succeeded": 12, "failed": 0, "pending": 13}
+
+
+def test_small_node_lists_create_a_single_job(tmp_path):
+    service = OTAJobService(FakeApiClient(), group_dir=tmp_path)
+    assert service.create_job("one", "img", nodes=NODES, chunk_size=100) == {"status": "success",
+                                                                              "ota_job_id": "job-one"}
+
+
+def test_job_group_name_of_another_image_is_refused(tmp_path):
+    api_client = FakeApiClient()
+    service = OTAJobService(api_client, group_dir=tmp_path)
+    service.create_job("fleet", "img1", nodes=NODES, chunk_size=10)
+    result = service.create_job("fleet", "img2", nodes=NODES, chunk_size=10)
+    assert result["status"] == "failure" and result["error_code"] == 409
+    assert service.load_job_group("fleet")["ota_image_id"] == "img1"
+    assert len(api_client.created) == 3
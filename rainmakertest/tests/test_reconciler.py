@@ -0,0 +1,54 @@
+from ..nodes.node_admin_service import NodeAdminService
+from ..nodes.reconciler import NodeReconciler, diff_node
+
+
+class FakeAdminApiClient:
+    """In-memory /v1/admin/nodes supporting GET by node_id, PUT (add tags/metadata) and DELETE (tags)"""
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.requests = 0
+
+    def get(self, endpoint, params=None):
+        node = self.nodes.get(params["node_id"])
+        return {"nodes": [{"node_id": params["node_id"], **node}] if node else []}
+
+    def put(self, endpoint, json=None, params=None):
+        self.requests += 1
+        node = self.nodes[params["node_id"]]
+        node["tags"] = sorted(set(node["tags"]) | set(json.get("tags") or []))
+        node["metadata"].update(json.get("metadata") or {})
+        return {"status": "success"}
+
+    def delete(self, endpoint, json=None, params=None):
+        self.requests += 1
+        node = self.nodes[params["node_id"]]
+        node["tags"] = [tag for tag in node["tags"] if tag not in json["tags"]]
+        return {"status": "success"}
+
+
+def test_diff_node_adds_missing_and_removes_extra_tags():
+    operations = diff_node({"tags": ["a", "b"], "metadata": {"room": "1"}},
+                           {"tags": ["b", "c"], "metadata": {"room": "2"}})
+    assert operations == [{"op": "update", "tags": ["a"], "metadata": {"room": "1"}},
+                          {"op": "remove_tags", "tags": ["c"]}]
+    assert diff_node({"tags": ["a"]}, {"tags": ["a"], "metadata": {}}) == []
+
+
+def test_plan_and_apply_converge_to_the_desired_state():
+    api_client = FakeAdminApiClient({
+        "n1": {"tags": ["old"], "metadata": {}},
+        "n2": {"tags": ["keep"], "metadata": {}},
+    })
+    reconciler = NodeReconciler(NodeAdminService(api_client), max_workers=4)
+    desired = [{"node_id": "n1", "tags": ["new"], "metadata": {"room": "a"}},
+               {"node_id": "n2", "tags": ["keep"], "metadata": None},
+               {"node_id": "n9", "tags": ["x"], "metadata": None}]
+    plan = reconciler.plan(desired)
+    assert (plan["to_change"], plan["in_sync"], plan["unknown_nodes"]) == (1, 1, ["n9"])
+    assert plan["estimated_requests"] == {"reads": 3, "writes": 2}
+
+    summary = reconciler.apply(plan)
+    assert summary["failed"] == 0 and summary["requests_sent"] == api_client.requests == 2
+    assert api_client.nodes["n1"] == {"tags": ["new"], "metadata": {"room": "a"}}
+    assert reconciler.plan(desired)["to_change"] == 0
@@ -0,0 +1,56 @@
+from ..ota.rollout import RolloutOrchestrator, parse_target_query, plan_waves
+
+
+class FakeJobService:
+    """Creates jobs whose nodes finish on the first status poll; nodes in `failing` fail"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.jobs = {}
+        self.cancelled = []
+
+    def create_job(self, ota_job_name, ota_image_id, nodes=None, **options):
+        ota_job_id = f"job{len(self.jobs)}"
+        self.jobs[ota_job_id] = nodes
+        return {"status": "success", "ota_job_id": ota_job_id}
+
+    def get_job_status(self, ota_job_id):
+        return {"node_status": [{"node_id": node, "status": "failed" if node in self.failing else "success"}
+                                for node in self.jobs[ota_job_id]]}
+
+    def update_job(self, ota_job_id, archive=None):
+        self.cancelled.append(ota_job_id)
+        return {"status": "success"}
+
+
+NODES = [f"n{i}" for i in range(200)]
+
+
+def test_plan_waves_is_deterministic_and_cumulative():
+    waves = plan_waves(NODES, [1, 10, 100], canary=3, seed="r1")
+    assert [len(wave) for wave in waves] == [3, 17, 180]
+    assert waves == plan_waves(reversed(NODES), [1, 10, 100], canary=3, seed="r1")
+    assert sorted(sum(waves, [])) == sorted(NODES)
+
+
+def test_parse_target_query():
+    query = parse_target_query("model=switch,tag=lab,tag!=beta,online=true")
+    assert query == {"filters": {"model": "switch"}, "all_tags": ["lab"], "not_tags": ["beta"], "online": True}
+
+
+def test_rollout_halts_on_failing_wave_and_keeps_later_waves_pending(tmp_path):
+    waves = plan_waves(NODES, [10, 50, 100], seed="r2")
+    jobs = FakeJobService(failing=waves[1][:5])
+    orchestrator = RolloutOrchestrator(jobs, "img", "r2", max_failure_rate=0.05, poll_interval=0,
+                                       cancel_on_halt=True, state_path=tmp_path / "r2.json")
+    summary = orchestrator.run(waves)
+    assert summary["status"] == "halted"
+    assert [wave["status"] for wave in summary["waves"]] == ["passed", "halted", "pending"]
+    assert jobs.cancelled == ["job1"] and len(jobs.jobs) == 2
+
+
+def test_rollout_completes_all_waves(tmp_path):
+    jobs = FakeJobService()
+    orchestrator = RolloutOrchestrator(jobs, "img", "r3", poll_interval=0, state_path=tmp_path / "r3.json")
+    summary = orchestrator.run(plan_waves(NODES, [1, 100], canary=2, seed="r3"))
+    assert summary["status"] == "complete" and summary["nodes_targeted"] == 200
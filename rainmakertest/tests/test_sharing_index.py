@@ -0,0 +1,46 @@
+from ..nodes.sharing_index import SharingIndex
+
+
+class FakeSharingService:
+    """Answers get_sharing_info the way /v1/user/nodes/sharing does"""
+
+    def __init__(self, shares):
+        self.shares = shares
+
+    def get_sharing_info(self, node_id=None):
+        return {"node_sharing": [{"node_id": node_id, "users": self.shares.get(node_id, {})}]}
+
+
+class FakeAdminService:
+    def __init__(self, user_nodes):
+        self.user_nodes = user_nodes
+
+    def get_admin_user_nodes(self, user_name=None):
+        return {"nodes": self.user_nodes.get(user_name, [])}
+
+
+SHARES = {
+    "n1": {"primary": ["alice"], "secondary": ["bob"]},
+    "n2": {"secondary": ["bob"]},
+}
+
+
+def test_build_answers_access_queries_after_reload(tmp_path):
+    index = SharingIndex.for_config("test", inventory_dir=tmp_path)
+    summary = index.build(FakeSharingService(SHARES), ["n1", "n2"])
+    assert summary["succeeded"] == 2
+
+    reloaded = SharingIndex.for_config("test", inventory_dir=tmp_path)
+    assert reloaded.users_of("n1") == {"alice": "primary", "bob": "secondary"}
+    assert reloaded.nodes_of("bob") == {"n1": "secondary", "n2": "secondary"}
+    assert reloaded.audit()["nodes_without_primary"] == ["n2"]
+
+
+def test_refresh_user_replaces_reachable_nodes(tmp_path):
+    index = SharingIndex.for_config("test", inventory_dir=tmp_path)
+    index.build(FakeSharingService(SHARES), ["n1", "n2"])
+
+    index.refresh_user(FakeAdminService({"bob": ["n2", "n3"]}), "bob")
+    assert index.nodes_of("bob") == {"n2": "secondary", "n3": "secondary"}
+    assert index.users_of("n1") == {"alice": "primary"}
+    assert index.users_of("n3") == {"bob": "secondary"}
@@ -0,0 +1,41 @@
+import threading
+
+from ..nodes.status_watcher import StatusWatcher
+
+
+class FakeStatusNodeService:
+    """Replays a connectivity sequence per node (repeating the last value); `None` answers with a failure"""
+
+    def __init__(self, sequences):
+        self.sequences = sequences
+        self.polls = {node_id: 0 for node_id in sequences}
+        self.lock = threading.Lock()
+
+    def get_node_status(self, node_id):
+        with self.lock:
+            sequence = self.sequences[node_id]
+            connected = sequence[min(self.polls[node_id], len(sequence) - 1)]
+            self.polls[node_id] += 1
+        if connected is None:
+            return {"status": "failure", "description": "node not found"}
+        return {"connectivity": {"connected": connected, "timestamp": 0}}
+
+
+def test_watch_emits_only_transitions_and_backs_off_stable_nodes():
+    service = FakeStatusNodeService({
+        "n1": [True, False, True],
+        "n2": [True],
+        "n3": [None]
+    })
+    watcher = StatusWatcher(service, budget=1000, fast_interval=0.01, slow_interval=0.08)
+    events = []
+    summary = watcher.watch(["n1", "n2", "n3", "n1"], events.append, duration=0.4)
+
+    assert [(event["node_id"], event["from"], event["to"]) for event in events] == [
+        ("n1", "online", "offline"),
+        ("n1", "offline", "online")
+    ]
+    assert (summary["nodes"], summary["events"], summary["online"], summary["offline"]) == (3, 2, 2, 0)
+    assert watcher.states["n3"] is None
+    # Doubling from 10ms up to 80ms fits far fewer polls into 400ms than a fixed 10ms interval
+    assert service.polls["n2"] < 15
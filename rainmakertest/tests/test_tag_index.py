@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from ..nodes.node_admin_service import NodeAdminService
+from ..nodes.tag_index import TagIndex
+
+
+class FakeApiClient:
+    """Accepts every admin node write"""
+
+    def __init__(self):
+        self.writes = 0
+
+    def put(self, endpoint, json=None, params=None):
+        self.writes += 1
+        return {"status": "success"}
+
+    def delete(self, endpoint, json=None, params=None):
+        self.writes += 1
+        return {"status": "success"}
+
+
+def build_index(tmp_path):
+    index = TagIndex.for_config("test", inventory_dir=tmp_path)
+    index.rebuild([("n1", ["lab", "switch"]), ("n2", ["lab", "beta"]), ("n3", ["switch"]), ("n4", [])])
+    return index
+
+
+def test_query_set_algebra(tmp_path):
+    index = build_index(tmp_path)
+    assert index.query(all_tags=["lab", "switch"]) == {"n1"}
+    assert index.query(any_tags=["beta", "switch"]) == {"n1", "n2", "n3"}
+    assert index.query(all_tags=["lab"], not_tags=["beta"]) == {"n1"}
+    assert index.query(not_tags=["lab"]) == {"n3", "n4"}
+    assert index.query(all_tags=["missing"]) == set()
+
+
+def test_save_load_round_trip_and_tag_removal(tmp_path):
+    index = build_index(tmp_path)
+    index.remove_tags("n2", ["beta"])
+    index.set_tags("n3", ["lab"])
+    index.save()
+
+    reloaded = TagIndex.for_config("test", inventory_dir=tmp_path)
+    assert reloaded.tag_counts() == {"lab": 3, "switch": 1}
+    assert "beta" not in reloaded.tags() and len(reloaded) == 4
+
+
+def test_flush_only_writes_changes_and_batch_saves_once(tmp_path, monkeypatch):
+    index = build_index(tmp_path)
+    assert index.flush() and not index.flush()
+
+    saves = []
+    monkeypatch.setattr(index, "save", lambda: saves.append(1) or setattr(index, "_dirty", False))
+    with index.batch():
+        for i in range(50):
+            index.add_tags(f"x{i}", ["new"])
+            assert not index.flush()
+    assert saves == [1]
+
+
+def test_concurrent_admin_writes_save_index_once(tmp_path):
+    index = build_index(tmp_path)
+    index.save()
+    api_client = FakeApiClient()
+    service = NodeAdminService(api_client, tag_index=index)
+    with service.deferred_tag_index_saves():
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = [*executor.map(lambda i: service.update_admin_node(f"x{i}", tags=["bulk"]), range(500))]
+    assert all(result["status"] == "success" for result in results)
+    assert TagIndex.for_config("test", inventory_dir=tmp_path).tag_counts()["bulk"] == 500
+
+
+def test_index_save_failure_does_not_fail_accepted_write(tmp_path):
+    index = build_index(tmp_path)
+    index.path = tmp_path / "missing" / "test.tags.json"
+    service = NodeAdminService(FakeApiClient(), tag_index=index)
+    assert service.update_admin_node("n4", tags=["lab"]) == {"status": "success"}
+    assert service.remove_admin_node_tags("n1", ["lab"]) == {"status": "success"}
+    assert index.query(all_tags=["lab"]) == {"n2", "n4"}
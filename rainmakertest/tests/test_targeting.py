@@ -0,0 +1,21 @@
+from ..ota.targeting import nodes_needing_update
+
+IMAGE = {"ota_image_id": "img", "fw_version": "2.0", "model": "switch"}
+VERSIONS = {
+    "a": {"fw_version": "1.0", "model": "switch"},
+    "b": {"fw_version": "2.0", "model": "switch"},
+    "c": {"fw_version": "1.0", "model": "light"},
+}
+
+
+def test_excludes_up_to_date_nodes_and_keeps_unverified():
+    result = nodes_needing_update(["a", "b", "c", "d"], IMAGE, VERSIONS)
+    assert result["nodes"] == ["a", "c", "d"]
+    assert result["up_to_date"] == ["b"] and result["unverified"] == ["d"]
+    assert result["excluded"] == 1
+
+
+def test_match_model_excludes_other_models():
+    result = nodes_needing_update(["a", "b", "c"], IMAGE, VERSIONS, match_model=True)
+    assert result["nodes"] == ["a"]
+    assert result["model_mismatch"] == ["c"] and result["excluded"] == 2
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from ..nodes import tsdata_cache
+from ..nodes.tsdata_cache import TsDataCache, merge_windows, missing_windows
+
+
+class FakeNodeService:
+    """Serves points from `series`, recording each requested range"""
+
+    def __init__(self, series):
+        self.series = series
+        self.requests = []
+
+    def iter_tsdata(self, node_id, param_name, start_time, end_time, data_type="float", page_size=200):
+        self.requests.append((start_time, end_time))
+        return [(ts, value) for ts, value in self.series if start_time <= ts <= end_time]
+
+
+def test_merge_and_missing_windows():
+    windows = merge_windows([[20, 30], [0, 9], [10, 12], [40, 50]])
+    assert windows == [[0, 12], [20, 30], [40, 50]]
+    assert missing_windows(windows, 5, 45) == [(13, 19), (31, 39)]
+    assert missing_windows(windows, 0, 12) == []
+    assert missing_windows(windows, 51, 60) == [(51, 60)]
+
+
+def test_fetch_only_downloads_gaps_and_leaves_recent_margin_uncovered(tmp_path):
+    now = int(time.time())
+    service = FakeNodeService([(now - 1000, 1.0), (now - 500, 2.0), (now - 10, 3.0)])
+    cache = TsDataCache(service, "n1", "Temp.Temp", cache_dir=tmp_path, settle_seconds=60)
+    assert cache.fetch(now - 2000, now)["new_points"] == 3
+    assert cache.windows == [[now - 2000, now - 60]]
+
+    service.series.append((now - 5, 4.0))  # arrives late, inside the unsettled margin
+    fetched = cache.fetch(now - 2000, now)
+    assert service.requests[-1] == (now - 59, now)
+    assert fetched["new_points"] == 1
+    assert [value for _, value in cache.points(now - 2000, now)] == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_aggregate_numpy_and_fallback_agree(tmp_path, monkeypatch):
+    series = [(1000 + i * 7, float(i % 13)) for i in range(200)]
+    cache = TsDataCache(FakeNodeService(series), "n1", "Temp.Temp", cache_dir=tmp_path, settle_seconds=0)
+    cache.fetch(1000, 3000)
+    monkeypatch.setattr(tsdata_cache, "np", None)
+    fallback = cache.aggregate(1000, 3000, 100)
+    assert sum(row["count"] for row in fallback) == 200
+    assert fallback[0] == {"start": 1000, "count": 15, "min": 0.0, "max": 12.0, "avg": 79 / 15}
+    monkeypatch.undo()
+    if tsdata_cache.np is None:
+        pytest.skip("NumPy not installed")
+    vectorised = cache.aggregate(1000, 3000, 100)
+    assert len(vectorised) == len(fallback)
+    for row, expected in zip(vectorised, fallback):
+        assert row == pytest.approx(expected)
@@ -4,18 +4,152 @@ import logging
 import os
 from pathlib import Path
 import json
+import gzip
+import tempfile
+import threading
+import zlib
+from requests.adapters import HTTPAdapter
 from .config_manager import ConfigManager
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_POOL_SIZE = 10
+# Request bodies smaller than this are sent uncompressed even on compression-enabled endpoints
+DEFAULT_COMPRESSION_MIN_SIZE = 64 * 1024
+COMPRESSION_LEVEL = 6
+# Compressed streamed bodies are spooled to disk above this size
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+class TransferMetrics:
+    """Thread-safe counters of bytes sent and received, before and after compression."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.compressed_requests = 0
+            self.request_bytes = 0
+            self.request_bytes_sent = 0
+            self.compressed_responses = 0
+            self.response_bytes = 0
+            self.response_bytes_received = 0
+
+    def record_request(self, size: int, sent: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.request_bytes += size
+            self.request_bytes_sent += sent
+            if sent != size:
+                self.compressed_requests += 1
+
+    def record_response(self, response: requests.Response) -> None:
+        size = len(response.content or b"")
+        received = size
+        if response.headers.get('Content-Encoding') in ('gzip', 'deflate'):
+            # urllib3 counts the bytes read off the wire before decoding
+            tell = getattr(response.raw, 'tell', None)
+            received = tell() if tell else size
+        with self._lock:
+            self.response_bytes += size
+            self.response_bytes_received += received
+            if received != size:
+                self.compressed_responses += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "compressed_requests": self.compressed_requests,
+                "request_bytes": self.request_bytes,
+                "request_bytes_sent": self.request_bytes_sent,
+                "request_bytes_saved": self.request_bytes - self.request_bytes_sent,
+                "compressed_responses": self.compressed_responses,
+                "response_bytes": self.response_bytes,
+                "response_bytes_received": self.response_bytes_received,
+                "response_bytes_saved": self.response_bytes - self.response_bytes_received
+            }
+
+
+def _gzip_stream(body: Any, chunk_size: int = 256 * 1024):
+    """Gzip a file-like body into a spooled temporary file; returns (file, compressed_size)"""
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, 31)
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    while True:
+        chunk = body.read(chunk_size)
+        if not chunk:
+            break
+        spooled.write(compressor.compress(chunk))
+    spooled.write(compressor.flush())
+    size = spooled.tell()
+    spooled.seek(0)
+    return spooled, size
+
+
 class ApiClient:
-    def __init__(self, config_id: Optional[str] = None):
+    def __init__(self, config_id: Optional[str] = None, pool_size: int = DEFAULT_POOL_SIZE):
         """Initialize API client with optional config ID."""
         self.config_manager = ConfigManager(config_id)
         self.config_id = config_id
         self.logger = logger  # Use the module-level logger
         self._config_data = None
         self._fallback_config = None
+        # Shared session so concurrent callers reuse pooled keep-alive connections
+        self.session = requests.Session()
+        self.set_pool_size(pool_size)
+        # Endpoint path -> minimum body size for gzip request compression (opt-in per endpoint)
+        self.compression: Dict[str, int] = {}
+        self.metrics = TransferMetrics()
+
+    def set_pool_size(self, pool_size: int) -> None:
+        """Size the connection pool for the number of threads sharing this client."""
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.pool_size = pool_size
+
+    def enable_compression(self, endpoint: str, min_size: int = DEFAULT_COMPRESSION_MIN_SIZE) -> None:
+        """Gzip request bodies of at least min_size bytes sent to endpoint.
+
+        Only enable this for endpoints whose server accepts Content-Encoding:
+        gzip. Endpoints can also be listed in the config file as
+        "request_compression": {"/v1/admin/otaimage": 65536}.
+        """
+        self.compression[self._endpoint_path(endpoint)] = min_size
+
+    def disable_compression(self, endpoint: str) -> None:
+        self.compression.pop(self._endpoint_path(endpoint), None)
+
+    @staticmethod
+    def _endpoint_path(endpoint: str) -> str:
+        return "/" + endpoint.split("?", 1)[0].strip("/")
+
+    def _compression_min_size(self, endpoint: str) -> Optional[int]:
+        path = self._endpoint_path(endpoint)
+        if path in self.compression:
+            return self.compression[path]
+        configured = {self._endpoint_path(k): v for k, v in
+                      (self._load_config().get('request_compression') or {}).items()}
+        return configured.get(path)
+
+    def _json_body(self, endpoint: str, payload: Any, headers: Dict[str, str]) -> Optional[bytes]:
+        """Serialize a JSON payload, gzipping it if the endpoint has compression enabled"""
+        if payload is None:
+            return None
+        body = json.dumps(payload).encode('utf-8')
+        min_size = self._compression_min_size(endpoint)
+        sent = body
+        if min_size is not None and len(body) >= min_size:
+            sent = gzip.compress(body, COMPRESSION_LEVEL)
+            if len(sent) < len(body):
+                headers['Content-Encoding'] = 'gzip'
+            else:
+                sent = body
+        self.metrics.record_request(len(body), len(sent))
+        return sent
 
     def set_token(self, token: str) -> None:
         """Set the access token in the configuration."""
@@ -66,6 +200,7 @@ class ApiClient:
 
     def _handle_response(self, response: requests.Response) -> Dict[str, Any]:
         """Handle API response and common error cases"""
+        self.metrics.record_response(response)
         try:
             response.raise_for_status()
             return response.json()
@@ -107,7 +242,7 @@ class ApiClient:
         headers = self._get_headers(authenticate)
         
         try:
-            response = requests.get(
+            response = self.session.get(
                 url, 
                 headers=headers, 
                 params=params
@@ -139,10 +274,63 @@ class ApiClient:
         # ---------------------
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 url, 
                 headers=headers, 
-                json=json or data,
+                data=self._json_body(endpoint, json or data, headers),
+                params=params
+            )
+            return self._handle_response(response)
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Request failed: {str(e)}")
+            return {
+                "status": "failure",
+                "message": str(e),
+                "error_code": 500
+            }
+
+    def post_stream(self, endpoint: str, body: Any, params: Optional[Dict[str, Any]] = None,
+                    authenticate: bool = True) -> Dict[str, Any]:
+        """POST a pre-encoded JSON body from a file-like object without loading it into memory.
+
+        On compression-enabled endpoints a seekable body is gzipped into a
+        spooled file; when that is not smaller, the body is rewound and sent
+        as is.
+        """
+        config = self._load_config()
+        base_url = config['environments']['http_base_url']
+        url = f"{base_url}/{endpoint.lstrip('/')}"
+
+        headers = self._get_headers(authenticate)
+
+        self.logger.debug("POST (streamed) Request:")
+        self.logger.debug(f"URL: {url}")
+        self.logger.debug(f"Params: {params}")
+        self.logger.debug(f"Body length: {len(body)}")
+
+        size = len(body)
+        min_size = self._compression_min_size(endpoint)
+        spooled = None
+        sent = size
+        if min_size is not None and size >= min_size and hasattr(body, 'seek'):
+            spooled, compressed = _gzip_stream(body)
+            if compressed < size:
+                body, sent = spooled, compressed
+                headers['Content-Encoding'] = 'gzip'
+                headers['Content-Length'] = str(sent)
+                self.logger.debug(f"Compressed body: {size} -> {sent} bytes")
+            else:
+                self.logger.debug(f"Compression would not shrink the body ({size} -> {compressed} bytes)")
+                spooled.close()
+                spooled = None
+                body.seek(0)
+        self.metrics.record_request(size, sent)
+
+        try:
+            response = self.session.post(
+                url,
+                headers=headers,
+                data=body,
                 params=params
             )
             return self._handle_response(response)
@@ -153,6 +341,9 @@ class ApiClient:
                 "message": str(e),
                 "error_code": 500
             }
+        finally:
+            if spooled is not None:
+                spooled.close()
 
     def put(self, endpoint: str, data: Optional[Dict[str, Any]] = None, json: Optional[Dict[str, Any]] = None, 
             params: Optional[Dict[str, Any]] = None, authenticate: bool = True) -> Dict[str, Any]:
@@ -172,10 +363,10 @@ class ApiClient:
         # ---------------------
         
         try:
-            response = requests.put(
+            response = self.session.put(
                 url, 
                 headers=headers, 
-                json=json or data,
+                data=self._json_body(endpoint, json or data, headers),
                 params=params
             )
             return self._handle_response(response)
@@ -196,7 +387,7 @@ class ApiClient:
         headers = self._get_headers(authenticate)
         
         try:
-            response = requests.delete(
+            response = self.session.delete(
                 url, 
                 headers=headers, 
                 json=json,
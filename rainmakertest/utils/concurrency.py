@@ -0,0 +1,113 @@
+"""
+Helpers for running many API calls concurrently over a shared ApiClient.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+
+
+class RateLimiter:
+    """Thread-safe token bucket limiting calls to `rate` per second."""
+
+    def __init__(self, rate: Optional[float], burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate or 1))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a call is allowed"""
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_failure(response: Any) -> bool:
+    """Check whether an API response is one of the failure dicts ApiClient returns"""
+    return isinstance(response, dict) and response.get("status") == "failure"
+
+
+class BatchResult:
+    """Outcome of a concurrent batch: per-item results, failures and throughput."""
+
+    def __init__(self):
+        self.results: List[Dict] = []
+        self.failures: List[Dict] = []
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    def summary(self) -> Dict:
+        elapsed = self.elapsed
+        total = len(self.results) + len(self.failures)
+        return {
+            "total": total,
+            "succeeded": len(self.results),
+            "failed": len(self.failures),
+            "elapsed_seconds": round(elapsed, 3),
+            "items_per_second": round(total / elapsed, 2) if elapsed > 0 else None,
+            "failures": self.failures
+        }
+
+
+def run_concurrent(
+        func: Callable[[Any], Any],
+        items: Iterable[Any],
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        rate_limiter: Optional[RateLimiter] = None,
+        key: Callable[[Any], Any] = lambda item: item,
+        on_result: Optional[Callable[[Any, Any, Optional[str]], None]] = None
+) -> BatchResult:
+    """Call func on every item from a thread pool.
+
+    Exceptions and ApiClient failure dicts are collected as failures keyed by
+    key(item) instead of aborting the batch. on_result(item, result, error) is
+    called in the calling thread as each item finishes, e.g. for progress.
+    """
+    batch = BatchResult()
+
+    def call(item):
+        if rate_limiter:
+            rate_limiter.acquire()
+        return func(item)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(call, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            error = None
+            try:
+                result = future.result()
+                if is_failure(result):
+                    error = result.get("description") or result.get("message") or "Request failed"
+            except Exception as e:
+                logger.debug(f"Batch item {key(item)} failed: {e}")
+                result, error = None, str(e)
+            if error:
+                batch.failures.append({"item": key(item), "error": error})
+            else:
+                batch.results.append({"item": key(item), "result": result})
+            if on_result:
+                on_result(item, result, error)
+    batch.finished = time.monotonic()
+    return batch
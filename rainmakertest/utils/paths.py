@@ -46,6 +46,20 @@ def get_firmware_dir() -> Path:
     logger.debug(f"Firmware directory: {firmware_dir}")
     return firmware_dir
 
+def get_inventory_dir() -> Path:
+    """Get the node inventory directory."""
+    inventory_dir = get_user_config_dir() / "inventory"
+    inventory_dir.mkdir(parents=True, exist_ok=True)
+    logger.debug(f"Inventory directory: {inventory_dir}")
+    return inventory_dir
+
+def get_tsdata_dir() -> Path:
+    """Get the time-series data cache directory."""
+    tsdata_dir = get_user_config_dir() / "tsdata"
+    tsdata_dir.mkdir(parents=True, exist_ok=True)
+    logger.debug(f"Time-series cache directory: {tsdata_dir}")
+    return tsdata_dir
+
 def get_temp_dir() -> Path:
     """Get the temporary directory for configs."""
     temp_dir = Path("temp/rainmaker")